@@ -31,11 +31,34 @@ class Config:
     
     # Google Gemini API
     GEMINI_KEY = os.getenv('GEMINI_API_KEY', '')
+    GEMINI_MODEL = 'models/gemini-2.0-flash'
+    GEMINI_EMBED_MODEL = 'models/text-embedding-004'
+    
+    # ========== AI 後端設定 ==========
+    # 'gemini': 直接呼叫 Gemini
+    # 'record': 呼叫 Gemini 並將回應與延遲錄製到 LLM_CASSETTE_PATH
+    # 'replay': 離線重播錄製檔（不需網路與 API 金鑰）
+    # 'synthetic': 依 LLM_SYNTHETIC_LATENCY 產生合成回應
+    LLM_BACKEND = os.getenv('LLM_BACKEND', 'gemini')
+    LLM_CASSETTE_PATH = os.path.join(os.path.dirname(__file__), 'data', 'llm_cassette.json')
+    LLM_REPLAY_SPEED = float(os.getenv('LLM_REPLAY_SPEED', '1.0'))  # 0 = 不等待
+    LLM_SYNTHETIC_SEED = 0
+    # 延遲分佈（秒）：('fixed', s) / ('uniform', lo, hi) / ('normal', mu, sd) / ('lognormal', 中位數, sigma)
+    LLM_SYNTHETIC_LATENCY = {
+        'generate': ('lognormal', 0.8, 0.3),
+        'chat': ('lognormal', 1.2, 0.3),
+        'transcribe': ('lognormal', 1.5, 0.25),
+        'embed': ('uniform', 0.1, 0.3),
+    }
     
     # 語音克隆 API (aiclonevoicefree.com)
     VOICE_CLONE_API_KEY = os.getenv('MIX_VOICE_API_KEY', '')
     VOICE_CLONE_UPLOAD_URL = 'http://8.148.211.142:8080/api/upload/audio'
     VOICE_CLONE_SYNC_URL = 'https://aivoiceclonefree.com/api/instant/clone-sync'
+    # 語音合成後端：'clone'（語音克隆 API）、'synthetic'（本地合成音調，不需網路與 API 金鑰）
+    TTS_BACKEND = os.getenv('TTS_BACKEND', 'clone')
+    TTS_SYNTHETIC_LATENCY = 0.3           # 合成語音每段的模擬延遲（秒）
+    TTS_SYNTHETIC_CHARS_PER_SECOND = 6.0  # 合成語音長度（每秒字數）
     
     # 語音 ID (用於區分系統音和分身音)
     # 這些需要先上傳對應的語音樣本後獲得
@@ -53,6 +76,14 @@ class Config:
     OLED_I2C_ADDRESS = 0x3C
     OLED_WIDTH = 128
     OLED_HEIGHT = 64
+    # 顯示後端：ssd1306（實機）、dummy / emulator（luma）、bitmap（記憶體模擬，可輸出 PNG）
+    DISPLAY_BACKEND = os.getenv('DISPLAY_BACKEND', 'ssd1306')
+    DISPLAY_LINE_CACHE_SIZE = 256     # 單行排版快取項目上限
+    DISPLAY_GLYPH_CACHE_SIZE = 2048   # 字形點陣快取項目上限
+    DISPLAY_MAX_FPS = 20              # 渲染幀率上限（較新的畫面狀態會覆蓋尚未渲染的）
+    DISPLAY_MARQUEE_SPEED = 30        # 跑馬燈移動速度（像素/秒）
+    DISPLAY_MARQUEE_PASSES = 2        # 跑馬燈圈數（跑完停在開頭，不再送出畫面）
+    DISPLAY_MARQUEE_PAUSE = 1.5       # 跑馬燈每圈開始前的停頓（秒）
     
     # OLED I2C 腳位 (硬體已固定)
     GPIO_SDA = 2  # SDA (GPIO 2)
@@ -67,6 +98,29 @@ class Config:
     GPIO_ROTARY_CLK = 22  # CLK (Pin 15) - 時鐘信號
     GPIO_ROTARY_DT = 27   # DT (Pin 13) - 方向信號
     GPIO_ROTARY_SW = 17    # SW (Pin 11) - 按鈕 (Active Low, Pull-up required)
+    # 硬體後端：gpio（實際腳位）、mock（gpiozero 模擬腳位，供 modules.hardware_sim 腳本重播）
+    HARDWARE_BACKEND = os.getenv('HARDWARE_BACKEND', 'gpio')
+    ROTARY_ACCEL_INTERVAL = 0.04  # 刻度間隔短於此秒數（約每秒 25 格）視為快速旋轉
+    ROTARY_ACCEL_MAX = 4          # 快速旋轉時每格最多計為幾格（1 = 不加速）
+    
+    # 輸入事件的處理策略（每條通道的處理函式以 Task 執行，不同通道不互相阻塞）
+    #   serialize: 等前一次處理完成再執行
+    #   latest: 取消仍在執行的前一次（以最新的為準）
+    #   drop: 前一次仍在執行時忽略新事件
+    # 錄音按鈕的事件在佇列中優先處理；其處理只開始 / 停止錄音，回合本身在 main 的回合 Task 執行，
+    # 因此放開按鈕不會排在前一個回合之後
+    INPUT_POLICIES = {
+        'rotate': 'serialize',
+        'press': 'latest',
+        'record_press': 'serialize',
+        'record_release': 'serialize',
+    }
+    # 共用通道的事件（未列出的事件各自一條通道）：錄音按鈕的按下與放開依序處理，
+    # 放開不會在按下的處理（等待上一段錄音寫完）尚未開始錄音時先執行而被忽略
+    INPUT_LANES = {
+        'record_press': 'record',
+        'record_release': 'record',
+    }
     
     # 為了向後相容，保留 PIN_* 命名
     PIN_CLK = GPIO_ROTARY_CLK
@@ -81,19 +135,100 @@ class Config:
     GPIO_RECORD_BUTTON = 23  # Pin 16 (Active Low, Pull-up required)
     
     # ========== 音訊設定 ==========
+    # 音訊後端：sounddevice（實際裝置）、null（模擬串流：輸入靜音、輸出丟棄，不需 PortAudio）
+    AUDIO_BACKEND = os.getenv('AUDIO_BACKEND', 'sounddevice')
     AUDIO_INPUT_CARD = 1  # USB Microphone (Alsa default card 1)
     AUDIO_SAMPLE_RATE = 16000
     AUDIO_CHANNELS = 1
-    AUDIO_FORMAT = 'wav'
+    PLAYBACK_SAMPLE_RATE = 48000  # 播放引擎輸出取樣率（片段會重取樣到此取樣率）
+    PLAYBACK_BLOCKSIZE = 512      # 播放回呼區塊幀數 (約 10.7 ms)
+    # 錄音編碼（STT 上傳格式）：'wav' (32-bit float)、'flac' (16-bit 無損)、'opus' (Ogg Opus 有損)
+    AUDIO_FORMAT = os.getenv('AUDIO_FORMAT', 'flac')
+    AUDIO_BLOCKSIZE = 1024      # 錄音回呼區塊幀數 (64 ms @ 16 kHz)
+    AUDIO_RING_BLOCKS = 32      # 環形緩衝區區塊數（約 2 秒），寫入執行緒落後超過此值才會溢位
+    AUDIO_PREROLL_MS = 500      # 按下錄音前保留的預錄長度（毫秒，最多環形緩衝區的一半）
+    
+    # 語音端點偵測（免持模式：說完話自動停止錄音，放開按鈕不停止）
+    VAD_ENABLED = os.getenv('VAD_ENABLED', 'false').lower() == 'true'
+    VAD_FRAME_MS = 20             # 分析幀長度（毫秒）
+    VAD_THRESHOLD_DB = -45.0      # 語音能量下限 (dBFS)
+    VAD_NOISE_MARGIN_DB = 10.0    # 需高出噪音底的分貝數
+    VAD_HANGOVER_MS = 700         # 連續靜音超過此毫秒數即判定說話結束
+    VAD_MIN_SPEECH_MS = 200       # 累積語音超過此毫秒數才開始偵測結尾
+    VAD_MAX_RECORD_SECONDS = 30.0 # 免持模式的錄音上限（一直沒說話時停止）
+    
+    # ========== 外部 API 韌性設定 ==========
+    # deadline: 單次呼叫期限（秒）
+    # retries: 失敗後重試次數（僅限冪等呼叫）
+    # hedge: 呼叫超過該端點 p95 延遲時送出第二個請求
+    # idempotent: 是否可安全重試
+    API_POLICIES = {
+        'gemini_generate': {'deadline': 20.0, 'retries': 2, 'hedge': True},
+        'gemini_stt': {'deadline': 30.0, 'retries': 1, 'hedge': False},
+        'gemini_embed': {'deadline': 20.0, 'retries': 3, 'hedge': False},
+        'clone_upload': {'deadline': 30.0, 'retries': 0, 'idempotent': False},
+        'clone_sync': {'deadline': 25.0, 'retries': 2, 'hedge': False},
+        'clone_download': {'deadline': 15.0, 'retries': 2, 'hedge': True},
+    }
+    API_RETRY_BASE_DELAY = 0.5   # 退避基準（秒），第 n 次重試上限為 base * 2^n
+    API_RETRY_MAX_DELAY = 4.0    # 退避上限（秒）
+    API_HEDGE_MIN_SAMPLES = 20   # 累積足夠延遲樣本後才啟用對沖
+    API_BREAKER_FAILURES = 5     # 連續失敗幾次後斷路
+    API_BREAKER_RESET = 30.0     # 斷路後冷卻秒數
+    
+    # ========== HTTP 連線池設定（語音克隆 API） ==========
+    HTTP_MAX_CONNECTIONS = 8       # 連線池上限
+    HTTP_MAX_KEEPALIVE = 4         # 保持的閒置連線數
+    HTTP_KEEPALIVE_EXPIRY = 60.0   # 閒置連線保留秒數（需大於 WARMUP_KEEPALIVE_INTERVAL）
+    HTTP_MAX_CONCURRENCY = 4       # 同時進行的請求上限
+    
+    # ========== 啟動預熱設定 ==========
+    WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', '1') == '1'  # 設為 0 可量測冷啟動
+    WARMUP_MAX_WAIT = 3.0              # 啟動畫面後最多再等待預熱的秒數
+    WARMUP_KEEPALIVE_INTERVAL = 45.0   # 閒置時保持連線的 ping 間隔（秒）
+    GEMINI_API_HOST = 'generativelanguage.googleapis.com'
+    
+    # ========== 嵌入向量回填設定 ==========
+    EMBED_BATCH_SIZE = 32              # 每次 API 呼叫的記憶筆數
+    EMBED_REQUESTS_PER_MINUTE = 60     # 嵌入 API 呼叫速率上限
+    EMBED_IDLE_POLL = 300.0            # 無待處理記憶時的輪詢間隔（秒）
+    EMBED_RETRY_DELAY = 30.0           # 批次失敗後等待秒數
+    EMBED_MAX_ROW_FAILURES = 3         # 單筆記憶嵌入失敗幾次後略過（例如內容超過 token 上限）
+    
+    # ========== 指標設定 ==========
+    METRICS_WINDOW = 500  # 每個觀測指標保留的樣本數
+    METRICS_DB_MAX_TURNS = 5000  # 指標檔保留的回合數
+    METRICS_SNAPSHOT_INTERVAL = 300.0  # 計數器與觀測摘要寫入指標檔的間隔秒數（結束時也會寫入）
+    METRICS_DB_MAX_SNAPSHOTS = 500     # 指標檔保留的快照數
     
     # ========== 路徑設定 ==========
     # 資料庫路徑
     DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'memories.db')
+    # 回合階段耗時指標檔（空字串則不寫入）
+    METRICS_DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'metrics.db')
     
     # 資源路徑
     ASSETS_SYSTEM_PATH = os.path.join(os.path.dirname(__file__), 'assets', 'system')
     ASSETS_FONTS_PATH = os.path.join(os.path.dirname(__file__), 'assets', 'fonts')
     
+    # 系統音效快取
+    SOUND_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'data', 'sound_cache')
+    SOUND_CACHE_MMAP_BYTES = 1024 * 1024   # 解碼後超過 1 MB 的音效改用記憶體映射
+    SOUND_CACHE_WATCH_INTERVAL = 2.0       # 音效目錄監看間隔（秒）
+    
+    # 語音合成快取
+    TTS_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'data', 'tts_cache')
+    TTS_CACHE_MAX_BYTES = 200 * 1024 * 1024  # 超過上限時淘汰最久未使用的項目
+    TTS_CACHE_CODEC = 'opus'                 # 'flac' 或 'opus'（取樣率不支援 Opus 時改用 FLAC）
+    # 啟動後在背景預先合成的系統音語句（例如固定的介面提示）
+    TTS_PRERENDER_PHRASES = []
+    # 串流下載時每次讀取的位元組數（越小越早開始播放）
+    TTS_STREAM_CHUNK_BYTES = 4096
+    # 長回應依句子切段，同時合成、依序播放
+    TTS_CHUNK_MAX_CHARS = 60   # 每段最多字數（超過時再依逗號切開）
+    TTS_CHUNK_MIN_CHARS = 4    # 過短的句子併入下一段
+    TTS_MAX_IN_FLIGHT = 3      # 同時合成的段數上限
+    
     # ========== 狀態機模式 ==========
     MODE_DAILY = 'daily'      # 每日訪談模式
     MODE_CHAT = 'chat'        # 聊天模式
@@ -104,9 +239,9 @@ class Config:
     def validate(cls):
         """驗證必要的配置是否存在"""
         errors = []
-        if not cls.GEMINI_KEY:
+        if cls.LLM_BACKEND in ('gemini', 'record') and not cls.GEMINI_KEY:
             errors.append('GEMINI_KEY 未設定')
-        if not cls.VOICE_CLONE_API_KEY:
+        if cls.TTS_BACKEND == 'clone' and not cls.VOICE_CLONE_API_KEY:
             errors.append('VOICE_CLONE_API_KEY 未設定')
         return errors
     
@@ -14,21 +14,35 @@
 - config: 系統配置
 - modules.hardware: 硬體控制
 - modules.display: OLED 顯示
+- modules.display_renderer: 非同步顯示渲染（合併畫面狀態、限制幀率）
+- modules.scroll_view: 長回應捲動與日記跑馬燈
 - modules.audio: 音訊處理
 - modules.ai: AI 處理
 - modules.database: 資料庫
+- modules.turn_graph: 聊天回合相依圖
+- modules.embedding_job: 背景嵌入向量回填
+- modules.warmup: 啟動預熱與閒置保持連線
+- modules.metrics: 回合階段耗時、計數器與觀測摘要的定期快照
 """
 
 import asyncio
+import os
 import sys
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 import config
 from modules.hardware import Hardware
 from modules.display import Display
+from modules.display_renderer import DisplayRenderer
+from modules.scroll_view import ScrollView, run_marquee
 from modules.audio import Audio
 from modules.ai import AI
 from modules.database import Database
+from modules.turn_graph import TaskGraph
+from modules.embedding_job import EmbeddingBackfill
+from modules.warmup import Warmup
+from modules.metrics import metrics
 
 class EchoMemo:
     """主系統類別（狀態機）"""
@@ -46,11 +60,24 @@ class EchoMemo:
         
         # 初始化模組
         self.hw = Hardware()
-        self.display = Display()
+        # 顯示器由渲染 Task 擁有，show_* 只張貼畫面狀態不阻塞
+        self.display = DisplayRenderer(Display())
         self.audio = Audio()
         self.ai = AI()
         self.db = Database()
         
+        # 背景嵌入向量回填
+        self.embedding_job = EmbeddingBackfill(self.ai, self.db)
+        self.embedding_task: Optional[asyncio.Task] = None
+        
+        # 連線預熱
+        self.warmup = Warmup(self.ai, self.audio)
+        self.keepalive_task: Optional[asyncio.Task] = None
+        self.prerender_task: Optional[asyncio.Task] = None
+        
+        # 指標快照定期寫入指標檔
+        self.metrics_task: Optional[asyncio.Task] = None
+        
         # 狀態機變數
         self.current_mode = config.Config.MODE_DAILY
         self.modes = [
@@ -64,6 +91,8 @@ class EchoMemo:
         # 錄音狀態
         self.is_recording = False
         self.recording_task: Optional[asyncio.Task] = None
+        # 目前的回合（停止錄音到回應播完），新的錄音會取代它
+        self.turn_task: Optional[asyncio.Task] = None
         
         # 提醒模式
         self.reminder_task: Optional[asyncio.Task] = None
@@ -72,6 +101,10 @@ class EchoMemo:
         # 日記模式
         self.diary_date_index = 0
         self.diary_dates = []
+        self.marquee_task: Optional[asyncio.Task] = None
+        
+        # 正在顯示的長回應（播放中可用編碼器捲動）
+        self.scroll_view: Optional[ScrollView] = None
         
         # 設定硬體事件回呼
         self._setup_hardware_callbacks()
@@ -87,15 +120,23 @@ class EchoMemo:
         # 錄音按鈕：開始/停止錄音
         self.hw.on_record_press = self._on_record_start
         self.hw.on_record_release = self._on_record_stop
+        
+        # 免持模式：說話結束時自動停止錄音
+        self.audio.on_endpoint = self._on_record_endpoint
     
     async def _on_mode_change(self, delta: int):
         """處理模式切換"""
         if self.current_mode == config.Config.MODE_DIARY:
             # 日記模式：切換日期
             await self._change_diary_date(delta)
+        elif self.scroll_view and self.audio.playback.busy:
+            # 回應播放中：捲動回應文字
+            self.scroll_view.scroll_lines(delta)
+            self.display.show_scroll(self.scroll_view)
         else:
-            # 其他模式：切換模式
-            self.mode_index = (self.mode_index + delta) % len(self.modes)
+            # 其他模式：切換模式（只有四個選項，快速旋轉的加速與合併只移動一格）
+            step = (delta > 0) - (delta < 0)
+            self.mode_index = (self.mode_index + step) % len(self.modes)
             new_mode = self.modes[self.mode_index]
             self.display.show_mode(new_mode, "按鈕確認")
     
@@ -107,33 +148,94 @@ class EchoMemo:
         await self._enter_mode(self.current_mode)
     
     async def _on_record_start(self):
-        """開始錄音"""
+        """開始錄音（免持模式下錄音中再按一次則停止）"""
         if not self.is_recording:
+            # 打斷正在進行的回合與播放中的語音 (barge-in)
+            if self.turn_task and not self.turn_task.done():
+                self.turn_task.cancel()
+            self.audio.stop_playback()
+            if self.recording_task and not self.recording_task.done():
+                # 上一段錄音檔尚在寫完（很短），完成後才能開始新的錄音
+                await asyncio.wait({self.recording_task})
             self.is_recording = True
-            self.last_recording_path = None
             self.display.show_text("錄音中...", 0, 0)
-            self.recording_task = asyncio.create_task(
-                self._record_audio_wrapper()
-            )
+            self.recording_task = asyncio.create_task(self._record_audio_wrapper())
+        elif config.Config.VAD_ENABLED:
+            self._finish_recording()
     
-    async def _record_audio_wrapper(self):
-        """錄音包裝函式，保存錄音檔案路徑"""
-        self.last_recording_path = await self.audio.record_audio()
+    async def _record_audio_wrapper(self) -> Optional[str]:
+        """錄音包裝函式，返回錄音檔案路徑"""
+        path = await self.audio.record_audio()
+        if config.Config.VAD_ENABLED and self.is_recording:
+            # 免持模式錄音達到上限而結束：與說話結束同樣處理
+            self._finish_recording()
+        return path
     
     async def _on_record_stop(self):
-        """停止錄音"""
+        """放開錄音按鈕（免持模式下由端點偵測停止，放開不停止）"""
+        if not config.Config.VAD_ENABLED:
+            self._finish_recording()
+    
+    def _on_record_endpoint(self):
+        """端點偵測判定說話結束"""
+        self._finish_recording()
+    
+    def _finish_recording(self):
+        """停止錄音，處理交給回合 Task（放開按鈕的處理立即返回，不等待回合）
+        
+        所有結束錄音的途徑都經由這裡：放開按鈕、免持模式的說話結束、錄音上限與再按一次。
+        """
         if self.is_recording:
             self.is_recording = False
             self.audio.stop_recording()
-            if self.recording_task:
-                await self.recording_task
-                self.recording_task = None
+            self.turn_task = asyncio.create_task(
+                self._run_turn(self.recording_task, self.current_mode)
+            )
+    
+    async def _run_turn(self, recording_task: asyncio.Task, mode: str):
+        """一個回合：等待錄音檔完成並依模式處理（各階段耗時寫入指標檔）
+        
+        Args:
+            recording_task: 錄音 Task（結果為錄音檔路徑）
+            mode: 停止錄音時的模式
+        """
+        path = None
+        try:
+            with metrics.turn(mode):
+                with metrics.span('record.stop'):
+                    # shield：回合被取代時錄音 Task 仍會寫完並關閉檔案
+                    path = await asyncio.shield(recording_task)
+                
+                # 根據模式處理錄音
+                hold = await self._process_recording(path, mode)
             
-            # 根據模式處理錄音
-            await self._process_recording()
+            # 結果畫面的停留時間在回合結束後才開始，不計入回合耗時
+            await asyncio.sleep(hold)
+        except Exception as e:
+            print(f"處理錄音錯誤: {e}")
+        finally:
+            if path:
+                self._discard_recording(path)
+            elif not recording_task.done():
+                # 回合在錄音檔完成前被取代：完成後再刪除
+                recording_task.add_done_callback(
+                    lambda task: task.cancelled() or self._discard_recording(task.result())
+                )
+    
+    @staticmethod
+    def _discard_recording(path: Optional[str]):
+        """刪除錄音檔案"""
+        if path:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
     
     async def _enter_mode(self, mode: str):
         """進入模式"""
+        self.warmup.mark_activity()
+        self._stop_marquee()
+        self.scroll_view = None
         if mode == config.Config.MODE_DAILY:
             await self._mode_daily_entry()
         elif mode == config.Config.MODE_CHAT:
@@ -164,30 +266,39 @@ class EchoMemo:
         else:
             self.display.show_text("生成問題失敗", 0, 0)
     
-    async def _mode_daily_loop(self):
-        """每日訪談模式：循環"""
-        # 等待錄音（已在硬體回呼中處理）
-        pass
-    
-    async def _process_recording(self):
-        """處理錄音結果"""
-        if not self.last_recording_path:
+    async def _process_recording(self, path: Optional[str], mode: str) -> float:
+        """處理錄音結果
+        
+        Args:
+            path: 錄音檔案路徑（錄音失敗為 None）
+            mode: 停止錄音時的模式
+        
+        Returns:
+            結果畫面的停留秒數
+        """
+        if not path:
             self.display.show_text("錄音失敗", 0, 0)
-            await asyncio.sleep(1)
-            return
+            return 1.0
         
+        self.warmup.mark_activity()
         self.display.show_text("處理中...", 0, 0)
+        start = time.perf_counter()
         
         # 根據模式處理錄音
-        if self.current_mode == config.Config.MODE_DAILY:
-            await self._process_daily_recording()
-        elif self.current_mode == config.Config.MODE_CHAT:
-            await self._process_chat_recording()
+        if mode == config.Config.MODE_DAILY:
+            hold = await self._process_daily_recording(path)
+        elif mode == config.Config.MODE_CHAT:
+            hold = await self._process_chat_recording(path)
+        else:
+            return 0.0
+        
+        self.warmup.record_first_turn(time.perf_counter() - start)
+        return hold
     
-    async def _process_daily_recording(self):
-        """處理每日訪談錄音"""
+    async def _process_daily_recording(self, path: str) -> float:
+        """處理每日訪談錄音（返回結果畫面的停留秒數）"""
         # 語音轉文字
-        text = await self.ai.speech_to_text(self.last_recording_path)
+        text = await self.ai.speech_to_text(path)
         
         if text:
             # 儲存到資料庫
@@ -195,6 +306,7 @@ class EchoMemo:
                 content=text,
                 mode=config.Config.MODE_DAILY
             )
+            self.embedding_job.notify()
             self.display.show_multiline(["已記錄", f"ID: {memory_id}"])
             
             # 播放確認音效
@@ -202,72 +314,112 @@ class EchoMemo:
         else:
             self.display.show_text("無法識別", 0, 0)
         
-        await asyncio.sleep(2)
-        
-        # 清理錄音檔案
-        if self.last_recording_path:
-            import os
-            try:
-                os.unlink(self.last_recording_path)
-            except:
-                pass
-        self.last_recording_path = None
+        return 2.0
+
     
-    async def _process_chat_recording(self):
-        """處理聊天錄音"""
-        # 語音轉文字
-        text = await self.ai.speech_to_text(self.last_recording_path)
+    async def _process_chat_recording(self, path: str) -> float:
+        """處理聊天錄音（返回結果畫面的停留秒數）
         
-        if text:
-            # 儲存使用者輸入
-            self.db.add_memory(
-                content=f"使用者: {text}",
-                mode=config.Config.MODE_CHAT
-            )
-            
-            # 使用 RAG 生成回應
-            self.display.show_text("思考中...", 0, 0)
-            response = await self.ai.chat_with_rag(text)
-            
-            if response:
-                # 儲存 AI 回應
-                self.db.add_memory(
-                    content=f"AI: {response}",
-                    mode=config.Config.MODE_CHAT
+        以相依圖執行聊天回合，彼此獨立的步驟同時進行：
+        - STT 期間預先取得最近記憶（RAG 找不到相關記憶時的備援上下文）
+        - 使用者輸入的寫入與檢索、生成同時進行
+        - LLM 思考期間預熱語音克隆連線（不是播放的前置步驟，預熱慢或失敗都不延後播放）
+        - 任何步驟失敗而沒有播放回應時，顯示「生成失敗」並播放錯誤音效
+        - AI 回應的寫入與語音合成同時進行
+        """
+        graph = TaskGraph('chat')
+        
+        async def stt(results):
+            return await self.ai.speech_to_text(path)
+        
+        async def recent(results):
+            return await asyncio.to_thread(self.db.get_recent_memories, 7, 5)
+        
+        async def store_user(results):
+            if results['stt']:
+                await asyncio.to_thread(
+                    self.db.add_memory,
+                    f"使用者: {results['stt']}",
+                    config.Config.MODE_CHAT
                 )
-                
-                # 使用分身音播放回應
-                self.display.show_multiline(["回應", response[:20] + "..."])
-                await self.audio.text_to_speech(
-                    response,
-                    voice_type='persona',
-                    play=True
+                self.embedding_job.notify()
+        
+        async def context(results):
+            if results['stt']:
+                self.display.show_text("思考中...", 0, 0)
+                return await self.ai.retrieve_context(
+                    results['stt'],
+                    fallback=results['recent']
                 )
-            else:
+        
+        async def generate(results):
+            if results['stt']:
+                return await self.ai.generate_response(
+                    results['stt'],
+                    mode='persona',
+                    context=results['context']
+                )
+        
+        async def warm_tts(results):
+            if results['stt']:
+                await self.audio.warm_up_connection()
+        
+        async def store_ai(results):
+            if results['generate']:
+                await asyncio.to_thread(
+                    self.db.add_memory,
+                    f"AI: {results['generate']}",
+                    config.Config.MODE_CHAT
+                )
+                self.embedding_job.notify()
+        
+        async def speak(results):
+            response = results['generate']
+            if not results['stt']:
+                self.display.show_text("無法識別", 0, 0)
+            elif not response:
                 self.display.show_text("生成失敗", 0, 0)
-        else:
-            self.display.show_text("無法識別", 0, 0)
+            else:
+                # 使用分身音分段合成並播放回應，回應文字隨播放進度捲動
+                view = ScrollView(response, header=["回應"])
+                self.scroll_view = view
+                self.display.show_scroll(view)
+                
+                def follow(fraction):
+                    # 使用者以編碼器捲動後不再自動跟隨
+                    if not view.manual:
+                        view.seek(fraction)
+                        self.display.show_scroll(view)
+                
+                await self.audio.speak(response, voice_type='persona', on_progress=follow)
         
-        await asyncio.sleep(1)
+        graph.add('stt', stt)
+        graph.add('recent', recent)
+        graph.add('store_user', store_user, deps=['stt'])
+        graph.add('context', context, deps=['stt', 'recent'])
+        graph.add('generate', generate, deps=['context'])
+        graph.add('warm_tts', warm_tts, deps=['stt'])
+        graph.add('store_ai', store_ai, deps=['generate'])
+        graph.add('speak', speak, deps=['generate'])
+        await graph.run()
         
-        # 清理錄音檔案
-        if self.last_recording_path:
-            import os
-            try:
-                os.unlink(self.last_recording_path)
-            except:
-                pass
-        self.last_recording_path = None
+        for name, error in graph.errors.items():
+            print(f"聊天步驟 {name} 失敗: {error}")
+        if 'speak' in graph.errors:
+            # 前面的步驟失敗（speak 因相依失敗未執行）或播放本身失敗
+            self.display.show_text("生成失敗", 0, 0)
+            await self.audio.play_system_sound("Error.wav")
+        report = graph.report()
+        print(f"聊天回合: {report['wall']:.2f}s（循序 {report['sequential']:.2f}s，"
+              f"省下 {report['saved']:.2f}s），關鍵路徑: {' -> '.join(report['critical_path'])}")
+        
+        return 1.0
+
     
     async def _mode_chat_entry(self):
         """聊天模式：進入"""
         self.display.show_multiline(["聊天模式", "等待錄音..."])
     
-    async def _mode_chat_loop(self):
-        """聊天模式：循環"""
-        # 等待錄音（已在硬體回呼中處理）
-        pass
-    
     async def _mode_diary_entry(self):
         """日記模式：進入"""
         # 載入可用日期
@@ -275,11 +427,6 @@ class EchoMemo:
         self.diary_date_index = 0
         await self._update_diary_display()
     
-    async def _mode_diary_loop(self):
-        """日記模式：循環"""
-        # 等待編碼器旋轉或按鈕按下（已在硬體回呼中處理）
-        pass
-    
     async def _change_diary_date(self, delta: int):
         """切換日記日期"""
         if self.diary_dates:
@@ -289,26 +436,29 @@ class EchoMemo:
             await self._update_diary_display()
     
     async def _update_diary_display(self):
-        """更新日記顯示"""
+        """更新日記顯示（當天記錄以跑馬燈顯示，跑完設定的圈數後停在開頭）"""
+        self._stop_marquee()
         if self.diary_dates:
             date = self.diary_dates[self.diary_date_index]
             memories = self.db.get_memory_by_date(date)
             count = len(memories)
-            self.display.show_multiline([
-                "日記回顧",
-                date,
-                f"{count} 條記錄"
-            ])
+            view = ScrollView(
+                "  /  ".join(mem['content'] for mem in memories),
+                header=["日記回顧", date, f"{count} 條記錄"],
+                marquee=True
+            )
+            self.marquee_task = asyncio.create_task(run_marquee(self.display, view))
+    
+    def _stop_marquee(self):
+        """停止日記跑馬燈"""
+        if self.marquee_task:
+            self.marquee_task.cancel()
+            self.marquee_task = None
     
     async def _mode_reminder_entry(self):
         """提醒模式：進入"""
         self.display.show_multiline(["提醒模式", "按鈕啟動"])
     
-    async def _mode_reminder_loop(self):
-        """提醒模式：循環"""
-        # 等待按鈕（已在硬體回呼中處理）
-        pass
-    
     def _load_diary_dates(self):
         """載入日記可用日期"""
         # 取得最近 30 天的記憶
@@ -324,41 +474,50 @@ class EchoMemo:
         """主運行循環"""
         try:
             # 設定硬體事件循環（用於處理執行緒安全的事件）
-            self.hw.set_event_loop(asyncio.get_event_loop())
+            self.hw.set_event_loop(asyncio.get_running_loop())
             
-            # 初始化顯示
+            # 啟動背景嵌入向量回填（不佔用互動回合）
+            self.embedding_task = asyncio.create_task(self.embedding_job.run())
+            self.metrics_task = asyncio.create_task(metrics.run_snapshots())
+            
+            # 初始化顯示，同時預熱 API 連線並載入系統音效
+            self.display.start()
+            warmup_task = asyncio.create_task(self.warmup.run())
             self.display.show_text("EchoMemo", 0, 0)
-            await asyncio.sleep(1)
+            await asyncio.gather(self.audio.start(), asyncio.sleep(1))
+            
+            # 啟動畫面後最多再等 WARMUP_MAX_WAIT 秒，逾時則讓預熱在背景完成
+            await asyncio.wait({warmup_task}, timeout=config.Config.WARMUP_MAX_WAIT)
+            self.keepalive_task = asyncio.create_task(self.warmup.keepalive())
+            
+            # 背景預先合成固定語句（寫入 TTS 快取）
+            if config.Config.TTS_PRERENDER_PHRASES:
+                self.prerender_task = asyncio.create_task(
+                    self.audio.prerender(config.Config.TTS_PRERENDER_PHRASES)
+                )
             
             # 進入初始模式
             await self._enter_mode(self.current_mode)
             
-            # 主循環
-            while True:
-                # 處理硬體事件佇列（執行緒安全）
-                await self.hw.process_events()
-                
-                await asyncio.sleep(0.05)  # 減少延遲以提高響應性
-                
-                # 根據當前模式執行循環邏輯
-                if self.current_mode == config.Config.MODE_DAILY:
-                    await self._mode_daily_loop()
-                elif self.current_mode == config.Config.MODE_CHAT:
-                    await self._mode_chat_loop()
-                elif self.current_mode == config.Config.MODE_DIARY:
-                    await self._mode_diary_loop()
-                elif self.current_mode == config.Config.MODE_REMINDER:
-                    await self._mode_reminder_loop()
+            # 主循環：等待硬體事件（各模式的行為都由事件回呼驅動）
+            await self.hw.run()
         
         except KeyboardInterrupt:
             print("\n系統關閉中...")
         finally:
-            self.cleanup()
+            await self.cleanup()
     
-    def cleanup(self):
+    async def cleanup(self):
         """清理資源"""
-        self.display.clear()
+        self._stop_marquee()
+        for task in (self.turn_task, self.recording_task, self.embedding_task,
+                     self.keepalive_task, self.prerender_task, self.metrics_task):
+            if task:
+                task.cancel()
+        await self.audio.close()
+        await self.display.close()
         self.hw.cleanup()
+        await asyncio.to_thread(metrics.flush)
 
 async def main():
     """主函式"""
@@ -1,6 +1,6 @@
 """
 檔案標準 (Standard):
-本檔案封裝 Google Gemini 1.5 Flash 的所有 AI 功能，包括：
+本檔案封裝所有 AI 功能（實際呼叫透過 modules.ai_backend 的後端介面，預設為 Gemini），包括：
 1. STT (語音轉文字): 使用 Gemini 的多模態能力進行語音識別
 2. LLM (對話生成): 使用 Gemini 進行對話生成，支援不同人格模式
 3. RAG (檢索增強生成): 結合資料庫搜尋與 Gemini 生成
@@ -13,25 +13,34 @@
 - 獨立測試：python -m modules.ai (會測試 STT 和 LLM 功能)
 
 相依性 (Dependencies):
-- google-generativeai: Google Gemini API
+- modules.ai_backend: AI 後端介面（Gemini / 錄製重播 / 合成）
+- modules.resilience: 呼叫期限、重試、對沖與斷路器
+- modules.metrics: 每回合上傳位元組數、STT / 生成 / 檢索的階段耗時
 - asyncio: 非同步處理
 - config: 系統配置（API 金鑰）
 - database: 資料庫模組（RAG 功能）
 """
 
-import google.generativeai as genai
 import asyncio
+import os
 from typing import Optional, List, Dict
 import config
+from modules.ai_backend import AIBackend, create_backend
 from modules.database import Database
+from modules.resilience import resilience
+from modules.metrics import metrics
 
 class AI:
-    """AI 處理類別（封裝 Gemini）"""
+    """AI 處理類別（封裝 AI 後端）"""
     
-    def __init__(self):
-        """初始化 Gemini API"""
-        genai.configure(api_key=config.Config.GEMINI_KEY)
-        self.model = genai.GenerativeModel("models/gemini-2.0-flash")
+    def __init__(self, backend: AIBackend = None):
+        """
+        初始化 AI 後端
+        
+        Args:
+            backend: AI 後端，預設依 config.LLM_BACKEND 建立
+        """
+        self.backend = backend or create_backend()
         self.db = Database()
         
         # 不同模式的 System Prompt
@@ -64,30 +73,18 @@ class AI:
             轉錄的文字，失敗返回 None
         """
         try:
-            # 上傳音訊檔案到 Gemini
-            audio_file = genai.upload_file(audio_path)
-            
-            # 等待檔案處理完成
-            while audio_file.state.name == "PROCESSING":
-                await asyncio.sleep(1)
-                audio_file = genai.get_file(audio_file.name)
+            # 記錄每回合上傳大小（依編碼分開統計，用於比較編碼；opus 存成 .ogg，故以設定的編碼命名）
+            metrics.note(f'stt.upload_bytes.{config.Config.AUDIO_FORMAT}', os.path.getsize(audio_path))
             
-            if audio_file.state.name == "FAILED":
-                print("音訊檔案處理失敗")
-                return None
-            
-            # 使用 Gemini 進行語音識別
+            # 使用 AI 後端進行語音識別
             prompt = "請逐字聽寫這段錄音的內容。如果錄音中有說話，請完整轉錄所有文字。如果沒有說話或只有噪音，請回覆「無語音內容」。"
             
-            response = self.model.generate_content([
-                prompt,
-                audio_file
-            ])
-            
-            text = response.text.strip()
-            
-            # 清理上傳的檔案
-            genai.delete_file(audio_file.name)
+            with metrics.span('stt'):
+                text = await resilience.call(
+                    'gemini_stt',
+                    lambda: self.backend.transcribe(audio_path, prompt)
+                )
+            text = text.strip()
             
             # 處理特殊回應
             if "無語音內容" in text or len(text) < 2:
@@ -118,9 +115,6 @@ class AI:
             # 取得 System Prompt
             system_prompt = self.system_prompts.get(mode, self.system_prompts['persona'])
             
-            # 建立對話歷史
-            chat = self.model.start_chat(history=[])
-            
             # 如果有上下文，加入提示
             if context and mode == 'persona':
                 context_text = "\n".join([
@@ -141,9 +135,13 @@ class AI:
 
 請回應："""
             
-            # 生成回應
-            response = chat.send_message(full_prompt)
-            return response.text.strip()
+            # 生成回應（新的對話 Session）
+            with metrics.span('generate'):
+                response = await resilience.call(
+                    'gemini_generate',
+                    lambda: self.backend.chat(full_prompt, history=[])
+                )
+            return response.strip()
             
         except Exception as e:
             print(f"生成回應錯誤: {e}")
@@ -174,8 +172,12 @@ class AI:
             else:
                 prompt = "請提出一個友善的、開放性的問題，幫助使用者開始今天的記錄："
             
-            response = self.model.generate_content(prompt)
-            question = response.text.strip()
+            with metrics.span('generate_question'):
+                response = await resilience.call(
+                    'gemini_generate',
+                    lambda: self.backend.generate(prompt)
+                )
+            question = response.strip()
             
             # 清理問題（移除引號等）
             question = question.strip('"').strip("'").strip()
@@ -186,42 +188,91 @@ class AI:
             print(f"生成問題錯誤: {e}")
             return None
     
-    async def chat_with_rag(self, user_input: str) -> Optional[str]:
+    async def retrieve_context(self,
+                               user_input: str,
+                               fallback: List[Dict] = None) -> List[Dict]:
         """
-        使用 RAG (檢索增強生成) 進行對話
+        檢索與使用者輸入相關的記憶（RAG 的檢索步驟）
         
         Args:
             user_input: 使用者輸入
+            fallback: 找不到相關記憶時使用的記憶（例如預先取得的最近記憶），
+                      None 表示查詢最近 7 天的記憶
         
         Returns:
-            AI 回應
+            去重後的記憶列表
         """
-        # 從使用者輸入中提取關鍵字進行搜尋
-        keywords = self._extract_keywords(user_input)
+        with metrics.span('retrieve'):
+            # 從使用者輸入中提取關鍵字進行搜尋
+            keywords = self._extract_keywords(user_input)
+            
+            # 搜尋相關記憶（SQLite 查詢在背景執行緒執行）
+            context = []
+            for keyword in keywords[:3]:  # 最多使用 3 個關鍵字
+                results = await asyncio.to_thread(self.db.search_memories, keyword, 3)
+                context.extend(results)
+            
+            # 去重
+            seen_ids = set()
+            unique_context = []
+            for mem in context:
+                if mem['id'] not in seen_ids:
+                    seen_ids.add(mem['id'])
+                    unique_context.append(mem)
+            
+            # 如果沒有找到相關記憶，使用最近的記憶
+            if not unique_context:
+                if fallback is not None:
+                    unique_context = fallback
+                else:
+                    unique_context = await asyncio.to_thread(
+                        self.db.get_recent_memories, 7, 5
+                    )
         
-        # 搜尋相關記憶
-        context = []
-        for keyword in keywords[:3]:  # 最多使用 3 個關鍵字
-            results = self.db.search_memories(keyword, limit=3)
-            context.extend(results)
+        return unique_context
+    
+    async def chat_with_rag(self, user_input: str) -> Optional[str]:
+        """
+        使用 RAG (檢索增強生成) 進行對話
         
-        # 去重
-        seen_ids = set()
-        unique_context = []
-        for mem in context:
-            if mem['id'] not in seen_ids:
-                seen_ids.add(mem['id'])
-                unique_context.append(mem)
+        Args:
+            user_input: 使用者輸入
         
-        # 如果沒有找到相關記憶，使用最近的記憶
-        if not unique_context:
-            unique_context = self.db.get_recent_memories(days=7, limit=5)
+        Returns:
+            AI 回應
+        """
+        context = await self.retrieve_context(user_input)
         
         # 生成回應
         return await self.generate_response(
             user_input,
             mode='persona',
-            context=unique_context
+            context=context
+        )
+    
+    async def warm_up(self):
+        """預熱 AI 後端連線（失敗只記錄，不影響啟動）"""
+        try:
+            await asyncio.wait_for(
+                self.backend.warm_up(),
+                timeout=resilience.deadline('gemini_generate')
+            )
+        except Exception as e:
+            print(f"AI 後端預熱失敗: {e}")
+    
+    async def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        批次產生嵌入向量（失敗時拋出例外，由呼叫端決定是否稍後重試）
+        
+        Args:
+            texts: 文字列表
+        
+        Returns:
+            嵌入向量列表（與輸入順序相同）
+        """
+        return await resilience.call(
+            'gemini_embed',
+            lambda: self.backend.embed(texts)
         )
     
     def _extract_keywords(self, text: str) -> List[str]:
@@ -0,0 +1,388 @@
+"""
+檔案標準 (Standard):
+本檔案定義 AI 後端介面 (AIBackend)，將生成、對話、STT、嵌入向量四種呼叫
+從 modules.ai 中抽離，讓聊天流程可以在沒有網路與 API 金鑰的情況下執行與量測。
+提供三種實作：
+1. GeminiBackend: 真正呼叫 Google Gemini API
+2. RecordReplayBackend: 錄製真實回應（含原始延遲）到磁碟，並可離線重播
+3. SyntheticBackend: 依可設定的延遲分佈產生合成回應（可重現的亂數種子）
+輸入：提示文字、對話歷史、音訊檔案路徑、待嵌入文字列表
+輸出：回應文字、轉錄文字、嵌入向量
+
+執行方式 (Execution):
+- 被 modules.ai 透過 create_backend() 建立使用
+- 獨立測試：python -m modules.ai_backend (使用合成後端與重播後端，不需網路)
+
+相依性 (Dependencies):
+- google-generativeai: 僅 GeminiBackend 需要（延遲匯入）
+- asyncio: 非同步處理
+- json / hashlib: 錄製檔格式與請求鍵值
+- config: 系統配置（後端選擇、模型名稱、錄製檔路徑、延遲分佈）
+- modules.metrics: STT 上傳耗時
+"""
+
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+import random
+import time
+from typing import Dict, List, Optional, Protocol, Tuple
+import config
+from modules.metrics import metrics
+
+
+class AIBackend(Protocol):
+    """AI 後端介面
+
+    所有方法皆為非同步，失敗時拋出例外，由 modules.ai 負責捕捉與回報。
+    """
+
+    name: str
+
+    async def generate(self, prompt: str) -> str:
+        """單次生成（無對話狀態）"""
+        ...
+
+    async def chat(self, message: str, history: Optional[List[Dict]] = None) -> str:
+        """在對話 Session 中送出訊息"""
+        ...
+
+    async def transcribe(self, audio_path: str, prompt: str) -> str:
+        """語音轉文字"""
+        ...
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """批次產生嵌入向量"""
+        ...
+
+    async def warm_up(self):
+        """預先建立連線與初始化 SDK（低成本呼叫）"""
+        ...
+
+
+class GeminiBackend:
+    """Google Gemini 後端
+
+    google-generativeai 的呼叫皆為同步阻塞，這裡透過 asyncio.to_thread 執行，
+    避免阻塞事件循環。
+    """
+
+    name = 'gemini'
+
+    def __init__(self,
+                 api_key: str = None,
+                 model_name: str = None,
+                 embed_model: str = None):
+        """
+        初始化 Gemini API
+
+        Args:
+            api_key: API 金鑰，預設使用 config.GEMINI_KEY
+            model_name: 生成模型名稱，預設使用 config.GEMINI_MODEL
+            embed_model: 嵌入模型名稱，預設使用 config.GEMINI_EMBED_MODEL
+        """
+        # 延遲匯入：重播與合成後端不需要安裝 SDK
+        import google.generativeai as genai
+        self._genai = genai
+        genai.configure(api_key=api_key or config.Config.GEMINI_KEY)
+        self.model_name = model_name or config.Config.GEMINI_MODEL
+        self.embed_model = embed_model or config.Config.GEMINI_EMBED_MODEL
+        self.model = genai.GenerativeModel(self.model_name)
+
+    async def generate(self, prompt: str) -> str:
+        response = await asyncio.to_thread(self.model.generate_content, prompt)
+        return response.text
+
+    async def chat(self, message: str, history: Optional[List[Dict]] = None) -> str:
+        session = self.model.start_chat(history=history or [])
+        response = await asyncio.to_thread(session.send_message, message)
+        return response.text
+
+    async def transcribe(self, audio_path: str, prompt: str) -> str:
+        genai = self._genai
+
+        # 上傳音訊檔案到 Gemini（依副檔名指定 MIME，記錄上傳耗時）
+        extension = os.path.splitext(audio_path)[1].lstrip('.').lower()
+        mime_type = mimetypes.guess_type(audio_path)[0] or f'audio/{extension}'
+        start = time.perf_counter()
+        upload = asyncio.ensure_future(asyncio.to_thread(
+            genai.upload_file, audio_path, mime_type=mime_type
+        ))
+        try:
+            # shield：期限取消時上傳仍會在背景執行緒完成，finally 才拿得到要刪除的檔案
+            audio_file = await asyncio.shield(upload)
+            metrics.note(f'stt.upload_time.{config.Config.AUDIO_FORMAT}', time.perf_counter() - start)
+
+            # 等待檔案處理完成
+            while audio_file.state.name == "PROCESSING":
+                await asyncio.sleep(1)
+                audio_file = await asyncio.to_thread(genai.get_file, audio_file.name)
+
+            if audio_file.state.name == "FAILED":
+                raise RuntimeError("音訊檔案處理失敗")
+
+            response = await asyncio.to_thread(
+                self.model.generate_content, [prompt, audio_file]
+            )
+            return response.text
+        finally:
+            # 清理上傳的檔案（上傳完成後在背景執行緒刪除，取消或逾時也不會遺留）
+            upload.add_done_callback(self._delete_upload)
+
+    def _delete_upload(self, upload: asyncio.Future):
+        """上傳完成後在背景執行緒刪除上傳的檔案（上傳失敗則不需刪除）"""
+        if upload.cancelled() or upload.exception() is not None:
+            return
+        name = upload.result().name
+
+        def delete():
+            try:
+                self._genai.delete_file(name)
+            except Exception as e:
+                print(f"刪除上傳音訊失敗: {e}")
+
+        asyncio.get_running_loop().run_in_executor(None, delete)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        result = await asyncio.to_thread(
+            self._genai.embed_content,
+            model=self.embed_model,
+            content=texts
+        )
+        return result['embedding']
+
+    async def warm_up(self):
+        # 查詢模型中繼資料：觸發 SDK 初始化與連線建立，不消耗生成額度
+        await asyncio.to_thread(self._genai.get_model, self.model_name)
+
+
+class RecordReplayBackend:
+    """錄製/重播後端
+
+    錄製模式 (record)：轉呼叫內部後端，將回應與實際延遲寫入錄製檔。
+    重播模式 (replay)：從錄製檔讀取回應，並以原始延遲（乘上 speed）等待後返回。
+
+    錄製檔為 JSON：{請求鍵值: [{"method", "response", "latency"}, ...]}。
+    同一請求出現多次時依序重播，超過錄製次數則重複最後一筆。
+    """
+
+    name = 'replay'
+
+    def __init__(self,
+                 path: str = None,
+                 mode: str = 'replay',
+                 inner: Optional[AIBackend] = None,
+                 speed: float = None):
+        """
+        初始化錄製/重播後端
+
+        Args:
+            path: 錄製檔路徑，預設使用 config.LLM_CASSETTE_PATH
+            mode: 'record' 或 'replay'
+            inner: 錄製模式下實際呼叫的後端
+            speed: 重播延遲倍率（0 表示不等待），預設使用 config.LLM_REPLAY_SPEED
+        """
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"未知的錄製模式: {mode}")
+        if mode == 'record' and inner is None:
+            raise ValueError("錄製模式需要指定內部後端")
+
+        self.path = path or config.Config.LLM_CASSETTE_PATH
+        self.mode = mode
+        self.name = mode
+        self.inner = inner
+        self.speed = config.Config.LLM_REPLAY_SPEED if speed is None else speed
+        self._entries: Dict[str, List[Dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._load()
+
+    def _load(self):
+        """載入錄製檔"""
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        elif self.mode == 'replay':
+            raise FileNotFoundError(f"找不到錄製檔: {self.path}")
+
+    def _save(self):
+        """寫入錄製檔（先寫暫存檔再取代，避免中斷時損毀）"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _key(method: str, payload) -> str:
+        """計算請求鍵值"""
+        raw = json.dumps([method, payload], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    async def _call(self, method: str, payload, *args):
+        key = self._key(method, payload)
+
+        if self.mode == 'record':
+            start = time.perf_counter()
+            response = await getattr(self.inner, method)(*args)
+            latency = time.perf_counter() - start
+            self._entries.setdefault(key, []).append({
+                'method': method,
+                'response': response,
+                'latency': latency
+            })
+            self._save()
+            return response
+
+        entries = self._entries.get(key)
+        if not entries:
+            raise LookupError(f"錄製檔中找不到對應的回應: {method}")
+        index = self._cursor.get(key, 0)
+        self._cursor[key] = index + 1
+        entry = entries[min(index, len(entries) - 1)]
+        if self.speed > 0:
+            await asyncio.sleep(entry['latency'] * self.speed)
+        return entry['response']
+
+    async def generate(self, prompt: str) -> str:
+        return await self._call('generate', prompt, prompt)
+
+    async def chat(self, message: str, history: Optional[List[Dict]] = None) -> str:
+        return await self._call('chat', [message, history or []], message, history)
+
+    async def transcribe(self, audio_path: str, prompt: str) -> str:
+        # 以音訊內容雜湊作為鍵值，暫存檔路徑每次都不同
+        with open(audio_path, 'rb') as f:
+            audio_hash = hashlib.sha256(f.read()).hexdigest()
+        return await self._call('transcribe', [audio_hash, prompt], audio_path, prompt)
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return await self._call('embed', list(texts), texts)
+
+    async def warm_up(self):
+        if self.mode == 'record':
+            await self.inner.warm_up()
+
+
+class SyntheticBackend:
+    """合成後端
+
+    不連網，依設定的延遲分佈等待後返回固定格式的回應，
+    用於量測流程本身的開銷與並行效果。延遲分佈格式：
+    - ('fixed', 秒數)
+    - ('uniform', 最小值, 最大值)
+    - ('normal', 平均值, 標準差)
+    - ('lognormal', 中位數, sigma)
+    """
+
+    name = 'synthetic'
+
+    def __init__(self,
+                 latency: Dict[str, Tuple] = None,
+                 seed: int = None,
+                 embed_dim: int = 8):
+        """
+        初始化合成後端
+
+        Args:
+            latency: 各方法的延遲分佈，預設使用 config.LLM_SYNTHETIC_LATENCY
+            seed: 亂數種子，預設使用 config.LLM_SYNTHETIC_SEED
+            embed_dim: 合成嵌入向量維度
+        """
+        self.latency = dict(config.Config.LLM_SYNTHETIC_LATENCY)
+        if latency:
+            self.latency.update(latency)
+        self.rng = random.Random(config.Config.LLM_SYNTHETIC_SEED if seed is None else seed)
+        self.embed_dim = embed_dim
+
+    def _sample(self, method: str) -> float:
+        """依分佈取樣延遲（秒）"""
+        spec = self.latency.get(method, ('fixed', 0.0))
+        kind = spec[0]
+        if kind == 'fixed':
+            value = spec[1]
+        elif kind == 'uniform':
+            value = self.rng.uniform(spec[1], spec[2])
+        elif kind == 'normal':
+            value = self.rng.gauss(spec[1], spec[2])
+        elif kind == 'lognormal':
+            value = spec[1] * self.rng.lognormvariate(0.0, spec[2])
+        else:
+            raise ValueError(f"未知的延遲分佈: {kind}")
+        return max(0.0, value)
+
+    async def _wait(self, method: str):
+        await asyncio.sleep(self._sample(method))
+
+    async def generate(self, prompt: str) -> str:
+        await self._wait('generate')
+        return f"（合成回應）{prompt[-20:]}"
+
+    async def chat(self, message: str, history: Optional[List[Dict]] = None) -> str:
+        await self._wait('chat')
+        return f"（合成回應）{message[-20:]}"
+
+    async def transcribe(self, audio_path: str, prompt: str) -> str:
+        await self._wait('transcribe')
+        return f"（合成轉錄）{os.path.basename(audio_path)}"
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        await self._wait('embed')
+        vectors = []
+        for text in texts:
+            digest = hashlib.sha256(text.encode('utf-8')).digest()
+            vectors.append([b / 255.0 for b in digest[:self.embed_dim]])
+        return vectors
+
+    async def warm_up(self):
+        pass
+
+
+def create_backend(name: str = None) -> AIBackend:
+    """
+    依名稱建立 AI 後端
+
+    Args:
+        name: 'gemini'、'record'、'replay' 或 'synthetic'，預設使用 config.LLM_BACKEND
+
+    Returns:
+        AI 後端實例
+    """
+    name = name or config.Config.LLM_BACKEND
+    if name == 'gemini':
+        return GeminiBackend()
+    if name == 'record':
+        return RecordReplayBackend(mode='record', inner=GeminiBackend())
+    if name == 'replay':
+        return RecordReplayBackend(mode='replay')
+    if name == 'synthetic':
+        return SyntheticBackend()
+    raise ValueError(f"未知的 AI 後端: {name}")
+
+
+if __name__ == '__main__':
+    # 測試合成與重播後端（不需網路）
+    import tempfile
+    print("AI 後端測試")
+
+    async def test():
+        synthetic = SyntheticBackend(seed=1)
+
+        print("測試 1: 合成後端")
+        start = time.perf_counter()
+        reply = await synthetic.chat("你好")
+        print(f"  回應: {reply} ({time.perf_counter() - start:.3f}s)")
+
+        print("測試 2: 錄製合成後端的回應")
+        cassette = os.path.join(tempfile.mkdtemp(), 'cassette.json')
+        recorder = RecordReplayBackend(cassette, mode='record', inner=synthetic)
+        recorded = await recorder.generate("提出一個問題")
+
+        print("測試 3: 重播")
+        replayer = RecordReplayBackend(cassette, mode='replay')
+        start = time.perf_counter()
+        replayed = await replayer.generate("提出一個問題")
+        print(f"  重播結果一致: {recorded == replayed} ({time.perf_counter() - start:.3f}s)")
+
+    asyncio.run(test())
@@ -10,23 +10,111 @@
 - 獨立測試：python -m modules.audio (會測試錄音和播放功能)
 
 相依性 (Dependencies):
-- sounddevice: 音訊錄製與播放
 - soundfile: 音訊檔案處理
-- requests: HTTP API 呼叫
 - asyncio: 非同步處理
 - os: 檔案系統操作
-- config: 系統配置（API 設定）
+- config: 系統配置（API 設定、語音合成後端）
+- modules.audio_backend: 輸入串流（sounddevice 或 null 後端）與合成語音
+- modules.recorder: 環形緩衝錄音器
+- modules.vad: 錄音回呼中的語音端點偵測（免持模式）
+- modules.playback: 持續開啟輸出串流的播放引擎
+- modules.sound_cache: 系統音效解碼快取
+- modules.tts_cache: 語音合成結果快取
+- modules.http_client: 共用非同步 HTTP 連線池（語音克隆 API）
+- modules.stream_decoder: 增量式 WAV 解碼（邊下載邊播放）
+- modules.metrics: 第一個音訊樣本的等待時間
+- modules.resilience: 呼叫期限、重試、對沖與斷路器
 """
 
 import asyncio
-import sounddevice as sd
+import re
+import time
 import soundfile as sf
 import numpy as np
-import requests
+import httpx
 import os
 import tempfile
-from typing import Optional, Callable
+from typing import Optional, Callable, List, Tuple
 import config
+from modules.audio_backend import create_input_stream, synthetic_speech
+from modules.recorder import RingBufferRecorder, CODECS
+from modules.vad import EnergyVAD
+from modules.playback import PlaybackEngine
+from modules.sound_cache import SoundCache
+from modules.tts_cache import TTSCache
+from modules.http_client import HttpClient
+from modules.stream_decoder import WavStreamDecoder
+from modules.resilience import resilience, PermanentError
+from modules.metrics import metrics
+
+def _check_response(response: httpx.Response):
+    """
+    檢查 HTTP 狀態碼
+    
+    5xx 與 429 視為暫時性錯誤（可重試），其他非 200 狀態視為永久錯誤。
+    """
+    if response.status_code == 200:
+        return
+    message = f"HTTP {response.status_code}: {response.text[:200]}"
+    if response.status_code >= 500 or response.status_code == 429:
+        raise RuntimeError(message)
+    raise PermanentError(message)
+
+# 句尾標點（保留在句子結尾）與句中可斷開的標點
+_SENTENCE_END = re.compile(r'(?<=[。！？!?；;…\n])')
+_CLAUSE_END = re.compile(r'(?<=[，,、：:])')
+
+def split_sentences(text: str, max_chars: int = None, min_chars: int = None) -> List[str]:
+    """
+    將長文字切成適合逐段合成的句子
+    
+    先依句尾標點切開，超過 max_chars 的句子再依逗號切開（仍過長則硬切），
+    短於 min_chars 的片段併入下一段。
+    
+    Args:
+        text: 要切段的文字
+        max_chars: 每段最多字數，預設使用 config.TTS_CHUNK_MAX_CHARS
+        min_chars: 每段最少字數，預設使用 config.TTS_CHUNK_MIN_CHARS
+    
+    Returns:
+        依序排列的文字段落
+    """
+    max_chars = max_chars or config.Config.TTS_CHUNK_MAX_CHARS
+    min_chars = min_chars or config.Config.TTS_CHUNK_MIN_CHARS
+    
+    pieces = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        current = ''
+        for clause in _CLAUSE_END.split(sentence):
+            if current and len(current) + len(clause) > max_chars:
+                pieces.append(current)
+                current = ''
+            current += clause
+            while len(current) > max_chars:
+                pieces.append(current[:max_chars])
+                current = current[max_chars:]
+        if current:
+            pieces.append(current)
+    
+    chunks = []
+    pending = ''
+    for piece in pieces:
+        pending += piece
+        if len(pending) >= min_chars:
+            chunks.append(pending)
+            pending = ''
+    if pending:
+        if chunks:
+            chunks[-1] += pending
+        else:
+            chunks.append(pending)
+    return chunks
 
 class Audio:
     """音訊處理類別"""
@@ -36,18 +124,59 @@ class Audio:
         self.sample_rate = config.Config.AUDIO_SAMPLE_RATE
         self.channels = config.Config.AUDIO_CHANNELS
         self.is_recording = False
-        self.recording_data = []
-        self.recording_stream = None
+        self._stop_event: Optional[asyncio.Event] = None
+        
+        # 預先配置的環形緩衝錄音器（記憶體用量與錄音長度無關）
+        blocksize = config.Config.AUDIO_BLOCKSIZE
+        preroll_frames = self.sample_rate * config.Config.AUDIO_PREROLL_MS // 1000
+        self.recorder = RingBufferRecorder(
+            self.sample_rate,
+            self.channels,
+            blocksize=blocksize,
+            capacity_blocks=config.Config.AUDIO_RING_BLOCKS,
+            preroll_blocks=-(-preroll_frames // blocksize)
+        )
+        
+        # 持續開啟的輸入串流（start() 時開啟），按下錄音不需等待裝置開啟
+        self.input_stream = None
+        
+        # 語音端點偵測（免持模式）：判定說話結束時停止錄音並呼叫 on_endpoint
+        # on_endpoint 在事件循環中同步呼叫，後續處理由呼叫端自行以 Task 追蹤
+        self.vad = EnergyVAD(self.sample_rate, on_endpoint=self._endpoint_from_callback)
+        self.on_endpoint: Optional[Callable[[], None]] = None
+        self._endpointing = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # 播放引擎（單一輸出串流，可打斷）
+        self.playback = PlaybackEngine()
+        
+        # 系統音效解碼快取（start() 時載入）
+        self.sounds = SoundCache(self.playback.sample_rate)
+        self._sound_watch_task: Optional[asyncio.Task] = None
+        
+        # 語音合成結果快取（系統音與分身音共用）
+        self.tts_cache = TTSCache()
+        
+        # 打斷計數（stop_playback 時加一），分段播放以此判斷是否已被打斷
+        self.interrupts = 0
+        self._speech_tasks = set()
+        
+        # 語音克隆 API 共用非同步連線池（保持連線、HTTP/2、並行上限）
+        self.http = HttpClient()
         
         # 確保系統音效目錄存在
         os.makedirs(config.Config.ASSETS_SYSTEM_PATH, exist_ok=True)
     
-    async def record_audio(self, duration: float = None) -> Optional[str]:
+    async def record_audio(self,
+                           duration: float = None,
+                           endpointing: bool = None) -> Optional[str]:
         """
-        錄製音訊
+        錄製音訊（區塊經由環形緩衝區串流寫入檔案）
         
         Args:
             duration: 錄音時長（秒），None 表示手動控制
+            endpointing: 是否在說話結束時自動停止，預設使用 config.VAD_ENABLED
+                （此時 duration 預設為 config.VAD_MAX_RECORD_SECONDS）
         
         Returns:
             錄音檔案路徑，失敗返回 None
@@ -55,50 +184,56 @@ class Audio:
         if self.is_recording:
             return None
         
+        requested_at = time.perf_counter()
+        if endpointing is None:
+            endpointing = config.Config.VAD_ENABLED
+        if endpointing and not duration:
+            duration = config.Config.VAD_MAX_RECORD_SECONDS
+        
         self.is_recording = True
-        self.recording_data = []
+        self._stop_event = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self.vad.reset()
+        self._endpointing = endpointing
         temp_path = None
         
         try:
-            # 建立臨時檔案
+            # 建立臨時檔案（副檔名依錄音編碼）
+            codec = config.Config.AUDIO_FORMAT
             temp_file = tempfile.NamedTemporaryFile(
-                suffix='.wav',
+                suffix=CODECS[codec][2],
                 delete=False
             )
             temp_path = temp_file.name
             temp_file.close()
             
-            def callback(indata, frames, time, status):
-                """錄音回呼函式"""
-                if status:
-                    print(f"錄音狀態: {status}")
-                if self.is_recording:  # 只在錄音中時才收集資料
-                    self.recording_data.append(indata.copy())
+            # 輸入串流平時已開啟；尚未開啟（未呼叫 start()）時才在這裡開啟
+            if self.input_stream is None:
+                await asyncio.to_thread(self._open_input)
             
-            # 開始錄音
-            stream = sd.InputStream(
-                device=config.Config.AUDIO_INPUT_CARD,
-                channels=self.channels,
-                samplerate=self.sample_rate,
-                callback=callback,
-                dtype='float32'
-            )
+            # 開始錄音：標記預錄起點，寫入執行緒同步將區塊編碼寫入檔案
+            self.recorder.start(temp_path, codec)
+            metrics.observe('audio.record_start', time.perf_counter() - requested_at)
             
-            with stream:
+            try:
                 if duration:
-                    await asyncio.sleep(duration)
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=duration)
                 else:
-                    # 手動控制：等待 is_recording 變為 False
-                    while self.is_recording:
-                        await asyncio.sleep(0.1)
+                    # 手動控制：等待 stop_recording()
+                    await self._stop_event.wait()
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                # 寫完緩衝區剩餘區塊並關閉檔案
+                self._endpointing = False
+                frames = await asyncio.to_thread(self.recorder.stop)
+                if self.vad.ended:
+                    # 判定說話結束到錄音檔完成的時間，以及最後語音到錄音檔完成的時間
+                    now = time.perf_counter()
+                    metrics.observe('vad.stop_latency', now - self.vad.endpoint_at)
+                    metrics.observe('vad.speech_to_stop', now - self.vad.last_speech_at)
             
-            # 儲存錄音
-            if self.recording_data:
-                audio_data = np.concatenate(self.recording_data, axis=0)
-                # 確保是單聲道
-                if len(audio_data.shape) > 1:
-                    audio_data = audio_data[:, 0]
-                sf.write(temp_path, audio_data, self.sample_rate)
+            if frames:
                 return temp_path
             else:
                 # 沒有錄到資料，刪除臨時檔案
@@ -117,11 +252,48 @@ class Audio:
             return None
         finally:
             self.is_recording = False
-            self.recording_data = []
+            self._stop_event = None
+    
+    def _open_input(self):
+        """開啟持續運作的輸入串流（會阻塞，請在背景執行緒呼叫）"""
+        if self.input_stream is not None:
+            return
+        start = time.perf_counter()
+        stream = create_input_stream(
+            device=config.Config.AUDIO_INPUT_CARD,
+            channels=self.channels,
+            samplerate=self.sample_rate,
+            blocksize=self.recorder.blocksize,
+            callback=self._input_callback,
+            dtype='float32'
+        )
+        stream.start()
+        self.input_stream = stream
+        metrics.observe('audio.input_open', time.perf_counter() - start)
+    
+    def _input_callback(self, indata, frames, time_info, status):
+        """錄音回呼（音訊執行緒）：寫入環形緩衝區（未錄音時作為預錄），免持模式下同時做端點偵測"""
+        self.recorder.callback(indata, frames, time_info, status)
+        if self._endpointing:
+            self.vad.process(indata[:, 0])
+    
+    def _endpoint_from_callback(self):
+        """端點偵測器在音訊執行緒判定說話結束，立即轉交事件循環"""
+        self._loop.call_soon_threadsafe(self._on_endpoint)
+    
+    def _on_endpoint(self):
+        """說話結束：停止錄音並通知狀態機"""
+        metrics.observe('vad.signal_latency', time.perf_counter() - self.vad.endpoint_at)
+        if self._stop_event:
+            self._stop_event.set()
+        if self.on_endpoint:
+            self.on_endpoint()
     
     def stop_recording(self):
         """停止錄音"""
         self.is_recording = False
+        if self._stop_event:
+            self._stop_event.set()
     
     async def play_audio(self, file_path: str):
         """
@@ -135,28 +307,50 @@ class Audio:
                 print(f"音訊檔案不存在: {file_path}")
                 return
             
-            # 讀取音訊檔案
-            data, sr = sf.read(file_path)
+            # 讀取音訊檔案（背景執行緒解碼，不阻塞事件循環）
+            data, sr = await asyncio.to_thread(sf.read, file_path, dtype='float32')
             
-            # 播放
-            sd.play(data, sr)
-            sd.wait()  # 等待播放完成
+            # 播放（等待播完或被打斷）
+            await self.playback.play(data, sr)
             
         except Exception as e:
             print(f"播放錯誤: {e}")
     
+    def stop_playback(self):
+        """立即停止所有播放，並取消尚未完成的分段合成（錄音按鈕按下時打斷）"""
+        self.interrupts += 1
+        for task in list(self._speech_tasks):
+            task.cancel()
+        self.playback.cancel()
+    
+    async def start(self):
+        """
+        啟動音訊系統：開啟輸入與輸出串流、預先解碼系統音效並監看音效目錄
+        """
+        await self.playback.start()
+        try:
+            await asyncio.to_thread(self._open_input)
+        except Exception as e:
+            print(f"開啟錄音裝置失敗（錄音時重試）: {e}")
+        await asyncio.to_thread(self.sounds.refresh)
+        self._sound_watch_task = asyncio.create_task(self.sounds.watch())
+    
     async def play_system_sound(self, filename: str):
         """
-        播放系統音效
+        播放系統音效（從解碼快取直接送入播放引擎）
         
         Args:
             filename: 音效檔名（在 assets/system/ 目錄下）
         """
-        file_path = os.path.join(config.Config.ASSETS_SYSTEM_PATH, filename)
-        if os.path.exists(file_path):
-            await self.play_audio(file_path)
+        data = self.sounds.get(filename)
+        if data is None:
+            # 尚未載入（例如 start() 之前呼叫或剛新增的檔案）
+            await asyncio.to_thread(self.sounds.refresh)
+            data = self.sounds.get(filename)
+        if data is not None:
+            await self.playback.play(data, self.sounds.sample_rate)
         else:
-            print(f"系統音效不存在: {file_path}")
+            print(f"系統音效不存在: {os.path.join(config.Config.ASSETS_SYSTEM_PATH, filename)}")
     
     async def upload_audio(self, audio_path: str) -> Optional[str]:
         """
@@ -168,26 +362,33 @@ class Audio:
         Returns:
             音訊 URL，失敗返回 None
         """
-        try:
+        async def post(content: bytes):
+            response = await self.http.request(
+                'clone_upload', 'POST',
+                config.Config.VOICE_CLONE_UPLOAD_URL,
+                files={'file': (os.path.basename(audio_path), content)},
+                data={'api_key': config.Config.VOICE_CLONE_API_KEY},
+                timeout=resilience.deadline('clone_upload')
+            )
+            _check_response(response)
+            return response.json()
+        
+        def read():
             with open(audio_path, 'rb') as f:
-                files = {'file': f}
-                data = {'api_key': config.Config.VOICE_CLONE_API_KEY}
-                
-                response = requests.post(
-                    config.Config.VOICE_CLONE_UPLOAD_URL,
-                    files=files,
-                    data=data,
-                    timeout=30
+                return f.read()
+        
+        try:
+            content = await asyncio.to_thread(read)
+            # 上傳不是冪等操作，不重試
+            with metrics.span('tts.upload'):
+                result = await resilience.call(
+                    'clone_upload',
+                    lambda: post(content)
                 )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get('success'):
-                        return result.get('audio_url')
-                    else:
-                        print(f"上傳失敗: {result}")
-                else:
-                    print(f"上傳錯誤: HTTP {response.status_code}")
+            if result.get('success'):
+                return result.get('audio_url')
+            else:
+                print(f"上傳失敗: {result}")
                     
         except Exception as e:
             print(f"上傳音訊錯誤: {e}")
@@ -235,84 +436,466 @@ class Audio:
                 'volume_ratio': volume_ratio
             }
             
-            response = requests.post(
-                config.Config.VOICE_CLONE_SYNC_URL,
-                data=data,
-                timeout=60
-            )
+            async def post():
+                response = await self.http.request(
+                    'clone_sync', 'POST',
+                    config.Config.VOICE_CLONE_SYNC_URL,
+                    data=data,
+                    timeout=resilience.deadline('clone_sync')
+                )
+                _check_response(response)
+                return response.json()
             
-            if response.status_code == 200:
-                result = response.json()
-                if result.get('success') or 'audio_url' in result:
-                    return result.get('audio_url') or result.get('url')
-                else:
-                    print(f"語音克隆失敗: {result}")
+            with metrics.span('tts.clone_sync'):
+                result = await resilience.call('clone_sync', post)
+            if result.get('success') or 'audio_url' in result:
+                return result.get('audio_url') or result.get('url')
             else:
-                print(f"語音克隆錯誤: HTTP {response.status_code}")
-                print(f"回應: {response.text}")
+                print(f"語音克隆失敗: {result}")
                 
         except Exception as e:
             print(f"語音克隆錯誤: {e}")
         
         return None
     
+    async def warm_up_connection(self):
+        """
+        預熱語音克隆 API 連線
+        
+        對克隆端點送出 HEAD 請求，讓 DNS 解析與 TCP/TLS 交握提前完成，
+        之後的 clone_voice_sync 可重用連線池中的連線。回應狀態不重要。
+        """
+        if config.Config.TTS_BACKEND == 'synthetic':
+            return
+        try:
+            await self.http.request(
+                'clone_warmup', 'HEAD',
+                config.Config.VOICE_CLONE_SYNC_URL,
+                timeout=resilience.deadline('clone_sync')
+            )
+        except Exception as e:
+            print(f"預熱語音克隆連線失敗: {e}")
+    
+    def _voice_id(self, voice_type: str) -> Optional[str]:
+        """取得語音 ID（未設定或為 URL 時返回 None，合成語音不需要語音 ID）"""
+        voice_id = (config.Config.SYSTEM_VOICE_ID if voice_type == 'system' 
+                   else config.Config.PERSONA_VOICE_ID)
+        if voice_id and not voice_id.startswith('http'):
+            return voice_id
+        if config.Config.TTS_BACKEND == 'synthetic':
+            return f'synthetic-{voice_type}'
+        return None
+    
+    async def _fetch_speech(self,
+                            text: str,
+                            voice_id: str,
+                            voice_type: str,
+                            speed_ratio: float = 1.0,
+                            pitch_ratio: float = 1.0,
+                            volume_ratio: float = 1.0,
+                            cache_key: str = None,
+                            play: bool = True) -> Tuple[Optional[str], Optional[Tuple[np.ndarray, int]]]:
+        """
+        呼叫語音克隆並下載（TTS_BACKEND=synthetic 時改為本地合成語音，不需網路，也不寫入快取）
+        
+        Returns:
+            (音訊 URL, (PCM, 取樣率))，失敗時對應項目為 None
+        """
+        if config.Config.TTS_BACKEND == 'synthetic':
+            with metrics.span('tts.clone_sync'):
+                await asyncio.sleep(config.Config.TTS_SYNTHETIC_LATENCY)
+            result = synthetic_speech(text, self.playback.sample_rate)
+            if play:
+                await self.playback.play(*result)
+            return f'synthetic:{cache_key}', result
+        
+        audio_url = await self.clone_voice_sync(
+            text, voice_id, voice_type,
+            speed_ratio, pitch_ratio, volume_ratio
+        )
+        if not audio_url:
+            return None, None
+        return audio_url, await self._download_and_play(audio_url, cache_key=cache_key, play=play)
+    
     async def text_to_speech(self, 
                             text: str, 
                             voice_type: str = 'system',
-                            play: bool = True) -> Optional[str]:
+                            play: bool = True,
+                            speed_ratio: float = 1.0,
+                            pitch_ratio: float = 1.0,
+                            volume_ratio: float = 1.0) -> Optional[str]:
         """
-        文字轉語音（整合上傳和克隆）
+        文字轉語音（先查 TTS 快取，未命中才呼叫語音克隆）
         
         Args:
             text: 要合成的文字
             voice_type: 'system' 或 'persona'
             play: 是否立即播放
+            speed_ratio: 語速比例
+            pitch_ratio: 音調比例
+            volume_ratio: 音量比例
         
         Returns:
-            生成的音訊 URL，失敗返回 None
+            生成的音訊 URL（快取命中時為快取檔案路徑），失敗返回 None
         """
         # 如果使用預設語音 ID，直接呼叫克隆 API
-        voice_id = (config.Config.SYSTEM_VOICE_ID if voice_type == 'system' 
-                   else config.Config.PERSONA_VOICE_ID)
-        
-        if voice_id and not voice_id.startswith('http'):
-            # 如果有設定的語音 ID，直接使用
-            audio_url = voice_id
-        else:
+        voice_id = self._voice_id(voice_type)
+        if not voice_id:
             # 否則需要先上傳參考音訊（這裡簡化處理，實際應該有預設的參考音訊）
             print("警告: 未設定語音 ID，需要先上傳參考音訊")
             return None
         
-        # 呼叫語音克隆
-        audio_url = await self.clone_voice_sync(text, audio_url, voice_type)
-        
-        if audio_url and play:
-            # 下載並播放
-            await self._download_and_play(audio_url)
+        # 快取命中時直接播放，不需任何網路請求
+        key = TTSCache.key(text, voice_id, speed_ratio, pitch_ratio, volume_ratio)
+        cached = await asyncio.to_thread(self.tts_cache.get, key)
+        if cached:
+            data, sr, path = cached
+            if play:
+                await self.playback.play(data, sr)
+            return path
         
+        # 呼叫語音克隆，下載、寫入快取並播放
+        audio_url, _ = await self._fetch_speech(
+            text, voice_id, voice_type,
+            speed_ratio, pitch_ratio, volume_ratio,
+            cache_key=key, play=play
+        )
         return audio_url
     
-    async def _download_and_play(self, url: str):
-        """下載音訊並播放"""
-        try:
-            response = requests.get(url, timeout=30)
-            if response.status_code == 200:
-                # 儲存到臨時檔案
-                temp_file = tempfile.NamedTemporaryFile(
-                    suffix='.wav',
-                    delete=False
+    async def synthesize(self,
+                         text: str,
+                         voice_type: str = 'system',
+                         speed_ratio: float = 1.0,
+                         pitch_ratio: float = 1.0,
+                         volume_ratio: float = 1.0) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        合成語音但不播放（先查 TTS 快取，未命中才呼叫語音克隆並寫入快取）
+        
+        Returns:
+            (PCM, 取樣率)，失敗返回 None
+        """
+        voice_id = self._voice_id(voice_type)
+        if not voice_id:
+            print("警告: 未設定語音 ID，需要先上傳參考音訊")
+            return None
+        
+        key = TTSCache.key(text, voice_id, speed_ratio, pitch_ratio, volume_ratio)
+        cached = await asyncio.to_thread(self.tts_cache.get, key)
+        if cached:
+            data, sr, _ = cached
+            return data, sr
+        
+        _, result = await self._fetch_speech(
+            text, voice_id, voice_type,
+            speed_ratio, pitch_ratio, volume_ratio,
+            cache_key=key, play=False
+        )
+        return result
+    
+    async def _stream_speech(self,
+                             text: str,
+                             voice_type: str = 'system',
+                             speed_ratio: float = 1.0,
+                             pitch_ratio: float = 1.0,
+                             volume_ratio: float = 1.0,
+                             tag=None) -> Optional[asyncio.Future]:
+        """
+        合成並排入播放，語音克隆的結果以串流路徑邊下載邊播放，開始播放後立即返回
+        （下載與寫入快取在背景繼續，stop_playback() 會取消）
+        
+        Returns:
+            播放結束時完成的 Future，失敗返回 None
+        """
+        voice_id = self._voice_id(voice_type)
+        if not voice_id:
+            print("警告: 未設定語音 ID，需要先上傳參考音訊")
+            return None
+        
+        key = TTSCache.key(text, voice_id, speed_ratio, pitch_ratio, volume_ratio)
+        cached = await asyncio.to_thread(self.tts_cache.get, key)
+        if cached:
+            data, sr, _ = cached
+            return await self.playback.enqueue(data, sr, tag=tag)
+        
+        if config.Config.TTS_BACKEND == 'synthetic':
+            _, result = await self._fetch_speech(text, voice_id, voice_type, cache_key=key, play=False)
+            return await self.playback.enqueue(*result, tag=tag)
+        
+        audio_url = await self.clone_voice_sync(
+            text, voice_id, voice_type,
+            speed_ratio, pitch_ratio, volume_ratio
+        )
+        if not audio_url:
+            return None
+        started = asyncio.get_running_loop().create_future()
+        download = asyncio.create_task(
+            self._download_and_play(audio_url, cache_key=key, tag=tag, started=started)
+        )
+        self._speech_tasks.add(download)
+        download.add_done_callback(self._speech_tasks.discard)
+        return await started
+    
+    async def speak(self,
+                    text: str,
+                    voice_type: str = 'persona',
+                    speed_ratio: float = 1.0,
+                    pitch_ratio: float = 1.0,
+                    volume_ratio: float = 1.0,
+                    on_progress: Optional[Callable[[float], None]] = None) -> bool:
+        """
+        分段合成並播放長文字
+        
+        文字依句子切段，各段同時合成（最多 TTS_MAX_IN_FLIGHT 段），
+        每段合成完成且前面的段都已排入播放後立即排入，段與段之間無縫接續。
+        第一段只有一個句子長，並以串流路徑邊下載邊播放，開始發聲的時間與回應長度無關。
+        stop_playback() 會取消尚未完成的合成。
+        
+        Args:
+            text: 要播放的文字
+            voice_type: 'system' 或 'persona'
+            speed_ratio: 語速比例
+            pitch_ratio: 音調比例
+            volume_ratio: 音量比例
+            on_progress: 播放進度回呼（0.0 - 1.0，依字數加權），以顯示幀率呼叫，
+                供顯示器捲動與語音同步
+        
+        Returns:
+            True 表示全部播完，False 表示被打斷或全部合成失敗
+        """
+        chunks = split_sentences(text)
+        if not chunks:
+            return False
+        
+        started_at = time.perf_counter()
+        epoch = self.interrupts
+        limit = asyncio.Semaphore(config.Config.TTS_MAX_IN_FLIGHT)
+        
+        async def render(chunk):
+            # 任務依順序建立，Semaphore 先到先得，前面的段優先合成
+            async with limit:
+                return await self.synthesize(
+                    chunk, voice_type,
+                    speed_ratio, pitch_ratio, volume_ratio
                 )
-                temp_path = temp_file.name
-                temp_file.write(response.content)
-                temp_file.close()
-                
-                # 播放
-                await self.play_audio(temp_path)
-                
-                # 清理臨時檔案
-                os.unlink(temp_path)
+        
+        async def render_first(chunk):
+            async with limit:
+                return await self._stream_speech(
+                    chunk, voice_type,
+                    speed_ratio, pitch_ratio, volume_ratio,
+                    tag=0
+                )
+        
+        # 第一段串流播放（結果為播放結束的 Future），之後重複的段落只合成一次
+        first = asyncio.create_task(render_first(chunks[0]))
+        rendering = {}
+        for chunk in chunks[1:]:
+            if chunk not in rendering:
+                rendering[chunk] = asyncio.create_task(render(chunk))
+        tasks = [first] + [rendering[chunk] for chunk in chunks[1:]]
+        pending = [first, *rendering.values()]
+        self._speech_tasks.update(pending)
+        futures = []
+        tracker = asyncio.create_task(self._track_progress(chunks, on_progress)) if on_progress else None
+        try:
+            for index, task in enumerate(tasks):
+                try:
+                    result = await task
+                except asyncio.CancelledError:
+                    if self.interrupts != epoch:
+                        return False
+                    raise
+                if self.interrupts != epoch:
+                    return False
+                if result is None:
+                    print(f"第 {index + 1}/{len(chunks)} 段合成失敗，略過")
+                    continue
+                if not futures:
+                    metrics.observe('tts.speak.first_audio', time.perf_counter() - started_at)
+                    metrics.stage('tts.first_audio', time.perf_counter() - started_at)
+                if index == 0:
+                    # 串流播放已排入
+                    futures.append(result)
+                else:
+                    futures.append(await self.playback.enqueue(*result, tag=index))
+            metrics.observe('tts.speak.chunks', len(chunks))
+            with metrics.span('tts.playback'):
+                completed = bool(futures) and all(await asyncio.gather(*futures))
+            if completed and on_progress:
+                on_progress(1.0)
+            return completed
+        finally:
+            if tracker:
+                tracker.cancel()
+            for task in pending:
+                task.cancel()
+            self._speech_tasks.difference_update(pending)
+    
+    async def _track_progress(self, chunks: List[str], on_progress: Callable[[float], None]):
+        """
+        以顯示幀率回報 speak() 的播放進度
+        
+        進度 = 目前段之前的字數 + 目前段字數 × 段內播放比例，除以總字數；
+        段與段之間沒有片段在播放時維持上一次的值（進度只增不減）。
+        """
+        starts = [0]
+        for chunk in chunks:
+            starts.append(starts[-1] + len(chunk))
+        total = starts[-1] or 1
+        interval = 1.0 / config.Config.DISPLAY_MAX_FPS
+        last = 0.0
+        while True:
+            playing = self.playback.now_playing()
+            if playing is not None and isinstance(playing[0], int) and playing[0] < len(chunks):
+                index, position, length = playing
+                fraction = (starts[index] + len(chunks[index]) * position / max(length, 1)) / total
+                if fraction > last:
+                    last = fraction
+                    on_progress(fraction)
+            await asyncio.sleep(interval)
+    
+    async def prerender(self, phrases: List[str], voice_type: str = 'system') -> int:
+        """
+        預先合成已知語句並寫入 TTS 快取（不播放）
+        
+        Args:
+            phrases: 語句列表
+            voice_type: 'system' 或 'persona'
+        
+        Returns:
+            新合成的語句數量
+        """
+        voice_id = self._voice_id(voice_type)
+        if not voice_id:
+            return 0
+        
+        rendered = 0
+        for text in phrases:
+            key = TTSCache.key(text, voice_id)
+            if await asyncio.to_thread(self.tts_cache.contains, key):
+                continue
+            _, result = await self._fetch_speech(text, voice_id, voice_type, cache_key=key, play=False)
+            if result:
+                rendered += 1
+        return rendered
+    
+    async def _cache_put(self, key: str, data: np.ndarray, sample_rate: int):
+        """在背景執行緒寫入 TTS 快取，寫入失敗不影響播放"""
+        try:
+            await asyncio.to_thread(self.tts_cache.put, key, data, sample_rate)
+        except Exception as e:
+            print(f"寫入 TTS 快取失敗: {e}")
+    
+    async def _download_and_play(self,
+                                 url: str,
+                                 cache_key: str = None,
+                                 play: bool = True,
+                                 tag=None,
+                                 started: Optional[asyncio.Future] = None) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        串流下載音訊，邊下載邊解碼播放（不寫暫存檔），完成後寫入 TTS 快取
+        
+        回應本文逐塊送入增量解碼器，第一段 PCM 解出後立即開始播放；
+        播放被打斷時仍會下載完畢，讓快取保有完整的語音。
+        
+        Args:
+            url: 音訊 URL
+            cache_key: TTS 快取鍵值，None 表示不寫入快取
+            play: 是否播放
+            tag: 播放片段的標記（見 PlaybackEngine.now_playing）
+            started: 提供時，開始播放後設為播放結束的 Future（失敗則設為 None），
+                且不等待播放結束即返回
+        
+        Returns:
+            (PCM, 取樣率)，下載或解碼失敗返回 None
+        """
+        # 對沖或逾時可能讓多個請求都開啟了回應，只保留勝出的那個
+        opened = []
+        
+        async def open_response():
+            response = await self.http.open(
+                'clone_download', 'GET', url,
+                timeout=resilience.deadline('clone_download')
+            )
+            opened.append(response)
+            _check_response(response)
+            return response
+        
+        started_at = time.perf_counter()
+        decoder = WavStreamDecoder()
+        stream = None
+        pcm = []
+        
+        async def emit(data):
+            nonlocal stream
+            pcm.append(data)
+            if not play:
+                return
+            if stream is None:
+                metrics.observe('tts.time_to_first_audio', time.perf_counter() - started_at)
+                stream = await self.playback.open_stream(decoder.sample_rate, tag=tag)
+                if started is not None and not started.done():
+                    started.set_result(stream.future)
+            stream.write(data)
+        
+        try:
+            # 只有開啟連線（收到回應標頭）這一步可以重試；開始播放後無法重來
+            response = None
+            try:
+                response = await resilience.call('clone_download', open_response)
+            finally:
+                for other in opened:
+                    if other is not response:
+                        await self.http.close(other)
+            
+            # 本文讀完（或失敗、被取消）即關閉回應，釋放連線，不等播放結束
+            try:
+                async for chunk in response.aiter_bytes(config.Config.TTS_STREAM_CHUNK_BYTES):
+                    data = decoder.feed(chunk)
+                    if data is not None and len(data):
+                        await emit(data)
+            finally:
+                await self.http.close(response)
+            
+            # 非 WAV 格式無法增量解碼，下載完後一次解碼
+            tail = decoder.finish()
+            if tail is not None and len(tail):
+                await emit(tail)
+            metrics.stage('tts.download', time.perf_counter() - started_at)
+            if not pcm:
+                raise ValueError("音訊內容為空")
+            
+            # 寫入快取與播放剩餘部分同時進行
+            data = np.concatenate(pcm)
+            jobs = []
+            if cache_key:
+                jobs.append(self._cache_put(cache_key, data, decoder.sample_rate))
+            if stream is not None:
+                stream.finish()
+                if started is None:
+                    jobs.append(stream.future)
+            await asyncio.gather(*jobs)
+            return data, decoder.sample_rate
         except Exception as e:
             print(f"下載播放錯誤: {e}")
+            return None
+        finally:
+            if stream is not None:
+                # 失敗或被取消時播完已收到的部分即結束
+                stream.finish()
+            if started is not None and not started.done():
+                started.set_result(None)
+
+    async def close(self):
+        """關閉音訊資源"""
+        if self._sound_watch_task:
+            self._sound_watch_task.cancel()
+        self.playback.close()
+        if self.input_stream is not None:
+            self.input_stream.stop()
+            self.input_stream.close()
+            self.input_stream = None
+        await self.http.aclose()
 
 if __name__ == '__main__':
     # 測試音訊功能
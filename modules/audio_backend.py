@@ -0,0 +1,177 @@
+"""
+檔案標準 (Standard):
+本檔案提供可替換的音訊裝置後端，讓音訊程式碼可以在沒有音效卡（或沒有 PortAudio）的電腦上執行：
+- sounddevice: 實際的輸入 / 輸出串流（預設）
+- null: 以背景執行緒依實際時間呼叫回呼的串流，輸入為靜音（可指定產生器），輸出直接丟棄
+  （只記錄播放的幀數），時序與實際裝置相同，錄音、端點偵測與播放進度照常運作
+另提供合成語音（TTS_BACKEND=synthetic）：依字數產生對應長度的音訊，不需網路與語音克隆 API。
+輸入：後端名稱（config.AUDIO_BACKEND）、串流參數
+輸出：與 sounddevice 相容的 InputStream / OutputStream
+
+執行方式 (Execution):
+- 被 modules.audio 與 modules.playback 使用
+- 獨立測試：python -m modules.audio_backend (以 null 後端錄音與播放各一秒)
+
+相依性 (Dependencies):
+- sounddevice: 僅 sounddevice 後端需要（延遲匯入）
+- numpy: 音訊區塊
+- threading: 模擬音訊執行緒
+- config: 系統配置（後端選擇、合成語音設定）
+"""
+
+import threading
+import time
+from typing import Callable, Optional, Tuple
+import numpy as np
+import config
+
+BACKENDS = ('sounddevice', 'null')
+
+
+class NullStream:
+    """
+    模擬的音訊串流：背景執行緒每 blocksize / samplerate 秒呼叫一次回呼，
+    介面與 sounddevice 的 InputStream / OutputStream 相同（start / stop / close）
+    """
+
+    def __init__(self,
+                 samplerate: int,
+                 blocksize: int,
+                 channels: int = 1,
+                 callback: Callable = None,
+                 source: Optional[Callable[[int, int, int], np.ndarray]] = None,
+                 output: bool = False,
+                 **kwargs):
+        """
+        初始化串流
+
+        Args:
+            samplerate: 取樣率
+            blocksize: 每次回呼的幀數
+            channels: 聲道數
+            callback: 與 sounddevice 相同的回呼
+            source: 輸入產生器 (起始幀, 幀數, 取樣率) -> 一維資料，None 為靜音
+            output: True 為輸出串流（回呼填入的資料直接丟棄）
+            **kwargs: 其他 sounddevice 參數（device、dtype 等，忽略）
+        """
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.channels = channels
+        self.callback = callback
+        self.source = source
+        self.output = output
+        self.frames = 0  # 已處理的幀數（輸出串流即為已播放的幀數）
+        self._running = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """啟動回呼執行緒"""
+        if self._thread is not None:
+            return
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        """依實際時間呼叫回呼（以起始時間對齊，不累積誤差）"""
+        block = np.zeros((self.blocksize, self.channels), dtype=np.float32)
+        interval = self.blocksize / self.samplerate
+        start = time.perf_counter()
+        count = 0
+        while self._running.is_set():
+            if self.output:
+                block[:] = 0
+            elif self.source is not None:
+                block[:] = np.asarray(self.source(self.frames, self.blocksize, self.samplerate),
+                                      dtype=np.float32).reshape(-1, 1)
+            self.callback(block, self.blocksize, None, None)
+            self.frames += self.blocksize
+            count += 1
+            delay = start + count * interval - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+    def stop(self):
+        """停止回呼執行緒"""
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """關閉串流"""
+        self.stop()
+
+
+def create_input_stream(backend: str = None, **kwargs):
+    """
+    依名稱建立輸入串流
+
+    Args:
+        backend: 'sounddevice' 或 'null'，預設使用 config.AUDIO_BACKEND
+        **kwargs: sounddevice.InputStream 的參數
+
+    Returns:
+        尚未啟動的輸入串流
+    """
+    backend = backend or config.Config.AUDIO_BACKEND
+    if backend == 'sounddevice':
+        import sounddevice as sd
+        return sd.InputStream(**kwargs)
+    if backend == 'null':
+        return NullStream(**kwargs)
+    raise ValueError(f"未知的音訊後端: {backend}（可用: {', '.join(BACKENDS)}）")
+
+
+def create_output_stream(backend: str = None, **kwargs):
+    """
+    依名稱建立輸出串流
+
+    Args:
+        backend: 'sounddevice' 或 'null'，預設使用 config.AUDIO_BACKEND
+        **kwargs: sounddevice.OutputStream 的參數
+
+    Returns:
+        尚未啟動的輸出串流
+    """
+    backend = backend or config.Config.AUDIO_BACKEND
+    if backend == 'sounddevice':
+        import sounddevice as sd
+        return sd.OutputStream(**kwargs)
+    if backend == 'null':
+        return NullStream(output=True, **kwargs)
+    raise ValueError(f"未知的音訊後端: {backend}（可用: {', '.join(BACKENDS)}）")
+
+
+def synthetic_speech(text: str, sample_rate: int) -> Tuple[np.ndarray, int]:
+    """
+    合成語音：長度依字數（TTS_SYNTHETIC_CHARS_PER_SECOND）的低音量音調
+
+    Args:
+        text: 文字
+        sample_rate: 取樣率
+
+    Returns:
+        (PCM, 取樣率)
+    """
+    seconds = max(len(text), 1) / config.Config.TTS_SYNTHETIC_CHARS_PER_SECOND
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.05 * np.sin(2 * np.pi * 220 * t)).astype(np.float32), sample_rate
+
+
+if __name__ == '__main__':
+    # 以 null 後端錄音與播放各一秒
+    print("音訊後端測試")
+    received = []
+    stream = create_input_stream('null', samplerate=16000, blocksize=1024, channels=1,
+                                 callback=lambda data, frames, t, status: received.append(frames))
+    stream.start()
+    time.sleep(1.0)
+    stream.stop()
+    print(f"  輸入: 1 秒收到 {sum(received)} 幀（{len(received)} 個區塊）")
+    output = create_output_stream('null', samplerate=48000, blocksize=512, channels=1,
+                                  callback=lambda data, frames, t, status: None)
+    output.start()
+    time.sleep(1.0)
+    output.stop()
+    print(f"  輸出: 1 秒播放 {output.frames} 幀")
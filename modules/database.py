@@ -11,6 +11,7 @@
 
 相依性 (Dependencies):
 - sqlite3: Python 內建模組
+- json: 嵌入向量序列化
 - datetime: 時間處理
 - os: 路徑處理
 - config: 系統配置
@@ -18,8 +19,9 @@
 
 import sqlite3
 import os
+import json
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import config
 
 class Database:
@@ -65,6 +67,15 @@ class Database:
             ON memories(mode)
         ''')
         
+        # 建立背景工作狀態表（用於斷點續傳）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS job_state (
+                name TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at DATETIME
+            )
+        ''')
+        
         conn.commit()
         conn.close()
     
@@ -197,6 +208,103 @@ class Database:
         start_date = (datetime.now() - timedelta(days=days)).isoformat()
         return self.get_memories(start_date=start_date, limit=limit)
 
+    def get_memories_without_embedding(self, after_id: int = 0, limit: int = 32) -> List[Dict]:
+        """
+        取得尚未產生嵌入向量的記憶（依 ID 遞增）
+        
+        Args:
+            after_id: 只取 ID 大於此值的記憶
+            limit: 返回筆數限制
+        
+        Returns:
+            記憶列表（id, content）
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT id, content FROM memories
+            WHERE embedding IS NULL AND id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (after_id, limit))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return [dict(row) for row in rows]
+    
+    def count_memories_without_embedding(self, after_id: int = 0) -> int:
+        """
+        計算尚未產生嵌入向量的記憶數量
+        
+        Args:
+            after_id: 只計算 ID 大於此值的記憶
+        
+        Returns:
+            記憶數量
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT COUNT(*) FROM memories WHERE embedding IS NULL AND id > ?',
+            (after_id,)
+        )
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+    
+    def set_embeddings(self, embeddings: List[Tuple[int, List[float]]]):
+        """
+        批次寫入嵌入向量（以 JSON 儲存）
+        
+        Args:
+            embeddings: (記憶 ID, 向量) 列表
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany(
+            'UPDATE memories SET embedding = ? WHERE id = ?',
+            [(json.dumps(vector), memory_id) for memory_id, vector in embeddings]
+        )
+        conn.commit()
+        conn.close()
+    
+    def get_job_state(self, name: str) -> Optional[str]:
+        """
+        取得背景工作的檢查點
+        
+        Args:
+            name: 工作名稱
+        
+        Returns:
+            檢查點值，不存在返回 None
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT value FROM job_state WHERE name = ?', (name,))
+        row = cursor.fetchone()
+        conn.close()
+        return row[0] if row else None
+    
+    def set_job_state(self, name: str, value: str):
+        """
+        儲存背景工作的檢查點
+        
+        Args:
+            name: 工作名稱
+            value: 檢查點值
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO job_state (name, value, updated_at)
+            VALUES (?, ?, ?)
+        ''', (name, value, datetime.now().isoformat()))
+        conn.commit()
+        conn.close()
+
 if __name__ == '__main__':
     # 測試資料庫功能
     db = Database()
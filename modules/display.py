@@ -2,6 +2,8 @@
 檔案標準 (Standard):
 本檔案負責 OLED 顯示器的控制，提供文字顯示、清屏、多行顯示等功能。
 支援中文字型顯示（需提供字型檔）。
+文字由字形與排版快取組合（不重複呼叫 FreeType），每個畫面先畫在記憶體中的影像，再與上一次送出的畫面比對，只透過 I2C 傳送有變動的頁/欄區域。
+裝置由 modules.display_backend 建立（實際 SSD1306、luma dummy/emulator 或記憶體點陣），不接受視窗命令的裝置改為送出整個畫面。
 輸入：文字內容、顯示模式
 輸出：OLED 螢幕顯示
 
@@ -13,37 +15,95 @@
 - luma.oled: OLED 顯示器驅動
 - luma.core: 核心顯示功能
 - PIL (Pillow): 圖像處理
-- config: 系統配置（OLED 設定）
+- config: 系統配置（OLED 設定、顯示後端）
+- modules.display_backend: 顯示裝置後端
+- modules.framebuffer: 畫面差異比對
+- modules.text_cache: 字形與單行排版快取
+- modules.scroll_view: 長文字捲動 / 跑馬燈檢視
+- modules.metrics: 畫面數與傳輸位元組數
 """
 
-from luma.core.interface.serial import i2c
-from luma.core.render import canvas
-from luma.oled.device import ssd1306
+from contextlib import contextmanager
 from PIL import Image, ImageDraw, ImageFont
 import os
 import config
+from modules.display_backend import create_device, supports_windows
+from modules.framebuffer import Framebuffer, WINDOW_COMMAND_BYTES
+from modules.text_cache import TextCache
+from modules.metrics import metrics
 
 class Display:
     """OLED 顯示器控制類別"""
     
-    def __init__(self):
-        """初始化 OLED 顯示器"""
-        # I2C 介面
-        serial = i2c(
-            port=1,
-            address=config.Config.OLED_I2C_ADDRESS
-        )
-        
-        # SSD1306 裝置
-        self.device = ssd1306(
-            serial,
-            width=config.Config.OLED_WIDTH,
-            height=config.Config.OLED_HEIGHT
-        )
+    def __init__(self, device=None):
+        """
+        初始化 OLED 顯示器
+        
+        Args:
+            device: luma 相容的顯示裝置，預設依 config.DISPLAY_BACKEND 建立
+        """
+        self.device = device or create_device()
+        self.windowed = supports_windows(self.device)
+        
+        # 保留上一次送出的畫面（裝置初始化後為全黑）
+        self.framebuffer = Framebuffer(self.device.width, self.device.height)
+        
+        # 字形與單行排版快取
+        self.text_cache = TextCache()
         
         # 載入字型
         self._load_fonts()
     
+    @contextmanager
+    def _frame(self):
+        """
+        在空白影像上繪製新畫面，離開時只傳送與上一畫面不同的區域
+        
+        用法與 luma 的 canvas 相同：with self._frame() as draw: ...
+        """
+        image = Image.new(self.device.mode, self.device.size)
+        yield ImageDraw.Draw(image)
+        self._present(image)
+    
+    def _draw_text(self, draw: ImageDraw.ImageDraw, xy: tuple, text: str, font=None):
+        """以快取的單行點陣繪製文字（位置語意與 draw.text 相同）"""
+        font = font or self.font_chinese or self.font_default
+        draw.bitmap(xy, self.text_cache.line(text, font).image, fill=255)
+    
+    def text_width(self, text: str, font=None) -> int:
+        """文字的實際像素寬度"""
+        return self.text_cache.width(text, font or self.font_chinese or self.font_default)
+    
+    def _present(self, image: Image.Image):
+        """比對畫面並傳送變動區域"""
+        regions = self.framebuffer.diff(self.device.preprocess(image))
+        metrics.incr('display.frames')
+        # 舊做法每張畫面都送出整個畫面，作為比較基準
+        metrics.incr('display.bytes_full', self.framebuffer.pages * self.framebuffer.width + WINDOW_COMMAND_BYTES)
+        if not regions:
+            metrics.incr('display.frames_unchanged')
+            return
+        
+        if not self.windowed:
+            # dummy / emulator 裝置只能整個畫面更新
+            self.device.display(image)
+            metrics.incr('display.regions')
+            metrics.incr('display.bytes', self.framebuffer.pages * self.framebuffer.width + WINDOW_COMMAND_BYTES)
+            return
+        
+        const = self.device._const
+        colstart = getattr(self.device, '_colstart', 0)
+        sent = 0
+        for page_start, page_end, col_start, col_end, data in regions:
+            self.device.command(
+                const.COLUMNADDR, colstart + col_start, colstart + col_end,
+                const.PAGEADDR, page_start, page_end
+            )
+            self.device.data(list(data))
+            sent += len(data) + WINDOW_COMMAND_BYTES
+        metrics.incr('display.regions', len(regions))
+        metrics.incr('display.bytes', sent)
+    
     def _load_fonts(self):
         """載入字型檔"""
         # 預設字型
@@ -64,7 +124,7 @@ class Display:
     
     def clear(self):
         """清空螢幕"""
-        with canvas(self.device) as draw:
+        with self._frame() as draw:
             draw.rectangle(
                 (0, 0, config.Config.OLED_WIDTH, config.Config.OLED_HEIGHT),
                 outline=0,
@@ -84,8 +144,8 @@ class Display:
         if font is None:
             font = self.font_chinese or self.font_default
         
-        with canvas(self.device) as draw:
-            draw.text((x, y), text, font=font, fill=255)
+        with self._frame() as draw:
+            self._draw_text(draw, (x, y), text, font)
     
     def show_multiline(self, lines: list, spacing: int = 12):
         """
@@ -95,12 +155,12 @@ class Display:
             lines: 文字行列表
             spacing: 行間距
         """
-        with canvas(self.device) as draw:
+        with self._frame() as draw:
             y = 0
             for line in lines:
                 if y >= config.Config.OLED_HEIGHT:
                     break
-                draw.text((0, y), line, font=self.font_chinese or self.font_default, fill=255)
+                self._draw_text(draw, (0, y), line)
                 y += spacing
     
     def show_centered(self, text: str, y: int = None):
@@ -114,12 +174,43 @@ class Display:
         if y is None:
             y = (config.Config.OLED_HEIGHT - 12) // 2
         
-        # 計算文字寬度（簡單估算）
-        text_width = len(text) * 6  # 每個字元約 6 像素
-        x = (config.Config.OLED_WIDTH - text_width) // 2
+        # 以實際像素寬度置中
+        x = (config.Config.OLED_WIDTH - self.text_width(text)) // 2
         
         self.show_text(text, max(0, x), y)
     
+    def render_strip(self, text: str, spacing: int = 12) -> Image.Image:
+        """
+        將長文字依螢幕寬度斷行，一次點陣化成高的 1-bit 長條
+        
+        Args:
+            text: 文字
+            spacing: 行距
+        
+        Returns:
+            寬度為螢幕寬度的 1-bit 影像
+        """
+        font = self.font_chinese or self.font_default
+        lines = self.text_cache.wrap(text, font, self.device.width)
+        strip = Image.new('1', (self.device.width, max(len(lines) * spacing, 1)))
+        for i, line in enumerate(lines):
+            strip.paste(self.text_cache.line(line, font).image, (0, i * spacing))
+        return strip
+    
+    def show_scroll(self, view):
+        """
+        顯示捲動檢視：標題行固定在上方，其餘區域貼上長條中目前位置的視窗
+        
+        Args:
+            view: modules.scroll_view.ScrollView
+        """
+        with self._frame() as draw:
+            y = 0
+            for line in view.header:
+                self._draw_text(draw, (0, y), line)
+                y += view.spacing
+            draw.bitmap((0, y), view.window(self, self.device.height - y), fill=255)
+    
     def show_mode(self, mode: str, status: str = ""):
         """
         顯示模式與狀態
@@ -141,9 +232,9 @@ class Display:
             text: 說明文字
             progress: 進度 (0.0 - 1.0)
         """
-        with canvas(self.device) as draw:
+        with self._frame() as draw:
             # 顯示文字
-            draw.text((0, 0), text, font=self.font_chinese or self.font_default, fill=255)
+            self._draw_text(draw, (0, 0), text)
             
             # 進度條
             bar_width = config.Config.OLED_WIDTH - 4
@@ -205,6 +296,9 @@ if __name__ == '__main__':
             display.show_progress(f"進度: {i}%", i / 100.0)
             time.sleep(0.3)
         
+        print(f"畫面 {metrics.count('display.frames')} 張（未變動 {metrics.count('display.frames_unchanged')} 張），"
+              f"傳送 {metrics.count('display.bytes')} bytes，"
+              f"全畫面更新需 {metrics.count('display.bytes_full')} bytes")
         print("測試完成")
         
     except Exception as e:
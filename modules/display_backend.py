@@ -0,0 +1,179 @@
+"""
+檔案標準 (Standard):
+本檔案提供可替換的顯示裝置後端，讓顯示程式碼可以在沒有 OLED 的電腦上執行與量測：
+- ssd1306: 實際的 I2C SSD1306（樹莓派，預設）
+- dummy: luma.core 的 dummy 裝置，只保留最後一張畫面
+- emulator: luma.emulator 的 pygame 視窗（需另外安裝 luma.emulator）
+- bitmap: 記憶體中的 SSD1306 模擬（BitmapSink），依視窗命令寫入顯示記憶體，
+  記錄 I2C 交易數與位元組數，可隨時輸出成 PNG
+輸入：後端名稱（config.DISPLAY_BACKEND）
+輸出：luma 相容的顯示裝置
+
+執行方式 (Execution):
+- 被 modules.display 與 modules.display_benchmark 使用
+- 獨立測試：python -m modules.display_backend (以 bitmap 後端寫入視窗並輸出 PNG)
+
+相依性 (Dependencies):
+- luma.core / luma.oled: 裝置與 SSD1306 命令常數
+- luma.emulator: emulator 後端（選用）
+- numpy: 頁格式與影像互轉
+- PIL (Pillow): 影像
+- config: 系統配置（後端、I2C 位址、解析度）
+- modules.framebuffer: 頁格式轉換
+"""
+
+import numpy as np
+from PIL import Image
+import luma.oled.const
+import config
+from modules.framebuffer import pack_pages
+
+BACKENDS = ('ssd1306', 'dummy', 'emulator', 'bitmap')
+
+# luma 的 I2C 介面（非 managed 模式）每次交易最多 32 個位元組
+I2C_BLOCK_BYTES = 32
+
+
+class BitmapSink:
+    """
+    記憶體中的 SSD1306：介面與 luma 裝置相同（command / data / display），
+    依 COLUMNADDR / PAGEADDR 視窗把資料寫入顯示記憶體，並記錄 I2C 傳輸量
+    """
+
+    mode = '1'
+    _const = luma.oled.const.ssd1306
+
+    def __init__(self, width: int = None, height: int = None):
+        """
+        初始化模擬裝置（顯示記憶體初始為全黑，與 SSD1306 初始化後相同）
+
+        Args:
+            width: 寬度，預設使用 config.OLED_WIDTH
+            height: 高度，預設使用 config.OLED_HEIGHT
+        """
+        self.width = width or config.Config.OLED_WIDTH
+        self.height = height or config.Config.OLED_HEIGHT
+        self.size = (self.width, self.height)
+        self.memory = np.zeros((self.height // 8, self.width), dtype=np.uint8)
+        self._window = (0, self.width - 1, 0, self.height // 8 - 1)
+        self._cursor = 0
+        self.reset_counters()
+
+    def reset_counters(self):
+        """清除傳輸計數"""
+        self.transactions = 0    # I2C 交易數（每次都有位址與控制位元組的開銷）
+        self.command_bytes = 0
+        self.data_bytes = 0
+
+    def preprocess(self, image: Image.Image) -> Image.Image:
+        """與 luma 裝置相同的前處理（不旋轉）"""
+        return image
+
+    def command(self, *cmd):
+        """接收命令，只解讀設定視窗的 COLUMNADDR / PAGEADDR"""
+        self.transactions += 1
+        self.command_bytes += len(cmd)
+        const = self._const
+        columns, pages = self._window[:2], self._window[2:]
+        i = 0
+        while i < len(cmd):
+            if cmd[i] == const.COLUMNADDR and i + 2 < len(cmd):
+                columns = (cmd[i + 1], cmd[i + 2])
+                i += 3
+            elif cmd[i] == const.PAGEADDR and i + 2 < len(cmd):
+                pages = (cmd[i + 1], cmd[i + 2])
+                i += 3
+            else:
+                i += 1
+        self._window = columns + pages
+        self._cursor = 0
+
+    def data(self, data):
+        """接收資料，依目前視窗逐欄、逐頁寫入顯示記憶體（與 SSD1306 水平定址模式相同）"""
+        self.transactions += -(-len(data) // I2C_BLOCK_BYTES)
+        self.data_bytes += len(data)
+        c0, c1, p0, p1 = self._window
+        columns = c1 - c0 + 1
+        cells = columns * (p1 - p0 + 1)
+        offsets = (self._cursor + np.arange(len(data))) % cells
+        self.memory[p0 + offsets // columns, c0 + offsets % columns] = np.asarray(data, dtype=np.uint8)
+        self._cursor += len(data)
+
+    def display(self, image: Image.Image):
+        """送出整個畫面（與 luma ssd1306.display 相同的傳輸）"""
+        self.command(self._const.COLUMNADDR, 0, self.width - 1,
+                     self._const.PAGEADDR, 0, self.height // 8 - 1)
+        self.data(list(pack_pages(image).tobytes()))
+
+    @property
+    def image(self) -> Image.Image:
+        """目前顯示記憶體的內容"""
+        bits = np.unpackbits(self.memory[:, :, None], axis=2, bitorder='little')
+        pixels = bits.transpose(0, 2, 1).reshape(self.height, self.width)
+        return Image.fromarray(pixels * 255).convert('1')
+
+    def save(self, path: str):
+        """將目前畫面存成 PNG"""
+        self.image.save(path)
+
+    def cleanup(self):
+        """與 luma 裝置相同的介面（無資源需釋放）"""
+        pass
+
+
+def create_device(backend: str = None):
+    """
+    依名稱建立顯示裝置
+
+    Args:
+        backend: 'ssd1306'、'dummy'、'emulator' 或 'bitmap'，預設使用 config.DISPLAY_BACKEND
+
+    Returns:
+        luma 相容的顯示裝置
+    """
+    backend = backend or config.Config.DISPLAY_BACKEND
+    width, height = config.Config.OLED_WIDTH, config.Config.OLED_HEIGHT
+    if backend == 'ssd1306':
+        from luma.core.interface.serial import i2c
+        from luma.oled.device import ssd1306
+        serial = i2c(port=1, address=config.Config.OLED_I2C_ADDRESS)
+        return ssd1306(serial, width=width, height=height)
+    if backend == 'dummy':
+        from luma.core.device import dummy
+        return dummy(width=width, height=height, mode='1')
+    if backend == 'emulator':
+        try:
+            from luma.emulator.device import pygame
+        except ImportError:
+            raise RuntimeError("emulator 後端需要 luma.emulator（pip install luma.emulator）")
+        return pygame(width=width, height=height, mode='1')
+    if backend == 'bitmap':
+        return BitmapSink(width, height)
+    raise ValueError(f"未知的顯示後端: {backend}（可用: {', '.join(BACKENDS)}）")
+
+
+def supports_windows(device) -> bool:
+    """裝置是否接受 SSD1306 的視窗命令（可只傳送變動區域）"""
+    const = getattr(device, '_const', None)
+    return hasattr(const, 'COLUMNADDR') and hasattr(device, 'command') and hasattr(device, 'data')
+
+
+if __name__ == '__main__':
+    # 以 bitmap 後端寫入一個視窗並輸出 PNG
+    import os
+    import tempfile
+    from PIL import ImageDraw
+    print("顯示後端測試")
+    sink = create_device('bitmap')
+    image = Image.new('1', sink.size)
+    ImageDraw.Draw(image).rectangle((10, 8, 40, 23), fill=255)
+    sink.display(image)
+    print(f"  整個畫面: {sink.transactions} 筆交易，{sink.command_bytes + sink.data_bytes} bytes，"
+          f"內容一致: {sink.image.tobytes() == image.tobytes()}")
+    sink.reset_counters()
+    sink.command(sink._const.COLUMNADDR, 10, 13, sink._const.PAGEADDR, 1, 2)
+    sink.data([0] * 8)
+    print(f"  4x2 視窗: {sink.transactions} 筆交易，{sink.command_bytes + sink.data_bytes} bytes")
+    path = os.path.join(tempfile.gettempdir(), 'display_backend_test.png')
+    sink.save(path)
+    print(f"  已輸出 {path}")
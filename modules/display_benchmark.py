@@ -0,0 +1,173 @@
+"""
+檔案標準 (Standard):
+本檔案是 OLED 顯示的渲染基準測試，不需要實體螢幕：
+1. 以 bitmap 後端（記憶體中的 SSD1306）建立 Display，依序執行每一種 show_* 畫面的典型畫面序列
+2. 每張畫面記錄渲染時間（繪製 + 差異比對 + 傳送）、I2C 交易數與傳送位元組數
+3. 以 I2C 傳輸模型估算實際匯流排在 100 kHz / 400 kHz 下的每張畫面傳輸時間與可達幀率
+I2C 模型：每筆交易有 START、位址位元組、控制位元組、STOP 的固定開銷，每個位元組 9 個時脈（含 ACK）；
+luma 的 I2C 介面每筆交易最多 32 個位元組。
+輸入：無（可指定 PNG 輸出目錄）
+輸出：每種畫面的渲染時間、傳輸量與估計幀率表
+
+執行方式 (Execution):
+- 獨立執行：python -m modules.display_benchmark [PNG 輸出目錄]
+
+相依性 (Dependencies):
+- config: 系統配置（幀率上限）
+- modules.display: 被量測的顯示程式碼
+- modules.display_backend: bitmap 後端（傳輸計數）
+- modules.framebuffer: 視窗命令位元組數
+- modules.scroll_view: 捲動 / 跑馬燈畫面
+"""
+
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+import config
+from modules.display import Display
+from modules.display_backend import BitmapSink, I2C_BLOCK_BYTES
+from modules.framebuffer import WINDOW_COMMAND_BYTES
+from modules.scroll_view import ScrollView
+
+# 量測的匯流排速度
+BUS_SPEEDS = (100_000, 400_000)
+
+# 每筆交易的固定時脈數：START + 位址 (8+ACK) + 控制位元組 (8+ACK) + STOP
+I2C_TRANSACTION_BITS = 1 + 9 + 9 + 1
+I2C_BITS_PER_BYTE = 9
+
+
+def i2c_seconds(transactions: int, payload_bytes: int, bus_hz: int) -> float:
+    """
+    估算 I2C 傳輸時間
+
+    Args:
+        transactions: 交易數
+        payload_bytes: 命令與資料位元組數（不含位址與控制位元組）
+        bus_hz: 匯流排時脈
+
+    Returns:
+        傳輸秒數
+    """
+    return (transactions * I2C_TRANSACTION_BITS + payload_bytes * I2C_BITS_PER_BYTE) / bus_hz
+
+
+def screens() -> List[Tuple[str, List[Callable[[Display], None]]]]:
+    """
+    每一種 show_* 畫面的典型畫面序列（與 main.py 中的使用方式相同）
+
+    Returns:
+        [(名稱, [畫面函式, ...]), ...]
+    """
+    modes = [config.Config.MODE_DAILY, config.Config.MODE_CHAT,
+             config.Config.MODE_DIARY, config.Config.MODE_REMINDER]
+    response = ("今天聽起來是很充實的一天。你提到早上去公園散步，"
+                "還遇到了以前的鄰居，聊了很多小時候的事情。") * 4
+    scroll = ScrollView(response, header=["回應"])
+    marquee = ScrollView("早上去公園散步  /  中午和朋友吃飯  /  下午去圖書館  /  晚上整理相簿",
+                         header=["日記回顧", "2026-10-18", "3 條記錄"], marquee=True)
+
+    def seek(view, fraction):
+        def frame(display):
+            view.seek(fraction)
+            display.show_scroll(view)
+        return frame
+
+    def move(view, x):
+        def frame(display):
+            view.position = x
+            display.show_scroll(view)
+        return frame
+
+    return [
+        ('clear', [lambda d: d.clear()] * 10),
+        ('show_text', [lambda d, t=t: d.show_text(t, 0, 0)
+                       for t in ["錄音中...", "處理中...", "無法識別", "錄音中..."] * 5]),
+        ('show_multiline', [lambda d, q=q: d.show_multiline(["每日訪談", q])
+                            for q in ["今天過得如何？", "最近有什麼開心的事？"] * 10]),
+        ('show_centered', [lambda d, t=t: d.show_centered(t)
+                           for t in ["EchoMemo", "準備就緒"] * 10]),
+        ('show_mode', [lambda d, m=m: d.show_mode(m, "按鈕確認") for m in modes * 5]),
+        ('show_progress', [lambda d, i=i: d.show_progress(f"回填: {i}%", i / 100.0)
+                           for i in range(0, 101, 5)]),
+        ('show_scroll', [seek(scroll, i / 50) for i in range(51)]),
+        ('show_scroll (marquee)', [move(marquee, x * 2) for x in range(60)]),
+    ]
+
+
+def run(png_dir: str = None) -> List[Dict]:
+    """
+    執行基準測試
+
+    Args:
+        png_dir: 指定時每種畫面的最後一張存成 PNG
+
+    Returns:
+        每種畫面的結果（平均 / 最大渲染時間、平均傳輸量、各匯流排速度的傳輸時間與幀率）
+    """
+    sink = BitmapSink()
+    display = Display(sink)
+    if png_dir:
+        os.makedirs(png_dir, exist_ok=True)
+
+    results = []
+    for name, frames in screens():
+        display.clear()
+        render_times, payloads, transactions = [], [], []
+        for frame in frames:
+            sink.reset_counters()
+            start = time.perf_counter()
+            frame(display)
+            render_times.append(time.perf_counter() - start)
+            payloads.append(sink.command_bytes + sink.data_bytes)
+            transactions.append(sink.transactions)
+
+        count = len(frames)
+        result = {
+            'screen': name,
+            'frames': count,
+            'render_mean': sum(render_times) / count,
+            'render_max': max(render_times),
+            'bytes': sum(payloads) / count,
+            'transactions': sum(transactions) / count,
+        }
+        for hz in BUS_SPEEDS:
+            bus = sum(i2c_seconds(t, b, hz) for t, b in zip(transactions, payloads)) / count
+            result[f'bus_{hz // 1000}k'] = bus
+            result[f'fps_{hz // 1000}k'] = 1.0 / (result['render_mean'] + bus)
+        results.append(result)
+
+        if png_dir:
+            sink.save(os.path.join(png_dir, f"{name.split()[0]}{'_marquee' if 'marquee' in name else ''}.png"))
+    return results
+
+
+def full_frame_baseline() -> Dict[int, float]:
+    """不做差異比對、每張畫面都送出整個畫面時的傳輸時間（各匯流排速度）"""
+    sink = BitmapSink()
+    pages = sink.height // 8
+    transactions = 1 + -(-sink.width * pages // I2C_BLOCK_BYTES)
+    payload = WINDOW_COMMAND_BYTES + sink.width * pages
+    return {hz: i2c_seconds(transactions, payload, hz) for hz in BUS_SPEEDS}
+
+
+if __name__ == '__main__':
+    png_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    print("OLED 渲染基準測試（bitmap 後端）")
+    header = f"  {'畫面':<22}{'渲染 ms':>9}{'最大 ms':>9}{'bytes':>8}{'交易':>6}"
+    for hz in BUS_SPEEDS:
+        header += f"{f'{hz // 1000}k ms':>9}{f'{hz // 1000}k fps':>9}"
+    print(header)
+    for r in run(png_dir):
+        line = (f"  {r['screen']:<22}{r['render_mean'] * 1000:>9.2f}{r['render_max'] * 1000:>9.2f}"
+                f"{r['bytes']:>8.0f}{r['transactions']:>6.1f}")
+        for hz in BUS_SPEEDS:
+            line += f"{r[f'bus_{hz // 1000}k'] * 1000:>9.2f}{r[f'fps_{hz // 1000}k']:>9.1f}"
+        print(line)
+    baseline = full_frame_baseline()
+    print("  整個畫面（無差異比對）: " + "，".join(
+        f"{hz // 1000} kHz {seconds * 1000:.1f} ms（{1 / seconds:.1f} fps）" for hz, seconds in baseline.items()))
+    print(f"  渲染器幀率上限: {config.Config.DISPLAY_MAX_FPS} fps")
+    if png_dir:
+        print(f"  已輸出 PNG 至 {png_dir}")
@@ -0,0 +1,169 @@
+"""
+檔案標準 (Standard):
+本檔案實作非同步顯示渲染器 (DisplayRenderer)，由單一背景 Task 擁有 OLED 裝置：
+1. 呼叫端以與 Display 相同的 show_* 方法「張貼」想要的畫面狀態，立即返回不阻塞
+2. 渲染前只保留最新的狀態（latest-state-wins），快速旋轉編碼器時中間的畫面直接略過
+3. 繪製與 I2C 傳輸在背景執行緒執行，不佔用事件循環
+4. 幀率上限 DISPLAY_MAX_FPS，兩次渲染之間至少間隔 1/FPS 秒
+輸入：畫面狀態（Display 方法名稱與參數）
+輸出：OLED 螢幕顯示
+
+執行方式 (Execution):
+- 被 main.py 使用（包裝 modules.display.Display）
+- 獨立測試：python -m modules.display_renderer (需要 OLED 顯示器)
+
+相依性 (Dependencies):
+- asyncio: 渲染 Task 與背景執行緒
+- threading: 裝置存取鎖
+- config: 系統配置（幀率上限）
+- modules.display: 實際繪製與傳輸
+- modules.metrics: 張貼、合併、渲染時間
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Optional
+import config
+from modules.metrics import metrics
+
+
+class DisplayRenderer:
+    """以背景 Task 擁有顯示器，合併畫面狀態並限制幀率"""
+
+    def __init__(self, display, max_fps: float = None):
+        """
+        初始化渲染器（渲染 Task 於 start() 時啟動）
+
+        Args:
+            display: modules.display.Display 實例
+            max_fps: 幀率上限，預設使用 config.DISPLAY_MAX_FPS
+        """
+        self.display = display
+        self.min_interval = 1.0 / (max_fps or config.Config.DISPLAY_MAX_FPS)
+        self._latest: Optional[tuple] = None
+        self._pending = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # 每張畫面渲染完成後呼叫 (方法名稱, 參數, 完成時間)，供模擬測試量測回饋延遲
+        self.on_frame: Optional[Callable[[str, tuple, float], None]] = None
+
+    def start(self):
+        """啟動渲染 Task（start 之前張貼的狀態會在啟動後渲染）"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def post(self, method: str, *args, **kwargs):
+        """
+        張貼畫面狀態，覆蓋尚未渲染的前一個狀態
+
+        Args:
+            method: Display 的方法名稱
+            *args, **kwargs: 方法參數
+        """
+        if self._latest is not None:
+            metrics.incr('display.coalesced')
+        metrics.incr('display.posted')
+        self._latest = (method, args, kwargs, time.perf_counter())
+        self._idle.clear()
+        self._pending.set()
+
+    def _render(self, state: tuple):
+        """在背景執行緒繪製並傳送"""
+        method, args, kwargs, _ = state
+        with self._lock:
+            getattr(self.display, method)(*args, **kwargs)
+
+    async def _run(self):
+        """渲染循環：取最新狀態渲染，之後等待到幀率允許的時間"""
+        while True:
+            await self._pending.wait()
+            self._pending.clear()
+            state, self._latest = self._latest, None
+            if state is None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                await asyncio.to_thread(self._render, state)
+            except Exception as e:
+                print(f"顯示錯誤: {e}")
+            end = time.perf_counter()
+            metrics.observe('display.render_time', end - start)
+            metrics.observe('display.post_to_frame', end - state[3])
+            if self.on_frame:
+                self.on_frame(state[0], state[1], end)
+
+            if self._latest is None:
+                self._idle.set()
+            wait = self.min_interval - (end - start)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    async def idle(self):
+        """等待所有已張貼的狀態渲染完成"""
+        await self._idle.wait()
+
+    async def close(self):
+        """停止渲染 Task 並清空螢幕"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        with self._lock:
+            self.display.clear()
+
+    # ===== 與 Display 相同的介面（張貼狀態，不阻塞） =====
+
+    def clear(self):
+        """清空螢幕"""
+        self.post('clear')
+
+    def show_text(self, text: str, x: int = 0, y: int = 0, font=None):
+        """顯示文字"""
+        self.post('show_text', text, x, y, font)
+
+    def show_multiline(self, lines: list, spacing: int = 12):
+        """顯示多行文字"""
+        self.post('show_multiline', list(lines), spacing)
+
+    def show_centered(self, text: str, y: int = None):
+        """顯示置中文字"""
+        self.post('show_centered', text, y)
+
+    def show_mode(self, mode: str, status: str = ""):
+        """顯示模式與狀態"""
+        self.post('show_mode', mode, status)
+
+    def show_progress(self, text: str, progress: float):
+        """顯示進度"""
+        self.post('show_progress', text, progress)
+
+    def show_scroll(self, view):
+        """顯示捲動檢視（渲染時才讀取 view 的目前位置）"""
+        self.post('show_scroll', view)
+
+
+if __name__ == '__main__':
+    # 快速張貼大量畫面，確認只渲染最新狀態（需要 OLED 顯示器）
+    from modules.display import Display
+    print("非同步顯示渲染器測試")
+
+    async def test():
+        renderer = DisplayRenderer(Display())
+        renderer.start()
+        for i in range(101):
+            renderer.show_progress(f"進度: {i}%", i / 100.0)
+            await asyncio.sleep(0.005)
+        await renderer.idle()
+        print(f"  張貼 {metrics.count('display.posted')} 次，"
+              f"合併 {metrics.count('display.coalesced')} 次，"
+              f"渲染 {metrics.summary('display.render_time')['count']} 張")
+        await renderer.close()
+
+    asyncio.run(test())
@@ -0,0 +1,203 @@
+"""
+檔案標準 (Standard):
+本檔案實作背景嵌入向量回填工作：找出尚未產生嵌入向量的記憶，
+以可設定的批次大小呼叫嵌入 API 並寫回資料庫，不佔用互動回合的時間。
+- 遵守呼叫速率上限（config.EMBED_REQUESTS_PER_MINUTE）
+- 每個批次完成後將最後處理的記憶 ID 寫入 job_state，重啟後從檢查點續傳
+- 批次失敗時批次大小減半，直到單筆；同一筆記憶失敗 EMBED_MAX_ROW_FAILURES 次後略過
+  （失敗次數與略過的 ID 記錄在 job_state），不會一直重試同一批而卡住後面的記憶；
+  斷路器開啟（服務中斷）時不計入失敗次數
+- 回報每秒處理筆數與剩餘待處理筆數
+輸入：資料庫中 embedding 為 NULL 的記憶
+輸出：寫回資料庫的嵌入向量、進度指標
+
+執行方式 (Execution):
+- 由 main.py 在啟動時建立背景 Task，新增記憶後呼叫 notify() 喚醒
+- 獨立測試：python -m modules.embedding_job (回填一次後結束)
+
+相依性 (Dependencies):
+- asyncio: 背景工作與速率限制
+- config: 系統配置（批次大小、速率上限、單筆失敗上限）
+- modules.ai: 嵌入 API（含韌性策略）
+- modules.database: 讀寫記憶與檢查點
+- modules.metrics: 進度指標
+- modules.resilience: 斷路器開啟的例外
+"""
+
+import asyncio
+import time
+from typing import Optional
+import config
+from modules.database import Database
+from modules.metrics import metrics
+from modules.resilience import CircuitOpenError
+
+
+class EmbeddingBackfill:
+    """嵌入向量回填工作"""
+
+    JOB_NAME = 'embedding_backfill'
+
+    def __init__(self,
+                 ai,
+                 db: Database = None,
+                 batch_size: int = None,
+                 requests_per_minute: float = None):
+        """
+        初始化回填工作
+
+        Args:
+            ai: modules.ai.AI 實例（提供 embed_texts）
+            db: 資料庫，預設使用 ai.db
+            batch_size: 批次大小，預設使用 config.EMBED_BATCH_SIZE
+            requests_per_minute: 速率上限，預設使用 config.EMBED_REQUESTS_PER_MINUTE
+        """
+        self.ai = ai
+        self.db = db or ai.db
+        self.batch_size = batch_size or config.Config.EMBED_BATCH_SIZE
+        self.batch_limit = self.batch_size  # 目前的批次大小（失敗時減半）
+        rpm = requests_per_minute or config.Config.EMBED_REQUESTS_PER_MINUTE
+        self.min_interval = 60.0 / rpm
+        self._last_request = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self.rows_done = 0
+        self.elapsed = 0.0
+
+    def notify(self):
+        """通知有新記憶需要嵌入（新增記憶後呼叫）"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _checkpoint(self) -> int:
+        """讀取檢查點（最後完成的記憶 ID）"""
+        value = self.db.get_job_state(self.JOB_NAME)
+        return int(value) if value else 0
+
+    def _record_failure(self, row_id: int) -> bool:
+        """
+        記錄單筆記憶的失敗次數，達到上限時略過（檢查點移過該筆，ID 記入略過清單）
+
+        Returns:
+            是否已略過
+        """
+        value = self.db.get_job_state(f'{self.JOB_NAME}.failures')
+        failed_id, count = (int(part) for part in value.split(':')) if value else (0, 0)
+        count = count + 1 if failed_id == row_id else 1
+        if count < config.Config.EMBED_MAX_ROW_FAILURES:
+            self.db.set_job_state(f'{self.JOB_NAME}.failures', f'{row_id}:{count}')
+            return False
+        skipped = self.db.get_job_state(f'{self.JOB_NAME}.skipped')
+        self.db.set_job_state(f'{self.JOB_NAME}.skipped', f'{skipped},{row_id}' if skipped else str(row_id))
+        self.db.set_job_state(f'{self.JOB_NAME}.failures', '')
+        self.db.set_job_state(self.JOB_NAME, str(row_id))
+        return True
+
+    async def _throttle(self):
+        """依速率上限等待"""
+        wait = self._last_request + self.min_interval - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_request = time.monotonic()
+
+    async def run_once(self) -> int:
+        """
+        處理一個批次
+
+        Returns:
+            本批次完成的筆數（0 表示沒有待處理的記憶）
+
+        Raises:
+            Exception: 嵌入 API 失敗（檢查點不前進，下次以減半的批次重試；
+                單筆失敗達上限時略過該筆）
+        """
+        checkpoint = await asyncio.to_thread(self._checkpoint)
+        rows = await asyncio.to_thread(
+            self.db.get_memories_without_embedding, checkpoint, self.batch_limit
+        )
+        if not rows:
+            return 0
+
+        await self._throttle()
+        start = time.perf_counter()
+        try:
+            vectors = await self.ai.embed_texts([row['content'] for row in rows])
+            if len(vectors) != len(rows):
+                raise RuntimeError(f"嵌入數量不符: {len(vectors)} != {len(rows)}")
+        except CircuitOpenError:
+            # 服務中斷，不是這批記憶的問題
+            raise
+        except Exception:
+            if len(rows) > 1:
+                # 縮小批次，找出造成失敗的記憶
+                self.batch_limit = max(1, len(rows) // 2)
+            elif await asyncio.to_thread(self._record_failure, rows[0]['id']):
+                metrics.incr('embedding.skipped')
+                print(f"嵌入回填: 記憶 {rows[0]['id']} 失敗 "
+                      f"{config.Config.EMBED_MAX_ROW_FAILURES} 次，略過")
+            raise
+        self.batch_limit = min(self.batch_size, self.batch_limit * 2)
+
+        await asyncio.to_thread(
+            self.db.set_embeddings,
+            [(row['id'], vector) for row, vector in zip(rows, vectors)]
+        )
+        await asyncio.to_thread(self.db.set_job_state, self.JOB_NAME, str(rows[-1]['id']))
+        self.rows_done += len(rows)
+        self.elapsed += time.perf_counter() - start
+        return len(rows)
+
+    async def report(self) -> dict:
+        """
+        回報進度
+
+        Returns:
+            {'rows', 'rows_per_sec', 'remaining'}
+        """
+        checkpoint = await asyncio.to_thread(self._checkpoint)
+        remaining = await asyncio.to_thread(self.db.count_memories_without_embedding, checkpoint)
+        rate = self.rows_done / self.elapsed if self.elapsed > 0 else 0.0
+        metrics.observe('embedding.rows_per_sec', rate)
+        metrics.observe('embedding.backlog', remaining)
+        return {'rows': self.rows_done, 'rows_per_sec': rate, 'remaining': remaining}
+
+    async def drain(self):
+        """處理到沒有待處理的記憶為止"""
+        while await self.run_once():
+            progress = await self.report()
+            print(f"嵌入回填: 已完成 {progress['rows']} 筆，"
+                  f"{progress['rows_per_sec']:.1f} 筆/秒，剩餘 {progress['remaining']} 筆")
+
+    async def run(self):
+        """背景循環：清空待處理記憶後等待 notify() 或定期輪詢"""
+        self._wakeup = asyncio.Event()
+        while True:
+            # 在清空之前清除：清空期間（包括最後一批）到達的 notify() 會讓下面的等待立即返回
+            self._wakeup.clear()
+            try:
+                await self.drain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                metrics.incr('embedding.batch_failed')
+                print(f"嵌入回填錯誤: {e}")
+                await asyncio.sleep(config.Config.EMBED_RETRY_DELAY)
+                continue
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=config.Config.EMBED_IDLE_POLL)
+            except asyncio.TimeoutError:
+                pass
+
+
+if __name__ == '__main__':
+    # 回填一次後結束
+    from modules.ai import AI
+    print("嵌入向量回填")
+
+    async def test():
+        job = EmbeddingBackfill(AI())
+        await job.drain()
+        progress = await job.report()
+        print(f"完成，剩餘 {progress['remaining']} 筆")
+
+    asyncio.run(test())
@@ -0,0 +1,120 @@
+"""
+檔案標準 (Standard):
+本檔案實作 SSD1306 的保留式畫面緩衝 (Framebuffer) 與差異比對。
+SSD1306 的顯示記憶體以頁 (page) 為單位：每頁 8 列，每個位元組是一欄中垂直的 8 個像素。
+新畫面轉成頁格式後與上一次送出的畫面比對，只回傳有變動的區域（頁範圍 × 欄範圍），
+並在「每頁各送一個視窗」與「送一個涵蓋全部變動的矩形」之間選擇傳輸量較小者。
+輸入：1-bit PIL 影像
+輸出：需傳送的區域與資料
+
+執行方式 (Execution):
+- 被 modules.display 使用
+- 獨立測試：python -m modules.framebuffer (比較全畫面與差異傳輸的位元組數)
+
+相依性 (Dependencies):
+- numpy: 向量化的頁格式轉換與比對
+- PIL (Pillow): 影像
+"""
+
+from typing import List, Tuple
+import numpy as np
+from PIL import Image
+
+# 每個視窗的命令開銷：COLUMNADDR start end + PAGEADDR start end
+WINDOW_COMMAND_BYTES = 6
+
+# 變動區域：(起始頁, 結束頁, 起始欄, 結束欄, 資料)，結束值包含在內
+Region = Tuple[int, int, int, int, bytes]
+
+
+def pack_pages(image: Image.Image) -> np.ndarray:
+    """
+    將 1-bit 影像轉成 SSD1306 頁格式
+
+    Args:
+        image: 模式 '1' 的影像（高度為 8 的倍數）
+
+    Returns:
+        (頁數, 寬度) 的 uint8 陣列，位元 0 為該頁最上方的像素
+    """
+    pixels = np.asarray(image, dtype=np.uint8)
+    height, width = pixels.shape
+    pages = pixels.reshape(height // 8, 8, width).transpose(0, 2, 1)
+    return np.packbits(pages, axis=2, bitorder='little')[:, :, 0]
+
+
+class Framebuffer:
+    """保留上一次送出的畫面，計算最小的更新區域"""
+
+    def __init__(self, width: int, height: int):
+        """
+        初始化畫面緩衝（初始內容為全黑，與裝置初始化後的狀態相同）
+
+        Args:
+            width: 螢幕寬度
+            height: 螢幕高度
+        """
+        self.width = width
+        self.pages = height // 8
+        self.sent = np.zeros((self.pages, width), dtype=np.uint8)
+        self._force = False
+
+    def diff(self, image: Image.Image) -> List[Region]:
+        """
+        比對新畫面並更新保留的畫面
+
+        Args:
+            image: 新畫面（模式 '1'）
+
+        Returns:
+            需傳送的區域列表，畫面沒有變動時為空
+        """
+        frame = pack_pages(image)
+        if self._force:
+            self._force = False
+            self.sent = frame
+            return [(0, self.pages - 1, 0, self.width - 1, frame.tobytes())]
+        changed = frame != self.sent
+        rows = np.flatnonzero(changed.any(axis=1))
+        if len(rows) == 0:
+            return []
+        self.sent = frame
+
+        # 每頁各自的變動欄範圍
+        spans = []
+        for page in rows:
+            columns = np.flatnonzero(changed[page])
+            spans.append((int(page), int(columns[0]), int(columns[-1])))
+        per_page = sum(end - start + 1 + WINDOW_COMMAND_BYTES for _, start, end in spans)
+
+        # 涵蓋全部變動的單一矩形
+        top, bottom = int(rows[0]), int(rows[-1])
+        left = min(start for _, start, _ in spans)
+        right = max(end for _, _, end in spans)
+        box = (bottom - top + 1) * (right - left + 1) + WINDOW_COMMAND_BYTES
+
+        if box <= per_page:
+            return [(top, bottom, left, right, frame[top:bottom + 1, left:right + 1].tobytes())]
+        return [(page, page, start, end, frame[page, start:end + 1].tobytes())
+                for page, start, end in spans]
+
+    def invalidate(self):
+        """裝置內容未知（例如重新初始化）時呼叫，下一次 diff 會送出整個畫面"""
+        self._force = True
+
+
+if __name__ == '__main__':
+    # 比較全畫面與差異傳輸的位元組數
+    from PIL import ImageDraw
+    print("畫面緩衝差異比對測試")
+    fb = Framebuffer(128, 64)
+    full = 128 * 8
+    for i in range(0, 101, 20):
+        image = Image.new('1', (128, 64))
+        draw = ImageDraw.Draw(image)
+        draw.text((0, 0), "Progress", fill=255)
+        draw.rectangle((2, 54, 126, 62), outline=255, fill=0)
+        draw.rectangle((3, 55, 3 + int(122 * i / 100), 61), fill=255)
+        regions = fb.diff(image)
+        sent = sum(len(data) + WINDOW_COMMAND_BYTES for *_, data in regions)
+        print(f"  {i:3d}%: {len(regions)} 個區域，{sent} bytes（全畫面 {full} bytes）")
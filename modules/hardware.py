@@ -2,6 +2,14 @@
 檔案標準 (Standard):
 本檔案負責所有 GPIO 硬體控制，包括旋轉編碼器、按鈕的初始化與事件監聽。
 提供非同步事件處理介面，供主程式狀態機使用。
+GPIO 回呼（gpiozero 背景執行緒）以 call_soon_threadsafe 把事件放入 asyncio.Queue，
+run() 直接 await 佇列並執行回呼：事件到達即處理，沒有輪詢，閒置時不喚醒事件循環。
+編碼器的刻度在送出前合併：佇列中已有旋轉事件時只累加增量，回呼收到的是合併後的總增量；
+快速旋轉時依刻度間隔加速（每格計為多格），快速轉動可以跳得更遠且不會落後於旋鈕。
+每種事件的處理函式以 Task 執行，依 config.INPUT_POLICIES 的策略（serialize / latest / drop）
+決定與同一通道前一次處理的關係；通道由 config.INPUT_LANES 指定（錄音按鈕的按下與放開共用一條，
+依序處理），不同通道互不等待，錄音按鈕事件在佇列中優先取出。
+HARDWARE_BACKEND=mock 時改用 gpiozero 的模擬腳位，由 modules.hardware_sim 重播輸入腳本。
 輸入：GPIO 事件（按鈕按下、編碼器旋轉）
 輸出：非同步事件回呼
 
@@ -12,7 +20,8 @@
 相依性 (Dependencies):
 - gpiozero: GPIO 控制函式庫 (Raspberry Pi 5 相容)
 - asyncio: 非同步事件處理
-- config: 系統配置（GPIO 腳位）
+- config: 系統配置（GPIO 腳位、事件處理策略）
+- modules.metrics: 輸入延遲（GPIO 回呼到事件循環處理）、旋轉刻度與送出事件數
 
 硬體規格 (根據 spec.md):
 - 旋轉編碼器 (EC11):
@@ -24,11 +33,21 @@
 """
 
 import asyncio
-from gpiozero import RotaryEncoder, Button
-from typing import Callable, Optional
+import itertools
 import threading
-import queue
+import time
+from gpiozero import RotaryEncoder, Button
+from typing import Callable, Dict, Optional
 import config
+from modules.metrics import metrics
+
+# 事件處理策略
+SERIALIZE = 'serialize'
+LATEST_WINS = 'latest'
+DROP_WHILE_BUSY = 'drop'
+
+# 優先取出的事件（錄音按鈕：延遲直接影響錄到的內容）
+PRIORITY_EVENTS = ('record_press', 'record_release')
 
 class Hardware:
     """硬體控制類別
@@ -38,28 +57,41 @@ class Hardware:
     - 獨立錄音按鈕
     """
     
-    def __init__(self):
+    def __init__(self, pin_factory=None):
         """初始化所有硬體元件
         
         根據 config.py 中的 GPIO 腳位設定初始化：
         - 旋轉編碼器：CLK (GPIO 22), DT (GPIO 27), SW (GPIO 17)
         - 錄音按鈕：GPIO 23
+        
+        Args:
+            pin_factory: gpiozero 腳位工廠，預設依 config.HARDWARE_BACKEND
+                （gpio 使用系統預設，mock 使用模擬腳位）
         """
+        if pin_factory is None and config.Config.HARDWARE_BACKEND == 'mock':
+            from gpiozero.pins.mock import MockFactory
+            pin_factory = MockFactory()
+        self.pin_factory = pin_factory
+        
         # 旋轉編碼器（用於模式切換）
         # 根據 spec.md: EC11 旋轉編碼器
         # CLK: GPIO 22 (Pin 15), DT: GPIO 27 (Pin 13)
         # gpiozero.RotaryEncoder 使用參數 a 和 b，不是 pin1 和 pin2
+        # max_steps=0：steps 不設上限，以 steps 的變化計算刻度
         self.rotary_encoder = RotaryEncoder(
             a=config.Config.GPIO_ROTARY_CLK,  # GPIO 22 (CLK)
             b=config.Config.GPIO_ROTARY_DT,   # GPIO 27 (DT)
-            bounce_time=0.01  # 防彈跳時間（毫秒）
+            bounce_time=0.01,  # 防彈跳時間（秒）
+            max_steps=0,
+            pin_factory=pin_factory
         )
         
         # 編碼器按鈕（旋轉編碼器上的按鈕）
         # SW: GPIO 17 (Pin 11) - Active Low, Pull-up required
         self.rotary_button = Button(
             config.Config.GPIO_ROTARY_SW,  # GPIO 17
-            pull_up=True
+            pull_up=True,
+            pin_factory=pin_factory
         )
         
         # 錄音按鈕（獨立按鈕）
@@ -67,23 +99,40 @@ class Hardware:
         # 邏輯：按住 = 錄音，放開 = 停止錄音
         self.record_button = Button(
             config.Config.GPIO_RECORD_BUTTON,  # GPIO 23
-            pull_up=True
+            pull_up=True,
+            pin_factory=pin_factory
         )
         
         # 事件回呼函式
-        self.on_rotary_rotate: Optional[Callable[[int], None]] = None  # delta: -1 或 1
+        self.on_rotary_rotate: Optional[Callable[[int], None]] = None  # delta: 合併（含加速）後的總增量
         self.on_rotary_press: Optional[Callable[[], None]] = None
         self.on_record_press: Optional[Callable[[], None]] = None
         self.on_record_release: Optional[Callable[[], None]] = None
         
         # 編碼器位置追蹤
         self.rotary_position = 0
-        self._last_rotary_value = 0
+        self._last_rotary_steps = 0
         
-        # 事件佇列（用於執行緒安全的事件處理）
-        self._event_queue = queue.Queue()
+        # 旋轉合併狀態（GPIO 執行緒寫入、事件循環取出）
+        self._rotary_lock = threading.Lock()
+        self._rotary_delta = 0         # 尚未送出的增量（含加速）
+        self._rotary_detents = 0       # 尚未送出的實際刻度數
+        self._rotary_posted = False    # 佇列中是否已有旋轉事件
+        self._last_detent_at = 0.0
+        self._detent_interval = float('inf')  # 刻度間隔的平滑值
+        
+        # 事件佇列：GPIO 執行緒以 call_soon_threadsafe 放入，run() await 取出
+        # 項目為 (優先序, 序號, 事件)，錄音按鈕事件優先，同優先序依到達順序
+        self._event_queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._event_seq = itertools.count()
         self._event_loop: Optional[asyncio.AbstractEventLoop] = None
         
+        # 每條通道最近一次的處理 Task
+        self._handlers: Dict[str, asyncio.Task] = {}
+        
+        # run() 開始處理事件時設定（模擬輸入在此之後才開始）
+        self.ready = asyncio.Event()
+        
         # 設定事件處理
         self._setup_events()
     
@@ -111,24 +160,72 @@ class Hardware:
         """
         self._event_loop = loop
     
+    def _post(self, event_type: str, callback: Callable, arg=None):
+        """把事件交給事件循環（在 GPIO 背景執行緒呼叫）
+        
+        事件循環尚未設定時（啟動前）事件直接丟棄。
+        """
+        if self._event_loop is None:
+            return
+        event = (event_type, callback, arg, time.perf_counter())
+        priority = 0 if event_type in PRIORITY_EVENTS else 1
+        self._event_loop.call_soon_threadsafe(
+            self._event_queue.put_nowait, (priority, next(self._event_seq), event)
+        )
+    
+    def _rotary_step(self, now: float) -> int:
+        """依刻度間隔計算加速倍數（每格計為幾格）
+        
+        刻度間隔以指數平均平滑，停頓超過 0.25 秒即重新計算。
+        """
+        interval = now - self._last_detent_at
+        self._last_detent_at = now
+        if interval > 0.25:
+            self._detent_interval = interval
+        else:
+            self._detent_interval = 0.5 * self._detent_interval + 0.5 * interval
+        threshold = config.Config.ROTARY_ACCEL_INTERVAL
+        if self._detent_interval >= threshold:
+            return 1
+        return min(config.Config.ROTARY_ACCEL_MAX, int(threshold / max(self._detent_interval, 1e-3)))
+    
     def _on_rotary_rotated(self):
         """處理旋轉編碼器旋轉事件
         
-        計算旋轉增量（delta），更新位置，並觸發回呼。
+        計算旋轉增量（delta），更新位置，累加到尚未送出的增量。
+        佇列中已有旋轉事件時不再放入新事件（合併），事件處理時才取出總增量。
         delta > 0: 順時針旋轉
         delta < 0: 逆時針旋轉
         
-        注意：此方法在背景執行緒中執行，需要透過佇列傳遞事件。
+        注意：此方法在背景執行緒中執行，需要透過事件循環傳遞事件。
         """
-        current_value = self.rotary_encoder.value
-        delta = int(current_value - self._last_rotary_value)
-        self._last_rotary_value = current_value
+        current_steps = self.rotary_encoder.steps
+        delta = current_steps - self._last_rotary_steps
+        self._last_rotary_steps = current_steps
         
         if delta != 0:
             self.rotary_position += delta
             if self.on_rotary_rotate:
-                # 將事件放入佇列（執行緒安全）
-                self._event_queue.put(('rotate', self.on_rotary_rotate, delta))
+                with self._rotary_lock:
+                    self._rotary_delta += delta * self._rotary_step(time.perf_counter())
+                    self._rotary_detents += abs(delta)
+                    post = not self._rotary_posted
+                    self._rotary_posted = True
+                if post:
+                    # 交給事件循環（執行緒安全）
+                    self._post('rotate', self.on_rotary_rotate)
+    
+    def _take_rotation(self) -> int:
+        """取出合併後的旋轉增量（在事件循環中呼叫）"""
+        with self._rotary_lock:
+            delta, detents = self._rotary_delta, self._rotary_detents
+            self._rotary_delta = 0
+            self._rotary_detents = 0
+            self._rotary_posted = False
+        metrics.incr('hw.rotary.detents', detents)
+        metrics.incr('hw.rotary.dispatched')
+        metrics.observe('hw.rotary.coalesced', detents)
+        return delta
     
     def _on_rotary_button_pressed(self):
         """處理編碼器按鈕按下事件
@@ -137,7 +234,7 @@ class Hardware:
         注意：此方法在背景執行緒中執行。
         """
         if self.on_rotary_press:
-            self._event_queue.put(('press', self.on_rotary_press, None))
+            self._post('press', self.on_rotary_press)
     
     def _on_record_button_pressed(self):
         """處理錄音按鈕按下事件（開始錄音）
@@ -146,7 +243,7 @@ class Hardware:
         注意：此方法在背景執行緒中執行。
         """
         if self.on_record_press:
-            self._event_queue.put(('record_press', self.on_record_press, None))
+            self._post('record_press', self.on_record_press)
     
     def _on_record_button_released(self):
         """處理錄音按鈕放開事件（停止錄音）
@@ -155,33 +252,71 @@ class Hardware:
         注意：此方法在背景執行緒中執行。
         """
         if self.on_record_release:
-            self._event_queue.put(('record_release', self.on_record_release, None))
+            self._post('record_release', self.on_record_release)
     
-    async def process_events(self):
-        """處理事件佇列中的事件（應在主事件循環中定期呼叫）
+    async def run(self):
+        """處理硬體事件（主程式 await 此方法，直到被取消）
         
-        此方法會從佇列中取出事件並執行回呼。
+        await 事件佇列，事件到達即依策略建立處理 Task；閒置時不佔用 CPU。
         """
-        while not self._event_queue.empty():
-            try:
-                event_type, callback, arg = self._event_queue.get_nowait()
-                
-                if event_type == 'rotate':
-                    # 旋轉事件，傳遞 delta 參數
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback(arg)
-                    else:
-                        callback(arg)
+        self.ready.set()
+        try:
+            while True:
+                _, _, (event_type, callback, arg, posted_at) = await self._event_queue.get()
+                metrics.observe('hw.input_latency', time.perf_counter() - posted_at)
+                metrics.incr(f'hw.events.{event_type}')
+                self._dispatch(event_type, callback, arg, posted_at)
+        finally:
+            for task in self._handlers.values():
+                task.cancel()
+    
+    def _dispatch(self, event_type: str, callback: Callable, arg, posted_at: float):
+        """依事件的處理策略建立處理 Task（與同一通道的前一次處理比較）"""
+        policy = config.Config.INPUT_POLICIES.get(event_type, SERIALIZE)
+        lane = config.Config.INPUT_LANES.get(event_type, event_type)
+        previous = self._handlers.get(lane)
+        busy = previous is not None and not previous.done()
+        if busy and policy == DROP_WHILE_BUSY:
+            metrics.incr(f'hw.dropped.{event_type}')
+            return
+        if busy and policy == LATEST_WINS:
+            metrics.incr(f'hw.superseded.{event_type}')
+            previous.cancel()
+        after = previous if busy and policy == SERIALIZE else None
+        self._handlers[lane] = asyncio.create_task(
+            self._handle(event_type, callback, arg, posted_at, after)
+        )
+    
+    async def _handle(self,
+                      event_type: str,
+                      callback: Callable,
+                      arg,
+                      posted_at: float,
+                      after: Optional[asyncio.Task]):
+        """執行處理函式（serialize 策略先等同一通道的前一次處理完成）"""
+        if after is not None:
+            await asyncio.wait({after})
+        if event_type == 'rotate':
+            # 開始處理時才取出增量：等待期間到達的刻度一併合併
+            arg = self._take_rotation()
+            if arg == 0:
+                return
+        metrics.observe(f'hw.handler_start.{event_type}', time.perf_counter() - posted_at)
+        try:
+            if event_type == 'rotate':
+                # 旋轉事件，傳遞合併後的 delta
+                if asyncio.iscoroutinefunction(callback):
+                    await callback(arg)
+                else:
+                    callback(arg)
+            else:
+                # 按鈕事件，無參數
+                if asyncio.iscoroutinefunction(callback):
+                    await callback()
                 else:
-                    # 按鈕事件，無參數
-                    if asyncio.iscoroutinefunction(callback):
-                        await callback()
-                    else:
-                        callback()
-            except queue.Empty:
-                break
-            except Exception as e:
-                print(f"處理事件時發生錯誤: {e}")
+                    callback()
+        except Exception as e:
+            print(f"處理事件時發生錯誤: {e}")
     
     def get_rotary_position(self) -> int:
         """取得旋轉編碼器當前位置
@@ -197,7 +332,7 @@ class Hardware:
         將位置計數器歸零，用於模式切換後的初始化。
         """
         self.rotary_position = 0
-        self._last_rotary_value = self.rotary_encoder.value
+        self._last_rotary_steps = self.rotary_encoder.steps
     
     def cleanup(self):
         """清理資源
@@ -259,9 +394,7 @@ if __name__ == '__main__':
         
         try:
             # 主循環：處理事件
-            while True:
-                await hw.process_events()
-                await asyncio.sleep(0.1)
+            await hw.run()
         except KeyboardInterrupt:
             print("\n結束測試")
             hw.cleanup()
@@ -0,0 +1,276 @@
+"""
+檔案標準 (Standard):
+本檔案實作模擬硬體的輸入重播 (InputSimulator)，不需要實體按鈕與編碼器：
+1. Hardware 以 gpiozero 的模擬腳位建立（HARDWARE_BACKEND=mock），本模組直接驅動腳位電位，
+   事件與實機一樣由 gpiozero 回呼進入 Hardware 的事件佇列
+2. 輸入腳本為時間軸：每行「<秒> <動作> [參數]」，動作有
+   press / release（錄音按鈕）、hold <秒>（按住後放開）、click（編碼器按鈕）、
+   rotate <格數> [間隔秒]（負數為逆時針）
+3. 監聽 DisplayRenderer 的每張畫面，計算每個輸入到下一張畫面的延遲（按鈕到回饋延遲）
+輸入：輸入腳本
+輸出：每個輸入的回饋畫面與延遲
+
+執行方式 (Execution):
+- 獨立測試：python -m modules.hardware_sim (以簡易選單重播內建腳本)
+- 整個系統：python -m modules.hardware_sim <腳本檔>
+  （以模擬硬體、bitmap 顯示、null 音訊與合成 AI / 語音後端執行 main.EchoMemo，
+  不需要音訊裝置、網路與 .env，資料庫寫入暫存目錄，可在 CI 執行）
+
+相依性 (Dependencies):
+- gpiozero: 模擬腳位
+- asyncio / threading: 輸入時間軸在背景執行緒播放（與實機 GPIO 回呼相同）
+- config: 系統配置（硬體與顯示後端）
+- modules.hardware: 被驅動的硬體介面
+- modules.metrics: 回饋延遲
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+import config
+from modules.metrics import metrics
+
+ACTIONS = ('press', 'release', 'hold', 'click', 'rotate')
+
+# 輸入步驟：(開始後秒數, 動作, 參數)
+Step = Tuple[float, str, tuple]
+
+DEMO_SCRIPT = """
+# 選單：轉兩格、確認，錄一段兩秒的音，再快速轉十格
+0.5 rotate 2 0.15
+1.2 click
+2.0 hold 2.0
+5.0 rotate 10 0.01
+"""
+
+
+def parse_script(text: str) -> List[Step]:
+    """
+    解析輸入腳本（hold 展開成 press 與 release）
+
+    Args:
+        text: 腳本文字，# 之後為註解
+
+    Returns:
+        依時間排序的步驟列表
+    """
+    steps = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split('#')[0].strip()
+        if not line:
+            continue
+        parts = line.split()
+        try:
+            at, action = float(parts[0]), parts[1]
+            args = tuple(float(arg) for arg in parts[2:])
+        except (IndexError, ValueError):
+            raise ValueError(f"第 {number} 行格式錯誤: {line}")
+        if action not in ACTIONS:
+            raise ValueError(f"第 {number} 行未知動作: {action}（可用: {', '.join(ACTIONS)}）")
+        if action == 'hold':
+            steps.append((at, 'press', ()))
+            steps.append((at + (args[0] if args else 1.0), 'release', ()))
+        else:
+            steps.append((at, action, args))
+    return sorted(steps, key=lambda step: step[0])
+
+
+class InputSimulator:
+    """以模擬腳位重播輸入腳本，量測按鈕到畫面回饋的延遲"""
+
+    def __init__(self, hw, renderer=None):
+        """
+        初始化模擬器
+
+        Args:
+            hw: 以模擬腳位建立的 modules.hardware.Hardware
+            renderer: DisplayRenderer，提供時量測回饋延遲
+        """
+        if not hasattr(hw.record_button.pin, 'drive_low'):
+            raise RuntimeError("輸入重播需要模擬腳位（HARDWARE_BACKEND=mock）")
+        self.hw = hw
+        self.frames: List[Tuple[float, str, tuple]] = []
+        if renderer is not None:
+            renderer.on_frame = self._on_frame
+
+    def _on_frame(self, method: str, args: tuple, at: float):
+        """記錄渲染完成的畫面"""
+        self.frames.append((at, method, args))
+
+    def _detent(self, clockwise: bool):
+        """模擬編碼器轉一格（A、B 兩相依序變化）"""
+        a, b = self.hw.rotary_encoder.a.pin, self.hw.rotary_encoder.b.pin
+        first, second = (a, b) if clockwise else (b, a)
+        first.drive_low()
+        second.drive_low()
+        first.drive_high()
+        second.drive_high()
+
+    def _drive(self, action: str, args: tuple):
+        """驅動腳位（在背景執行緒執行）"""
+        if action == 'press':
+            self.hw.record_button.pin.drive_low()
+        elif action == 'release':
+            self.hw.record_button.pin.drive_high()
+        elif action == 'click':
+            self.hw.rotary_button.pin.drive_low()
+            self.hw.rotary_button.pin.drive_high()
+        elif action == 'rotate':
+            count = int(args[0]) if args else 1
+            interval = args[1] if len(args) > 1 else 0.05
+            for i in range(abs(count)):
+                if i:
+                    time.sleep(interval)
+                self._detent(count > 0)
+
+    def _play(self, steps: List[Step]) -> List[Tuple[Step, float]]:
+        """依時間軸驅動腳位，返回每個步驟的實際輸入時間"""
+        start = time.perf_counter()
+        played = []
+        for step in steps:
+            delay = start + step[0] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            input_at = time.perf_counter()
+            self._drive(step[1], step[2])
+            played.append((step, input_at))
+        return played
+
+    async def play(self, steps: List[Step], settle: float = 1.0, ready_timeout: float = 30.0) -> List[Dict]:
+        """
+        重播腳本並計算回饋延遲
+
+        Args:
+            steps: parse_script() 的結果
+            settle: 最後一個輸入後等待畫面的秒數
+            ready_timeout: 等待 Hardware.run() 開始處理事件的秒數
+
+        Returns:
+            每個步驟的結果：{'at', 'action', 'args', 'feedback', 'latency'}，
+            feedback 為輸入後（下一個輸入前）的第一張畫面，沒有畫面時 latency 為 None
+        """
+        await asyncio.wait_for(self.hw.ready.wait(), ready_timeout)
+        played = await asyncio.to_thread(self._play, steps)
+        await asyncio.sleep(settle)
+
+        results = []
+        for i, ((at, action, args), input_at) in enumerate(played):
+            until = played[i + 1][1] if i + 1 < len(played) else float('inf')
+            frame = next((f for f in self.frames if input_at < f[0] < until), None)
+            latency = frame[0] - input_at if frame else None
+            if latency is not None:
+                metrics.observe(f'sim.feedback_latency.{action}', latency)
+            results.append({
+                'at': at,
+                'action': action,
+                'args': args,
+                'feedback': frame[1] if frame else None,
+                'latency': latency,
+            })
+        return results
+
+
+def print_report(results: List[Dict]):
+    """列印每個輸入的回饋延遲"""
+    for r in results:
+        args = ' '.join(f'{arg:g}' for arg in r['args'])
+        latency = f"{r['latency'] * 1000:7.1f} ms" if r['latency'] is not None else '   無回饋'
+        print(f"  {r['at']:6.2f}s {r['action']:<8}{args:<10}{latency}  {r['feedback'] or ''}")
+    latencies = sorted(r['latency'] for r in results if r['latency'] is not None)
+    if latencies:
+        print(f"  回饋延遲: p50 {latencies[len(latencies) // 2] * 1000:.1f} ms，"
+              f"最大 {latencies[-1] * 1000:.1f} ms（{len(latencies)}/{len(results)} 個輸入有回饋）")
+
+
+async def run_demo(steps: List[Step]) -> List[Dict]:
+    """以簡易選單（模式切換、錄音狀態）重播腳本"""
+    from modules.display import Display
+    from modules.display_backend import BitmapSink
+    from modules.display_renderer import DisplayRenderer
+    from modules.hardware import Hardware
+    from gpiozero.pins.mock import MockFactory
+
+    hw = Hardware(pin_factory=MockFactory())
+    hw.set_event_loop(asyncio.get_running_loop())
+    renderer = DisplayRenderer(Display(BitmapSink()))
+    renderer.start()
+    modes = [config.Config.MODE_DAILY, config.Config.MODE_CHAT,
+             config.Config.MODE_DIARY, config.Config.MODE_REMINDER]
+    state = {'index': 0}
+
+    def on_rotate(delta):
+        state['index'] = (state['index'] + delta) % len(modes)
+        renderer.show_mode(modes[state['index']], "按鈕確認")
+
+    async def on_confirm():
+        renderer.show_mode(modes[state['index']], "已選擇")
+
+    hw.on_rotary_rotate = on_rotate
+    hw.on_rotary_press = on_confirm
+    hw.on_record_press = lambda: renderer.show_text("錄音中...", 0, 0)
+    hw.on_record_release = lambda: renderer.show_text("處理中...", 0, 0)
+
+    simulator = InputSimulator(hw, renderer)
+    task = asyncio.create_task(hw.run())
+    try:
+        return await simulator.play(steps)
+    finally:
+        task.cancel()
+        await renderer.close()
+        hw.cleanup()
+
+
+def use_headless_backends(data_dir: str = None) -> str:
+    """
+    切換到不需硬體、音訊裝置與網路的後端（需在匯入 main 之前呼叫）
+
+    Args:
+        data_dir: 資料庫、快取與指標檔目錄，預設建立暫存目錄
+
+    Returns:
+        資料目錄
+    """
+    data_dir = data_dir or tempfile.mkdtemp(prefix='echomemo-sim-')
+    config.Config.HARDWARE_BACKEND = 'mock'
+    config.Config.DISPLAY_BACKEND = 'bitmap'
+    config.Config.AUDIO_BACKEND = 'null'
+    config.Config.LLM_BACKEND = 'synthetic'
+    config.Config.TTS_BACKEND = 'synthetic'
+    config.Config.WARMUP_ENABLED = False
+    config.Config.DB_PATH = os.path.join(data_dir, 'memories.db')
+    config.Config.METRICS_DB_PATH = os.path.join(data_dir, 'metrics.db')
+    config.Config.TTS_CACHE_DIR = os.path.join(data_dir, 'tts_cache')
+    config.Config.SOUND_CACHE_DIR = os.path.join(data_dir, 'sound_cache')
+    return data_dir
+
+
+async def run_system(steps: List[Step], settle: float = 5.0) -> List[Dict]:
+    """以模擬硬體、bitmap 顯示、null 音訊與合成 AI / 語音後端執行整個系統並重播腳本"""
+    use_headless_backends()
+    from main import EchoMemo
+
+    system = EchoMemo()
+    simulator = InputSimulator(system.hw, system.display)
+    task = asyncio.create_task(system.run())
+    try:
+        return await simulator.play(steps, settle=settle)
+    finally:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding='utf-8') as f:
+            script = parse_script(f.read())
+        print(f"模擬硬體重播（整個系統）: {sys.argv[1]}")
+        print_report(asyncio.run(run_system(script)))
+    else:
+        print("模擬硬體重播（簡易選單）")
+        print_report(asyncio.run(run_demo(parse_script(DEMO_SCRIPT))))
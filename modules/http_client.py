@@ -0,0 +1,212 @@
+"""
+檔案標準 (Standard):
+本檔案實作共用的非同步 HTTP 客戶端 (HttpClient)，包裝 httpx.AsyncClient：
+1. 保持連線 (keep-alive) 的連線池，重用 TCP/TLS 連線
+2. 有安裝 h2 時啟用 HTTP/2
+3. 以 Semaphore 限制同時進行的請求數（串流回應在關閉前都佔用名額）
+4. 以 httpx 的 trace 擴充記錄每個請求的連線、TTFB 與本文傳輸時間
+輸入：HTTP 方法、URL、請求參數、端點名稱（作為指標標籤）
+輸出：httpx.Response
+
+指標：
+- http.<端點>.connect: 建立新連線（TCP + TLS）的時間，重用連線時不記錄
+- http.<端點>.ttfb: 送出請求標頭到收到回應標頭的時間
+- http.<端點>.body: 收到回應標頭到本文讀完的時間
+- http.<端點>.new_connection / http.<端點>.reused: 新建與重用連線次數
+
+執行方式 (Execution):
+- 被 modules.audio 用於語音克隆 API（上傳、合成、下載）
+- 獨立測試：python -m modules.http_client (對本機測試伺服器連續請求)
+
+相依性 (Dependencies):
+- httpx: 非同步 HTTP 客戶端
+- h2 (選用): HTTP/2 支援
+- config: 系統配置（連線池大小、並行上限）
+- modules.metrics: 請求時間分解
+"""
+
+import asyncio
+import importlib.util
+import time
+from typing import Dict, Optional
+import httpx
+import config
+from modules.metrics import metrics
+
+# 有安裝 h2 才能啟用 HTTP/2
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+
+class HttpClient:
+    """共用的非同步 HTTP 客戶端"""
+
+    def __init__(self,
+                 max_connections: int = None,
+                 max_keepalive: int = None,
+                 keepalive_expiry: float = None,
+                 max_concurrency: int = None):
+        """
+        初始化客戶端
+
+        httpx.AsyncClient 建立時要載入 SSL 憑證（約 0.1 秒以上），在啟動時建立，
+        避免第一個請求承擔這段時間。
+
+        Args:
+            max_connections: 連線池上限，預設使用 config.HTTP_MAX_CONNECTIONS
+            max_keepalive: 保持的閒置連線數，預設使用 config.HTTP_MAX_KEEPALIVE
+            keepalive_expiry: 閒置連線保留秒數，預設使用 config.HTTP_KEEPALIVE_EXPIRY
+            max_concurrency: 同時進行的請求上限，預設使用 config.HTTP_MAX_CONCURRENCY
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections or config.Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive or config.Config.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=keepalive_expiry or config.Config.HTTP_KEEPALIVE_EXPIRY
+        )
+        self.http2 = HTTP2_AVAILABLE
+        self._semaphore = asyncio.Semaphore(max_concurrency or config.Config.HTTP_MAX_CONCURRENCY)
+        self.client = httpx.AsyncClient(http2=self.http2, limits=self.limits)
+        # 尚未關閉的回應 -> (端點名稱, trace 時間戳)
+        self._open: Dict[httpx.Response, tuple] = {}
+
+    async def open(self, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        送出請求，收到回應標頭後即返回（本文尚未讀取）
+
+        非 2xx 回應會先讀完本文（錯誤訊息通常很短），呼叫端可直接使用 response.text。
+        返回的回應必須以 close() 關閉，才會釋放並行名額。
+
+        Args:
+            endpoint: 端點名稱（指標標籤）
+            method: HTTP 方法
+            url: URL
+            **kwargs: 傳給 httpx.AsyncClient.build_request 的參數（data、files、timeout 等）
+
+        Returns:
+            串流模式的 httpx.Response
+        """
+        marks: Dict[str, float] = {}
+
+        async def trace(event_name, info):
+            marks[event_name] = time.perf_counter()
+
+        await self._semaphore.acquire()
+        try:
+            request = self.client.build_request(
+                method, url, extensions={'trace': trace}, **kwargs
+            )
+            response = await self.client.send(request, stream=True)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        self._open[response] = (endpoint, marks)
+        self._record_headers(endpoint, marks)
+        if not response.is_success:
+            try:
+                await response.aread()
+            except BaseException:
+                await self.close(response)
+                raise
+        return response
+
+    async def close(self, response: httpx.Response):
+        """關閉 open() 返回的回應，記錄本文傳輸時間並釋放並行名額（重複呼叫無作用）"""
+        entry = self._open.pop(response, None)
+        try:
+            await response.aclose()
+        finally:
+            if entry is not None:
+                endpoint, marks = entry
+                headers_done = self._mark(marks, 'receive_response_headers.complete')
+                if headers_done is not None and response.is_success:
+                    metrics.observe(f'http.{endpoint}.body', time.perf_counter() - headers_done)
+                self._semaphore.release()
+
+    async def request(self, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        送出請求並讀完本文
+
+        Args:
+            endpoint: 端點名稱（指標標籤）
+            method: HTTP 方法
+            url: URL
+            **kwargs: 傳給 httpx.AsyncClient.build_request 的參數
+
+        Returns:
+            本文已讀取的 httpx.Response
+        """
+        response = await self.open(endpoint, method, url, **kwargs)
+        try:
+            await response.aread()
+        finally:
+            await self.close(response)
+        return response
+
+    @staticmethod
+    def _mark(marks: Dict[str, float], suffix: str) -> Optional[float]:
+        """取得 trace 事件時間（HTTP/1.1 與 HTTP/2 的事件前綴不同）"""
+        for name, value in marks.items():
+            if name.endswith(suffix):
+                return value
+        return None
+
+    def _record_headers(self, endpoint: str, marks: Dict[str, float]):
+        """由 trace 時間戳計算連線與 TTFB 時間"""
+        connect_start = marks.get('connection.connect_tcp.started')
+        if connect_start is not None:
+            connect_end = (marks.get('connection.start_tls.complete')
+                           or marks.get('connection.connect_tcp.complete'))
+            if connect_end is not None:
+                metrics.observe(f'http.{endpoint}.connect', connect_end - connect_start)
+            metrics.incr(f'http.{endpoint}.new_connection')
+        else:
+            metrics.incr(f'http.{endpoint}.reused')
+
+        sent = self._mark(marks, 'send_request_headers.started')
+        received = self._mark(marks, 'receive_response_headers.complete')
+        if sent is not None and received is not None:
+            metrics.observe(f'http.{endpoint}.ttfb', received - sent)
+
+    async def aclose(self):
+        """關閉所有未關閉的回應與連線池"""
+        for response in list(self._open):
+            await self.close(response)
+        await self.client.aclose()
+
+
+if __name__ == '__main__':
+    # 對本機測試伺服器連續請求，確認連線重用與時間分解
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    print(f"HTTP 客戶端測試（HTTP/2: {HTTP2_AVAILABLE}）")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            body = b'x' * 65536
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    async def test():
+        http = HttpClient()
+        url = f'http://127.0.0.1:{server.server_port}/'
+        for _ in range(5):
+            await http.request('test', 'GET', url)
+        await asyncio.gather(*(http.request('test', 'GET', url) for _ in range(10)))
+        await http.aclose()
+        print(f"  新連線 {metrics.count('http.test.new_connection')} 次，"
+              f"重用 {metrics.count('http.test.reused')} 次")
+        for part in ('connect', 'ttfb', 'body'):
+            print(f"  {part}: {metrics.summary(f'http.test.{part}')}")
+
+    asyncio.run(test())
+    server.shutdown()
@@ -0,0 +1,584 @@
+"""
+檔案標準 (Standard):
+本檔案提供輕量的行程內指標收集：計數器 (counter) 與數值觀測 (observation)。
+觀測值保留最近 N 筆（滾動視窗），可查詢百分位數 (p50 / p95 / p99)。
+另提供回合階段計時：
+- span(name)：計時一段程式（同步或非同步程式碼皆可），記錄為 span.<name>
+- turn(kind)：一次互動回合（例如錄音放開到回應播完），回合內所有 span 的耗時依階段加總，
+  回合結束時記錄為 turn.<kind>.<階段>，並交給單一寫入執行緒寫入本地 SQLite 指標檔（TurnStore），
+  事件循環中不做磁碟 I/O
+- note(name, value)：回合內的非耗時數值（例如上傳位元組數），與回合一起寫入，不計入階段
+- dump() / flush()：所有計數器與觀測摘要（重試、HTTP 計時、播放延遲等回合以外的指標）的快照，
+  由同一個寫入執行緒寫入指標檔；run_snapshots() 定期寫入
+回合以 contextvars 傳遞，回合內建立的 Task 與 asyncio.to_thread 的執行緒都會計入同一回合。
+輸入：指標名稱與數值（可從任何執行緒呼叫）
+輸出：計數、百分位數、快照字典、回合延遲分解
+
+執行方式 (Execution):
+- 被各模組匯入模組層級的 metrics 實例使用
+- 獨立測試：python -m modules.metrics
+- 延遲分解與最近的快照：python -m modules.metrics report [回合種類]
+
+相依性 (Dependencies):
+- threading / queue: 執行緒安全（GPIO 與音訊回呼在背景執行緒）、指標檔寫入執行緒
+- collections: 計數器與滾動視窗
+- contextvars: 目前回合
+- sqlite3: 回合階段耗時與快照的持久化
+- asyncio: 定期寫入快照
+- config: 系統配置（滾動視窗大小、指標檔路徑、快照間隔）
+"""
+
+import asyncio
+import contextvars
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+import config
+
+
+class Turn:
+    """一次互動回合的階段耗時（各階段加總，可從多個 Task / 執行緒加入）"""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started_at = time.perf_counter()
+        self.timestamp = datetime.now().isoformat()
+        self.total: Optional[float] = None
+        self.stages: Dict[str, float] = defaultdict(float)
+        self.values: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float):
+        """加入一段階段耗時"""
+        with self._lock:
+            self.stages[stage] += seconds
+
+    def note(self, name: str, value: float):
+        """加入一筆數值"""
+        with self._lock:
+            self.values.append((name, value))
+
+    def snapshot(self) -> List[tuple]:
+        """目前各階段耗時 [(階段, 秒數), ...]"""
+        with self._lock:
+            return list(self.stages.items())
+
+    def noted(self) -> List[tuple]:
+        """目前的數值 [(名稱, 數值), ...]"""
+        with self._lock:
+            return list(self.values)
+
+
+class TurnStore:
+    """回合階段耗時的 SQLite 儲存（與記憶資料庫分開的指標檔）"""
+
+    def __init__(self, path: str, max_turns: int = None):
+        """
+        初始化儲存
+
+        Args:
+            path: SQLite 檔案路徑
+            max_turns: 保留的回合數上限，預設使用 config.METRICS_DB_MAX_TURNS
+        """
+        self.path = path
+        self.max_turns = max_turns or config.Config.METRICS_DB_MAX_TURNS
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS turns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    total REAL NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS turn_stages (
+                    turn_id INTEGER NOT NULL,
+                    stage TEXT NOT NULL,
+                    seconds REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_turn_stages_turn ON turn_stages(turn_id)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS turn_values (
+                    turn_id INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    value REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_turn_values_turn ON turn_values(turn_id)')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    uptime REAL NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS snapshot_counters (
+                    snapshot_id INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    value INTEGER NOT NULL
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS snapshot_observations (
+                    snapshot_id INTEGER NOT NULL,
+                    name TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    mean REAL,
+                    p50 REAL,
+                    p95 REAL,
+                    p99 REAL
+                )
+            ''')
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0)
+
+    def record(self, turn: Turn):
+        """寫入一個回合，並刪除超過保留上限的舊回合"""
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                'INSERT INTO turns (kind, total, timestamp) VALUES (?, ?, ?)',
+                (turn.kind, turn.total, turn.timestamp)
+            )
+            turn_id = cursor.lastrowid
+            conn.executemany(
+                'INSERT INTO turn_stages (turn_id, stage, seconds) VALUES (?, ?, ?)',
+                [(turn_id, stage, seconds) for stage, seconds in turn.snapshot()]
+            )
+            conn.executemany(
+                'INSERT INTO turn_values (turn_id, name, value) VALUES (?, ?, ?)',
+                [(turn_id, name, value) for name, value in turn.noted()]
+            )
+            oldest = turn_id - self.max_turns
+            if oldest > 0:
+                conn.execute('DELETE FROM turn_stages WHERE turn_id <= ?', (oldest,))
+                conn.execute('DELETE FROM turn_values WHERE turn_id <= ?', (oldest,))
+                conn.execute('DELETE FROM turns WHERE id <= ?', (oldest,))
+
+    def record_snapshot(self, snapshot: Dict, uptime: float, timestamp: str):
+        """寫入一份計數器與觀測摘要的快照，並刪除超過保留上限的舊快照"""
+        with self._lock, self._connect() as conn:
+            cursor = conn.execute(
+                'INSERT INTO snapshots (uptime, timestamp) VALUES (?, ?)',
+                (uptime, timestamp)
+            )
+            snapshot_id = cursor.lastrowid
+            conn.executemany(
+                'INSERT INTO snapshot_counters (snapshot_id, name, value) VALUES (?, ?, ?)',
+                [(snapshot_id, name, value) for name, value in snapshot['counters'].items()]
+            )
+            conn.executemany(
+                'INSERT INTO snapshot_observations (snapshot_id, name, count, mean, p50, p95, p99) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(snapshot_id, name, s['count'], s.get('mean'), s.get('p50'), s.get('p95'), s.get('p99'))
+                 for name, s in snapshot['observations'].items()]
+            )
+            oldest = snapshot_id - config.Config.METRICS_DB_MAX_SNAPSHOTS
+            if oldest > 0:
+                conn.execute('DELETE FROM snapshot_counters WHERE snapshot_id <= ?', (oldest,))
+                conn.execute('DELETE FROM snapshot_observations WHERE snapshot_id <= ?', (oldest,))
+                conn.execute('DELETE FROM snapshots WHERE id <= ?', (oldest,))
+
+    def latest_snapshot(self) -> Optional[Dict]:
+        """
+        最近一份快照
+
+        Returns:
+            {'uptime', 'timestamp', 'counters': {...}, 'observations': {名稱: 摘要}}，沒有快照時為 None
+        """
+        with self._connect() as conn:
+            row = conn.execute('SELECT id, uptime, timestamp FROM snapshots ORDER BY id DESC LIMIT 1').fetchone()
+            if row is None:
+                return None
+            snapshot_id, uptime, timestamp = row
+            counters = dict(conn.execute(
+                'SELECT name, value FROM snapshot_counters WHERE snapshot_id = ?', (snapshot_id,)
+            ))
+            observations = {
+                name: {'count': count, 'mean': mean, 'p50': p50, 'p95': p95, 'p99': p99}
+                for name, count, mean, p50, p95, p99 in conn.execute(
+                    'SELECT name, count, mean, p50, p95, p99 FROM snapshot_observations '
+                    'WHERE snapshot_id = ? AND count > 0', (snapshot_id,)
+                )
+            }
+        return {'uptime': uptime, 'timestamp': timestamp, 'counters': counters, 'observations': observations}
+
+    def breakdown(self, kind: str, last: int = None) -> Dict:
+        """
+        最近回合的延遲分解
+
+        Args:
+            kind: 回合種類
+            last: 最近幾個回合，預設使用 config.METRICS_WINDOW
+
+        Returns:
+            {'turns': 回合數, 'total': 摘要, 'stages': {階段: 摘要}, 'values': {名稱: 摘要}}，
+            摘要含 count / mean / p50 / p95 / p99
+        """
+        last = last or config.Config.METRICS_WINDOW
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT id, total FROM turns WHERE kind = ? ORDER BY id DESC LIMIT ?',
+                (kind, last)
+            ).fetchall()
+            if not rows:
+                return {'turns': 0, 'total': summarize([]), 'stages': {}, 'values': {}}
+            stages = defaultdict(list)
+            for stage, seconds in conn.execute(
+                'SELECT stage, seconds FROM turn_stages WHERE turn_id >= ? AND turn_id IN '
+                '(SELECT id FROM turns WHERE kind = ?)',
+                (rows[-1][0], kind)
+            ):
+                stages[stage].append(seconds)
+            noted = defaultdict(list)
+            for name, value in conn.execute(
+                'SELECT name, value FROM turn_values WHERE turn_id >= ? AND turn_id IN '
+                '(SELECT id FROM turns WHERE kind = ?)',
+                (rows[-1][0], kind)
+            ):
+                noted[name].append(value)
+        return {
+            'turns': len(rows),
+            'total': summarize([total for _, total in rows]),
+            'stages': {stage: summarize(values) for stage, values in stages.items()},
+            'values': {name: summarize(values) for name, values in noted.items()},
+        }
+
+    def kinds(self) -> List[str]:
+        """已記錄的回合種類"""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute('SELECT DISTINCT kind FROM turns ORDER BY kind')]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    已排序數列的百分位數（最近秩）
+
+    Args:
+        values: 已排序的數值
+        q: 百分位 (0-100)
+    """
+    if not values:
+        return None
+    index = min(len(values) - 1, int(round(q / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(values: List[float]) -> Dict:
+    """數值摘要：{'count', 'mean', 'p50', 'p95', 'p99'}（無數值時只有 count）"""
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+    return {
+        'count': len(ordered),
+        'mean': sum(ordered) / len(ordered),
+        'p50': percentile(ordered, 50),
+        'p95': percentile(ordered, 95),
+        'p99': percentile(ordered, 99),
+    }
+
+
+class Metrics:
+    """指標收集類別"""
+
+    def __init__(self, window: int = None):
+        """
+        初始化指標收集
+
+        Args:
+            window: 每個觀測指標保留的樣本數，預設使用 config.METRICS_WINDOW
+        """
+        self.window = window or config.Config.METRICS_WINDOW
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._samples: Dict[str, deque] = {}
+        self._turn: contextvars.ContextVar = contextvars.ContextVar('metrics_turn', default=None)
+        self._store: Optional[TurnStore] = None
+        self._writes: Optional[queue.Queue] = None
+
+    def incr(self, name: str, n: int = 1):
+        """
+        計數器加一（或加 n）
+
+        Args:
+            name: 指標名稱
+            n: 增量
+        """
+        with self._lock:
+            self._counters[name] += n
+
+    def observe(self, name: str, value: float):
+        """
+        記錄一筆觀測值（例如延遲秒數、位元組數）
+
+        Args:
+            name: 指標名稱
+            value: 觀測值
+        """
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(value)
+
+    def count(self, name: str) -> int:
+        """取得計數器數值"""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def samples(self, name: str) -> list:
+        """取得觀測值樣本（複本）"""
+        with self._lock:
+            return list(self._samples.get(name, ()))
+
+    def percentile(self, name: str, q: float) -> Optional[float]:
+        """
+        計算觀測值百分位數
+
+        Args:
+            name: 指標名稱
+            q: 百分位 (0-100)
+
+        Returns:
+            百分位數值，無樣本時返回 None
+        """
+        return percentile(sorted(self.samples(name)), q)
+
+    def summary(self, name: str) -> Dict:
+        """
+        取得觀測指標摘要
+
+        Returns:
+            {'count', 'mean', 'p50', 'p95', 'p99'}
+        """
+        return summarize(self.samples(name))
+
+    def snapshot(self) -> Dict:
+        """
+        取得所有指標快照
+
+        Returns:
+            {'counters': {...}, 'observations': {名稱: 摘要}}
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            names = list(self._samples.keys())
+        return {
+            'counters': counters,
+            'observations': {name: self.summary(name) for name in names},
+        }
+
+    def stage(self, name: str, seconds: float):
+        """
+        記錄一段已量測的階段耗時（計入目前回合）
+
+        Args:
+            name: 階段名稱
+            seconds: 耗時秒數
+        """
+        self.observe(f'span.{name}', seconds)
+        turn = self._turn.get()
+        if turn is not None:
+            turn.add(name, seconds)
+
+    def note(self, name: str, value: float):
+        """
+        記錄一筆非耗時的觀測值，並附加到目前回合（寫入指標檔，不計入階段）
+
+        Args:
+            name: 指標名稱（例如 stt.upload_bytes.flac）
+            value: 觀測值
+        """
+        self.observe(name, value)
+        turn = self._turn.get()
+        if turn is not None:
+            turn.note(name, value)
+
+    @contextmanager
+    def span(self, name: str):
+        """
+        計時一段程式，結束（含例外）時記錄為階段耗時
+
+        用法：with metrics.span('stt'): ...
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage(name, time.perf_counter() - start)
+
+    @contextmanager
+    def turn(self, kind: str):
+        """
+        一次互動回合：回合內的 span 依階段加總，結束時記錄並寫入指標檔
+
+        已在回合中時不建立新回合（外層回合涵蓋內層）。
+
+        Args:
+            kind: 回合種類（例如模式名稱）
+        """
+        if self._turn.get() is not None:
+            yield self._turn.get()
+            return
+        turn = Turn(kind)
+        token = self._turn.set(turn)
+        try:
+            yield turn
+        finally:
+            self._turn.reset(token)
+            turn.total = time.perf_counter() - turn.started_at
+            self.observe(f'turn.{kind}.total', turn.total)
+            for stage, seconds in turn.snapshot():
+                self.observe(f'turn.{kind}.{stage}', seconds)
+            self._persist(turn)
+
+    def _persist(self, item):
+        """交給寫入執行緒寫入指標檔（回合或快照；未設定路徑時略過，不阻塞呼叫端）"""
+        path = config.Config.METRICS_DB_PATH
+        if not path:
+            return
+        with self._lock:
+            if self._writes is None:
+                self._writes = queue.Queue()
+                threading.Thread(target=self._write_loop, name='metrics-writer', daemon=True).start()
+        self._writes.put((path, item))
+
+    def _write_loop(self):
+        """寫入執行緒：依序寫入回合與快照（寫入失敗不影響呼叫端）"""
+        while True:
+            path, item = self._writes.get()
+            try:
+                if self._store is None or self._store.path != path:
+                    self._store = TurnStore(path)
+                if isinstance(item, Turn):
+                    self._store.record(item)
+                else:
+                    self._store.record_snapshot(*item)
+            except Exception as e:
+                print(f"寫入指標檔失敗: {e}")
+            finally:
+                self._writes.task_done()
+
+    def dump(self):
+        """把目前所有計數器與觀測摘要的快照交給寫入執行緒寫入指標檔（不阻塞）"""
+        self._persist((self.snapshot(), time.perf_counter() - self.started_at, datetime.now().isoformat()))
+
+    async def run_snapshots(self, interval: float = None):
+        """
+        定期寫入快照（背景 Task，取消即停止）
+
+        Args:
+            interval: 間隔秒數，預設使用 config.METRICS_SNAPSHOT_INTERVAL
+        """
+        interval = interval or config.Config.METRICS_SNAPSHOT_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            self.dump()
+
+    def flush(self):
+        """寫入最後一份快照，並等待已結束的回合與快照寫入指標檔（會阻塞，程式結束前呼叫）"""
+        self.dump()
+        if self._writes is not None:
+            self._writes.join()
+
+
+def print_breakdown(store: TurnStore, kind: str):
+    """列印一種回合的延遲分解（階段可能並行，加總可大於回合總時間）"""
+    report = store.breakdown(kind)
+    total = report['total']
+    if not report['turns'] or not total['mean']:
+        print(f"  {kind}: 沒有記錄")
+        return
+    print(f"{kind} 回合延遲分解（最近 {report['turns']} 回合，單位 ms）")
+    print(f"  {'階段':<28}{'次數':>6}{'平均':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'佔回合':>8}")
+
+    def row(name, summary):
+        share = summary['mean'] * summary['count'] / (total['mean'] * total['count'])
+        print(f"  {name:<28}{summary['count']:>6}{summary['mean'] * 1000:>9.0f}{summary['p50'] * 1000:>9.0f}"
+              f"{summary['p95'] * 1000:>9.0f}{summary['p99'] * 1000:>9.0f}{share:>8.0%}")
+
+    row('(回合總時間)', total)
+    for name, summary in sorted(report['stages'].items(), key=lambda item: -item[1]['mean']):
+        row(name, summary)
+
+    if report['values']:
+        print(f"  {'數值':<28}{'次數':>6}{'平均':>12}{'p50':>12}{'p95':>12}{'p99':>12}")
+        for name, summary in sorted(report['values'].items()):
+            print(f"  {name:<28}{summary['count']:>6}" + ''.join(
+                f"{format_value(summary[key]):>12}" for key in ('mean', 'p50', 'p95', 'p99')
+            ))
+
+
+def print_snapshot(store: TurnStore):
+    """列印最近一份快照：計數器與回合以外的觀測摘要（階段與回合耗時見延遲分解）"""
+    snapshot = store.latest_snapshot()
+    if snapshot is None:
+        print("行程指標: 沒有快照")
+        return
+    per_turn = tuple(f'turn.{kind}.' for kind in store.kinds())
+    print(f"行程指標（{snapshot['timestamp'][:19]}，運行 {snapshot['uptime']:.0f}s）")
+    if snapshot['counters']:
+        print(f"  {'計數器':<40}{'數值':>12}")
+        for name, value in sorted(snapshot['counters'].items()):
+            print(f"  {name:<40}{value:>12}")
+    detents = snapshot['counters'].get('hw.rotary.detents', 0)
+    dispatched = snapshot['counters'].get('hw.rotary.dispatched', 0)
+    if dispatched:
+        # 旋轉刻度合併的效果：實際刻度與送出事件的速率
+        uptime = max(snapshot['uptime'], 1e-9)
+        print(f"  旋鈕: 每秒 {detents / uptime:.2f} 刻度，送出 {dispatched / uptime:.2f} 次事件"
+              f"（平均每次 {detents / dispatched:.1f} 格）")
+    observations = {
+        name: summary for name, summary in snapshot['observations'].items()
+        if not name.startswith('span.') and not name.startswith(per_turn)
+    }
+    if observations:
+        print(f"  {'觀測（最近樣本）':<40}{'次數':>6}{'平均':>12}{'p50':>12}{'p95':>12}{'p99':>12}")
+        for name, summary in sorted(observations.items()):
+            print(f"  {name:<40}{summary['count']:>6}" + ''.join(
+                f"{format_value(summary[key]):>12}" for key in ('mean', 'p50', 'p95', 'p99')
+            ))
+
+
+def format_value(value: float) -> str:
+    """數值欄位：大數值（位元組數）取整數加千分位，小數值（秒數）取三位小數"""
+    return f"{value:,.0f}" if abs(value) >= 100 else f"{value:.3f}"
+
+
+# 全域指標實例
+metrics = Metrics()
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] == 'report':
+        # 延遲分解：python -m modules.metrics report [回合種類]
+        if not os.path.exists(config.Config.METRICS_DB_PATH):
+            print(f"指標檔不存在: {config.Config.METRICS_DB_PATH}")
+            sys.exit(1)
+        store = TurnStore(config.Config.METRICS_DB_PATH)
+        for kind in sys.argv[2:] or store.kinds():
+            print_breakdown(store, kind)
+        if len(sys.argv) == 2:
+            print_snapshot(store)
+        sys.exit(0)
+
+    # 測試指標收集
+    print("指標收集測試")
+    for i in range(100):
+        metrics.observe('test.latency', i / 100.0)
+    metrics.incr('test.calls', 100)
+    print(f"計數: {metrics.count('test.calls')}")
+    print(f"摘要: {metrics.summary('test.latency')}")
@@ -0,0 +1,334 @@
+"""
+檔案標準 (Standard):
+本檔案實作非同步播放引擎 (PlaybackEngine)：
+1. 整個程式只開啟一個輸出串流，不再為每個音效重新開啟輸出裝置
+2. 片段經由 asyncio.Queue 送入，由輸出回呼依序取出播放，前後片段之間無縫接續
+3. cancel() 立即清空佇列與目前片段（錄音按鈕按下時打斷播放 barge-in）
+4. 記錄從排入佇列到第一個樣本送出的延遲
+5. open_stream() 提供串流片段：資料邊下載邊寫入，已到達的部分立即播放
+輸入：PCM 音訊資料 (NumPy) 與取樣率
+輸出：音訊輸出、播放完成通知
+
+執行方式 (Execution):
+- 被 modules.audio 使用（play_audio / play_system_sound / TTS 播放）
+- 獨立測試：python -m modules.playback (需要音訊輸出裝置)
+
+相依性 (Dependencies):
+- modules.audio_backend: 輸出串流（sounddevice 或 null 後端）
+- numpy: 重取樣與混音緩衝
+- asyncio: 佇列與完成通知
+- config: 系統配置（輸出取樣率、區塊大小）
+- modules.metrics: 佇列到第一個樣本的延遲
+"""
+
+import asyncio
+import collections
+import time
+from typing import Optional, Tuple
+import numpy as np
+import config
+from modules.audio_backend import create_output_stream
+from modules.metrics import metrics
+
+
+def resample(data: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """
+    轉成單聲道 float32 並以線性內插重取樣
+
+    Args:
+        data: 音訊資料（一維或 (幀數, 聲道數)）
+        src_rate: 原始取樣率
+        dst_rate: 目標取樣率
+
+    Returns:
+        單聲道 float32 音訊資料
+    """
+    data = np.asarray(data, dtype=np.float32)
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if src_rate == dst_rate or len(data) == 0:
+        return data
+    length = int(round(len(data) * dst_rate / src_rate))
+    positions = np.linspace(0, len(data) - 1, num=length)
+    return np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+
+
+class Clip:
+    """播放片段（串流片段的資料會陸續追加到 chunks）"""
+
+    def __init__(self, data: np.ndarray, future: asyncio.Future, finished: bool = True, tag=None):
+        self.data = data
+        self.tag = tag
+        self.position = 0
+        self.played = 0          # 整個片段已播放的樣本數（串流片段跨資料區段累計）
+        self.length = len(data)  # 整個片段的樣本數（串流片段為目前已寫入的樣本數）
+        self.chunks = collections.deque()
+        self.finished = finished
+        self.future = future
+        self.enqueued_at = time.perf_counter()
+        self.started = False
+        self.starved = False
+
+    def next_chunk(self) -> bool:
+        """切換到下一個已到達的資料區段，沒有則返回 False"""
+        if not self.chunks:
+            return False
+        self.data = self.chunks.popleft()
+        self.position = 0
+        return True
+
+
+class PlaybackStream:
+    """串流播放控制代碼：write() 陸續寫入 PCM，寫完後呼叫 finish()"""
+
+    def __init__(self, clip: Clip, sample_rate: int, output_rate: int):
+        self.clip = clip
+        self.sample_rate = sample_rate
+        self.output_rate = output_rate
+
+    def write(self, data: np.ndarray) -> bool:
+        """
+        追加 PCM 資料
+
+        Returns:
+            False 表示播放已被取消，不必再寫入
+        """
+        if self.clip.future.done():
+            return False
+        if not self.clip.started and not self.clip.chunks:
+            # 佇列延遲從第一段資料到達起算，不含網路等待
+            self.clip.enqueued_at = time.perf_counter()
+        data = resample(data, self.sample_rate, self.output_rate)
+        self.clip.length += len(data)
+        self.clip.chunks.append(data)
+        return True
+
+    def finish(self):
+        """資料已全部寫入，播完剩餘部分後結束"""
+        self.clip.finished = True
+
+    @property
+    def future(self) -> asyncio.Future:
+        """播放結束時完成的 Future（True: 播完，False: 被取消）"""
+        return self.clip.future
+
+
+class PlaybackEngine:
+    """持續開啟輸出串流的播放引擎"""
+
+    def __init__(self,
+                 sample_rate: int = None,
+                 blocksize: int = None,
+                 device=None):
+        """
+        初始化播放引擎（輸出串流在第一次播放時開啟）
+
+        Args:
+            sample_rate: 輸出取樣率，預設使用 config.PLAYBACK_SAMPLE_RATE
+            blocksize: 輸出區塊幀數，預設使用 config.PLAYBACK_BLOCKSIZE
+            device: 輸出裝置，None 為系統預設
+        """
+        self.sample_rate = sample_rate or config.Config.PLAYBACK_SAMPLE_RATE
+        self.blocksize = blocksize or config.Config.PLAYBACK_BLOCKSIZE
+        self.device = device
+        self.stream = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._feeder: Optional[asyncio.Task] = None
+        # 回呼執行緒與事件循環之間的交接佇列（deque 的 append/popleft 為執行緒安全）
+        self._pending = collections.deque()
+        self._current: Optional[Clip] = None
+        self._active = set()
+        self._flush = False
+
+    async def start(self):
+        """開啟輸出串流並啟動送料 Task（重複呼叫無作用）"""
+        if self.stream is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self.stream = create_output_stream(
+            samplerate=self.sample_rate,
+            blocksize=self.blocksize,
+            channels=1,
+            dtype='float32',
+            device=self.device,
+            callback=self._callback
+        )
+        self.stream.start()
+        self._feeder = asyncio.create_task(self._feed())
+
+    async def _feed(self):
+        """把 asyncio 佇列中的片段交給輸出回呼"""
+        while True:
+            clip = await self._queue.get()
+            if not clip.future.done():
+                self._pending.append(clip)
+
+    def _callback(self, outdata, frames, time_info, status):
+        """輸出回呼（在音訊執行緒執行）：依序填入片段，片段之間無縫接續"""
+        if status:
+            print(f"播放狀態: {status}")
+        out = outdata[:, 0]
+        if self._flush:
+            self._flush = False
+            self._current = None
+        filled = 0
+        while filled < frames:
+            if self._current is None:
+                if not self._pending:
+                    break
+                self._current = self._pending.popleft()
+            clip = self._current
+            if clip.position >= len(clip.data):
+                # 先讀 finished 再取資料：finish() 之前寫入的資料一定看得到
+                finished = clip.finished
+                if not clip.next_chunk():
+                    if finished:
+                        self._loop.call_soon_threadsafe(self._finish, clip, True)
+                        self._current = None
+                        continue
+                    # 串流資料尚未到達：本區塊剩餘部分補靜音
+                    if clip.started and not clip.starved:
+                        clip.starved = True
+                        self._loop.call_soon_threadsafe(metrics.incr, 'playback.underrun')
+                    break
+                clip.starved = False
+            if not clip.started:
+                clip.started = True
+                latency = time.perf_counter() - clip.enqueued_at
+                self._loop.call_soon_threadsafe(metrics.observe, 'playback.queue_to_first_sample', latency)
+            n = min(frames - filled, len(clip.data) - clip.position)
+            out[filled:filled + n] = clip.data[clip.position:clip.position + n]
+            clip.position += n
+            clip.played += n
+            filled += n
+        out[filled:] = 0
+
+    def _finish(self, clip: Clip, completed: bool):
+        """在事件循環中結束片段"""
+        self._active.discard(clip)
+        if not clip.future.done():
+            clip.future.set_result(completed)
+
+    async def enqueue(self, data: np.ndarray, sample_rate: int, tag=None) -> asyncio.Future:
+        """
+        排入片段，不等待播放完成
+
+        Args:
+            data: 音訊資料
+            sample_rate: 取樣率
+            tag: 呼叫端自訂的標記，播放中可由 now_playing() 取回
+
+        Returns:
+            播放結束時完成的 Future（True: 播完，False: 被取消）
+        """
+        await self.start()
+        future = self._loop.create_future()
+        clip = Clip(resample(data, sample_rate, self.sample_rate), future, tag=tag)
+        self._active.add(clip)
+        await self._queue.put(clip)
+        return future
+
+    async def open_stream(self, sample_rate: int, tag=None) -> PlaybackStream:
+        """
+        排入串流片段，資料之後以 PlaybackStream.write() 陸續寫入
+
+        Args:
+            sample_rate: 寫入資料的取樣率
+            tag: 呼叫端自訂的標記，播放中可由 now_playing() 取回
+
+        Returns:
+            串流播放控制代碼
+        """
+        await self.start()
+        future = self._loop.create_future()
+        clip = Clip(np.zeros(0, dtype=np.float32), future, finished=False, tag=tag)
+        self._active.add(clip)
+        await self._queue.put(clip)
+        return PlaybackStream(clip, sample_rate, self.sample_rate)
+
+    async def play(self, data: np.ndarray, sample_rate: int) -> bool:
+        """
+        播放片段並等待結束
+
+        Returns:
+            True 表示播完，False 表示被 cancel() 打斷
+        """
+        future = await self.enqueue(data, sample_rate)
+        return await future
+
+    def cancel(self):
+        """立即停止播放並清空佇列（barge-in）"""
+        if self._queue is not None:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+        self._pending.clear()
+        self._flush = True
+        if self._active:
+            metrics.incr('playback.cancelled', len(self._active))
+        for clip in list(self._active):
+            self._finish(clip, False)
+
+    def now_playing(self) -> Optional[Tuple[object, int, int]]:
+        """
+        目前正在播放的片段
+
+        Returns:
+            (tag, 已播放樣本數, 片段樣本數)，沒有片段在播放時為 None
+            （串流片段的長度為目前已寫入的樣本數，下載完成後即為整段長度）
+        """
+        clip = self._current
+        if clip is None or not clip.started:
+            return None
+        return clip.tag, clip.played, clip.length
+
+    @property
+    def busy(self) -> bool:
+        """是否有片段正在播放或等待播放"""
+        return bool(self._active)
+
+    def close(self):
+        """關閉輸出串流"""
+        self.cancel()
+        if self._feeder:
+            self._feeder.cancel()
+            self._feeder = None
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+
+if __name__ == '__main__':
+    # 測試播放引擎（需要音訊輸出裝置）
+    print("播放引擎測試")
+
+    async def test():
+        engine = PlaybackEngine()
+        rate = 16000
+        t = np.arange(rate // 2) / rate
+        beeps = [np.sin(2 * np.pi * f * t).astype(np.float32) * 0.3 for f in (440, 660, 880)]
+
+        print("測試 1: 無縫連續播放三段")
+        futures = [await engine.enqueue(beep, rate) for beep in beeps]
+        await asyncio.gather(*futures)
+
+        print("測試 2: 播放中取消")
+        future = await engine.enqueue(np.concatenate(beeps * 3), rate)
+        await asyncio.sleep(0.3)
+        engine.cancel()
+        print(f"  播完: {await future}")
+
+        print("測試 3: 串流片段（資料分段陸續到達）")
+        stream = await engine.open_stream(rate)
+        for beep in beeps:
+            stream.write(beep)
+            await asyncio.sleep(0.2)
+        stream.finish()
+        print(f"  播完: {await stream.future}")
+
+        print(f"延遲: {metrics.summary('playback.queue_to_first_sample')}")
+        engine.close()
+
+    asyncio.run(test())
@@ -0,0 +1,222 @@
+"""
+檔案標準 (Standard):
+本檔案實作預先配置的環形緩衝錄音器 (RingBufferRecorder)。
+音訊回呼只把區塊複製到預先配置的 NumPy 環形緩衝區（不配置記憶體），
+背景寫入執行緒持續把區塊串流寫入已開啟的 SoundFile。
+錄音期間記憶體用量固定，與錄音長度無關；停止時只需寫完緩衝區內剩餘的區塊即可完成檔案。
+輸入串流持續開啟，未錄音時回呼照樣寫入環形緩衝區，
+開始錄音只需把讀取位置標在 preroll_blocks 個區塊之前，按下按鈕前的聲音（預錄）也會寫入檔案。
+輸入：sounddevice InputStream 回呼的音訊區塊
+輸出：錄音檔案
+
+執行方式 (Execution):
+- 被 modules.audio 的 record_audio 使用（callback 交給 sd.InputStream）
+- 獨立測試：python -m modules.recorder (以合成訊號測試，不需麥克風)
+
+相依性 (Dependencies):
+- numpy: 環形緩衝區
+- soundfile: 串流寫檔
+- threading: 背景寫入執行緒
+- modules.metrics: 溢位次數
+"""
+
+import threading
+from typing import Optional
+import numpy as np
+import soundfile as sf
+from modules.metrics import metrics
+
+# 錄音編碼：名稱 -> (soundfile 格式, 編碼子類型, 副檔名)
+CODECS = {
+    'wav': ('WAV', 'FLOAT', '.wav'),
+    'flac': ('FLAC', 'PCM_16', '.flac'),
+    'opus': ('OGG', 'OPUS', '.ogg'),
+}
+
+
+class RingBufferRecorder:
+    """預先配置的環形緩衝錄音器
+
+    write_index / read_index 為累計區塊數（不取餘數），
+    兩者相減即為緩衝區內尚未寫檔的區塊數。
+    回呼只會前進 write_index，寫入執行緒只會前進 read_index。
+    write_index 在輸入串流開啟期間持續累加，start() 時 read_index 標在預錄起點，
+    stop() 時以 end_index 標記終點，寫入執行緒寫到終點為止。
+    """
+
+    def __init__(self,
+                 sample_rate: int,
+                 channels: int = 1,
+                 blocksize: int = 1024,
+                 capacity_blocks: int = 32,
+                 preroll_blocks: int = 0):
+        """
+        初始化錄音器
+
+        Args:
+            sample_rate: 取樣率
+            channels: 錄製聲道數（只保留第一聲道寫檔）
+            blocksize: 每個回呼區塊的幀數
+            capacity_blocks: 環形緩衝區區塊數
+            preroll_blocks: 開始錄音時往前包含的區塊數（最多容量的一半，其餘留給寫入落後）
+        """
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.blocksize = blocksize
+        self.capacity = capacity_blocks
+        self.preroll_blocks = min(preroll_blocks, capacity_blocks // 2)
+        self.buffer = np.zeros((capacity_blocks, blocksize), dtype=np.float32)
+        self.block_frames = np.zeros(capacity_blocks, dtype=np.int64)
+        self.write_index = 0
+        self.read_index = 0
+        self.end_index: Optional[int] = None
+        self.frames_written = 0
+        self.overflows = 0
+        self.capturing = False
+        self._file: Optional[sf.SoundFile] = None
+        self._scratch = np.zeros(blocksize, dtype=np.float32)
+        self._pcm16 = np.zeros(blocksize, dtype=np.int16)
+        self._to_int16 = False
+        self._writer: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._stopping = False
+
+    def callback(self, indata, frames, time, status):
+        """sounddevice 錄音回呼（在音訊執行緒執行，不可阻塞或配置記憶體）"""
+        if status:
+            print(f"錄音狀態: {status}")
+
+        # 未錄音時也寫入緩衝區，作為下次錄音的預錄
+        offset = 0
+        while offset < frames:
+            n = min(self.blocksize, frames - offset)
+            slot = self.write_index % self.capacity
+            self.buffer[slot, :n] = indata[offset:offset + n, 0]
+            self.block_frames[slot] = n
+            offset += n
+            self.write_index += 1
+            if self.capturing and self.write_index - self.read_index > self.capacity:
+                # 寫入執行緒跟不上：最舊的區塊已被覆蓋
+                self.overflows += 1
+        if self.capturing:
+            self._ready.set()
+
+    def start(self, path: str, codec: str = 'wav'):
+        """
+        開始錄音：開啟輸出檔並啟動寫入執行緒
+
+        Args:
+            path: 輸出檔案路徑
+            codec: 錄音編碼（CODECS 的鍵值）
+        """
+        format, subtype, _ = CODECS[codec]
+        # 從預錄起點開始寫（輸入串流剛開啟時可用的區塊可能不足）
+        self.read_index = max(self.write_index - self.preroll_blocks, 0)
+        self.end_index = None
+        self.frames_written = 0
+        self.overflows = 0
+        self._stopping = False
+        self._ready.clear()
+        # 16-bit 編碼在寫入執行緒中先轉成 int16，避免 libsndfile 再做一次轉換
+        self._to_int16 = subtype == 'PCM_16'
+        self._file = sf.SoundFile(
+            path, 'w',
+            samplerate=self.sample_rate,
+            channels=1,
+            format=format,
+            subtype=subtype
+        )
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+        self.capturing = True
+
+    def _drain(self):
+        """把緩衝區內的區塊寫入檔案（停止後只寫到 end_index）"""
+        while True:
+            end = self.end_index if self.end_index is not None else self.write_index
+            if self.read_index >= end:
+                break
+            if self.write_index - self.read_index > self.capacity:
+                skipped = self.write_index - self.read_index - self.capacity
+                self.read_index += skipped
+            slot = self.read_index % self.capacity
+            n = self.block_frames[slot]
+            block = self.buffer[slot, :n]
+            if self._to_int16:
+                scaled = self._scratch[:n]
+                np.multiply(block, 32767.0, out=scaled)
+                np.clip(scaled, -32768.0, 32767.0, out=scaled)
+                np.rint(scaled, out=scaled)
+                self._pcm16[:n] = scaled
+                block = self._pcm16[:n]
+            self._file.write(block)
+            self.frames_written += n
+            self.read_index += 1
+
+    def _write_loop(self):
+        """寫入執行緒：等待新區塊並寫檔，停止時寫完剩餘區塊"""
+        while True:
+            self._ready.wait(timeout=0.05)
+            self._ready.clear()
+            self._drain()
+            if self._stopping:
+                self._drain()
+                break
+
+    def stop(self) -> int:
+        """
+        停止錄音：寫完剩餘區塊並關閉檔案（會等待寫入執行緒，請在背景執行緒呼叫）
+
+        Returns:
+            寫入檔案的總幀數
+        """
+        # 先標記終點再停止擷取，之後回呼寫入的區塊屬於下一次的預錄
+        self.end_index = self.write_index
+        self.capturing = False
+        self._stopping = True
+        self._ready.set()
+        if self._writer:
+            self._writer.join()
+            self._writer = None
+        if self._file:
+            self._file.close()
+            self._file = None
+        if self.overflows:
+            metrics.incr('audio.record_overflow', self.overflows)
+            print(f"錄音緩衝區溢位 {self.overflows} 次")
+        return self.frames_written
+
+
+if __name__ == '__main__':
+    # 以合成訊號測試錄音器
+    import os
+    import tempfile
+    import time as _time
+    print("環形緩衝錄音器測試")
+
+    tone = np.sin(np.arange(16000) * 2 * np.pi * 440 / 16000).astype(np.float32)[:, None]
+    for codec, (_, _, suffix) in CODECS.items():
+        recorder = RingBufferRecorder(16000, blocksize=512, capacity_blocks=8)
+        path = os.path.join(tempfile.mkdtemp(), 'test' + suffix)
+        recorder.start(path, codec)
+        for i in range(0, 16000, 512):
+            block = tone[i:i + 512]
+            recorder.callback(block, len(block), None, None)
+            _time.sleep(0.008)  # 約 4 倍即時速度
+        frames = recorder.stop()
+        data, sr = sf.read(path)
+        print(f"{codec}: 寫入 {frames} 幀，讀回 {len(data)} 幀 @ {sr} Hz，"
+              f"{os.path.getsize(path)} bytes，溢位 {recorder.overflows} 次")
+
+    # 預錄：開始錄音前的區塊也寫入檔案
+    recorder = RingBufferRecorder(16000, blocksize=512, capacity_blocks=16, preroll_blocks=4)
+    for _ in range(10):
+        recorder.callback(tone[:512], 512, None, None)
+    path = os.path.join(tempfile.mkdtemp(), 'preroll.wav')
+    recorder.start(path)
+    for i in range(0, 16000, 512):
+        block = tone[i:i + 512]
+        recorder.callback(block, len(block), None, None)
+        _time.sleep(0.008)
+    frames = recorder.stop()
+    print(f"預錄: 寫入 {frames} 幀（含預錄 {recorder.preroll_blocks * 512} 幀）")
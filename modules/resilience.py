@@ -0,0 +1,287 @@
+"""
+檔案標準 (Standard):
+本檔案提供外部 API 呼叫的共用韌性層：
+1. 每個端點的呼叫期限 (deadline)
+2. 冪等呼叫的指數退避重試（含隨機抖動 full jitter）
+3. 可選的對沖請求 (hedged request)：呼叫超過該端點 p95 延遲仍未完成時，送出第二個請求，取先完成者
+4. 斷路器 (circuit breaker)：端點連續失敗時直接快速失敗，冷卻後放行一次試探
+每個決策都會記錄到 modules.metrics（resilience.<端點>.<事件>）。
+輸入：端點名稱、產生 coroutine 的函式
+輸出：呼叫結果，或拋出最後一次的例外 / CircuitOpenError
+
+執行方式 (Execution):
+- 被 modules.ai 與 modules.audio 透過模組層級的 resilience 實例使用
+- 獨立測試：python -m modules.resilience (以模擬的慢速/失敗呼叫測試)
+
+相依性 (Dependencies):
+- asyncio: 期限、對沖與退避等待
+- random: 退避抖動
+- config: 系統配置（各端點策略）
+- modules.metrics: 決策計數與延遲觀測
+"""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional
+import config
+from modules.metrics import metrics
+
+
+class CircuitOpenError(Exception):
+    """斷路器開啟中，呼叫被直接拒絕"""
+
+
+class PermanentError(Exception):
+    """不應重試的錯誤（例如 HTTP 4xx、參數錯誤）
+
+    代表後端有正常回應，不計入斷路器失敗次數。
+    """
+
+
+class CircuitBreaker:
+    """斷路器
+
+    狀態：
+    - closed: 正常放行
+    - open: 連續失敗達門檻，冷卻期間內全部拒絕
+    - half_open: 冷卻結束，放行一次試探（試探進行中其他呼叫一律拒絕）；成功則關閉，失敗則重新開啟
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """
+        初始化斷路器
+
+        Args:
+            failure_threshold: 連續失敗幾次後開啟
+            reset_timeout: 開啟後冷卻秒數
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        """是否允許本次呼叫"""
+        if self.state == 'open':
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = 'half_open'
+        if self.state == 'half_open':
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def release_probe(self):
+        """試探呼叫沒有結果（例如被取消）：維持 half_open，允許下一次試探"""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        """記錄成功"""
+        self.state = 'closed'
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """
+        記錄失敗
+
+        Returns:
+            本次失敗是否使斷路器開啟
+        """
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == 'half_open' or self.failures >= self.failure_threshold:
+            was_open = self.state == 'open'
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+            return not was_open
+        return False
+
+
+class Resilience:
+    """外部 API 韌性層"""
+
+    def __init__(self, policies: Dict[str, Dict] = None):
+        """
+        初始化韌性層
+
+        Args:
+            policies: 各端點策略，預設使用 config.API_POLICIES
+        """
+        self.policies = policies if policies is not None else config.Config.API_POLICIES
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def policy(self, endpoint: str) -> Dict:
+        """
+        取得端點策略（未設定的欄位使用預設值）
+
+        Returns:
+            {'deadline', 'retries', 'hedge', 'idempotent'}
+        """
+        policy = {
+            'deadline': 30.0,
+            'retries': 0,
+            'hedge': False,
+            'idempotent': True,
+        }
+        policy.update(self.policies.get(endpoint, {}))
+        return policy
+
+    def deadline(self, endpoint: str) -> float:
+        """取得端點呼叫期限（秒），供底層 HTTP timeout 使用"""
+        return self.policy(endpoint)['deadline']
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        """取得端點斷路器"""
+        if endpoint not in self.breakers:
+            self.breakers[endpoint] = CircuitBreaker(
+                config.Config.API_BREAKER_FAILURES,
+                config.Config.API_BREAKER_RESET
+            )
+        return self.breakers[endpoint]
+
+    def _backoff(self, attempt: int) -> float:
+        """指數退避（full jitter）"""
+        ceiling = min(
+            config.Config.API_RETRY_MAX_DELAY,
+            config.Config.API_RETRY_BASE_DELAY * (2 ** attempt)
+        )
+        return random.uniform(0, ceiling)
+
+    def _hedge_after(self, endpoint: str) -> Optional[float]:
+        """對沖門檻：端點延遲 p95，樣本不足時不對沖"""
+        name = f'resilience.{endpoint}.latency'
+        if len(metrics.samples(name)) < config.Config.API_HEDGE_MIN_SAMPLES:
+            return None
+        return metrics.percentile(name, 95)
+
+    async def _race(self, endpoint: str, fn: Callable[[], Awaitable], hedge_after: Optional[float]):
+        """執行一次呼叫，必要時在 hedge_after 秒後送出對沖請求"""
+        primary = asyncio.ensure_future(fn())
+        if hedge_after is None:
+            return await primary
+
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if not done:
+                metrics.incr(f'resilience.{endpoint}.hedge')
+                tasks.add(asyncio.ensure_future(fn()))
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            metrics.incr(f'resilience.{endpoint}.hedge_win')
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call(self,
+                   endpoint: str,
+                   fn: Callable[[], Awaitable],
+                   idempotent: bool = None):
+        """
+        以韌性策略呼叫外部 API
+
+        Args:
+            endpoint: 端點名稱（對應 config.API_POLICIES）
+            fn: 每次呼叫都產生新 coroutine 的函式（重試與對沖會呼叫多次）
+            idempotent: 是否可安全重試，預設使用端點策略
+
+        Returns:
+            呼叫結果
+
+        Raises:
+            CircuitOpenError: 斷路器開啟中
+            Exception: 重試耗盡後的最後一個例外
+        """
+        policy = self.policy(endpoint)
+        if idempotent is None:
+            idempotent = policy['idempotent']
+        retries = policy['retries'] if idempotent else 0
+        breaker = self.breaker(endpoint)
+
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                metrics.incr(f'resilience.{endpoint}.rejected')
+                raise CircuitOpenError(f"{endpoint} 斷路器開啟中")
+
+            hedge_after = self._hedge_after(endpoint) if (policy['hedge'] and idempotent) else None
+            metrics.incr(f'resilience.{endpoint}.attempt')
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    self._race(endpoint, fn, hedge_after),
+                    timeout=policy['deadline']
+                )
+            except PermanentError:
+                metrics.incr(f'resilience.{endpoint}.permanent')
+                breaker.record_success()
+                raise
+            except asyncio.CancelledError:
+                breaker.release_probe()
+                raise
+            except Exception as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    metrics.incr(f'resilience.{endpoint}.timeout')
+                else:
+                    metrics.incr(f'resilience.{endpoint}.failure')
+                if breaker.record_failure():
+                    metrics.incr(f'resilience.{endpoint}.breaker_open')
+                if attempt >= retries:
+                    raise
+                metrics.incr(f'resilience.{endpoint}.retry')
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            metrics.observe(f'resilience.{endpoint}.latency', time.perf_counter() - start)
+            metrics.incr(f'resilience.{endpoint}.success')
+            breaker.record_success()
+            return result
+
+
+# 全域韌性層實例（斷路器狀態在各模組間共用）
+resilience = Resilience()
+
+
+if __name__ == '__main__':
+    # 測試韌性層（模擬呼叫）
+    print("韌性層測試")
+
+    async def test():
+        layer = Resilience({'flaky': {'deadline': 0.5, 'retries': 3, 'hedge': True}})
+        calls = {'n': 0}
+
+        async def flaky():
+            calls['n'] += 1
+            if calls['n'] % 3 == 1:
+                raise ConnectionError("模擬連線錯誤")
+            await asyncio.sleep(random.uniform(0.01, 0.05))
+            return 'ok'
+
+        for _ in range(30):
+            await layer.call('flaky', flaky)
+
+        async def slow():
+            await asyncio.sleep(1.0)
+
+        try:
+            await layer.call('flaky', slow)
+        except asyncio.TimeoutError:
+            print("  逾時後放棄（符合預期）")
+
+        counters = metrics.snapshot()['counters']
+        for name in sorted(counters):
+            print(f"  {name}: {counters[name]}")
+
+    asyncio.run(test())
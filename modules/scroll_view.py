@@ -0,0 +1,181 @@
+"""
+檔案標準 (Standard):
+本檔案實作 OLED 長文字的捲動檢視 (ScrollView)：
+- 捲動：整段文字斷行後一次點陣化成高的 1-bit 長條，之後每張畫面只裁切視窗大小的區塊貼上
+- 跑馬燈：單行文字點陣化成寬的長條（尾端接上開頭），水平位移顯示固定圈數後停在開頭
+  （每圈開始前停頓），之後不再送出畫面
+長條在第一次渲染時建立（於渲染執行緒中），之後捲動不再重新點陣化任何文字。
+位置以 0.0 - 1.0 的比例表示（捲動），或以像素表示（跑馬燈），可由 TTS 播放進度或編碼器驅動。
+輸入：長文字、標題行
+輸出：交給 Display.show_scroll 的檢視狀態
+
+執行方式 (Execution):
+- 被 main.py（聊天回應、日記回顧）與 modules.display 使用
+- 獨立測試：python -m modules.scroll_view (以合成字型測試長條建立與裁切)
+
+相依性 (Dependencies):
+- PIL (Pillow): 1-bit 長條
+- asyncio: 跑馬燈 Task
+- config: 系統配置（行距、跑馬燈速度 / 圈數 / 停頓、幀率）
+"""
+
+import asyncio
+from typing import List, Optional
+from PIL import Image
+import config
+
+
+class ScrollView:
+    """長文字捲動 / 跑馬燈檢視"""
+
+    def __init__(self,
+                 text: str,
+                 header: List[str] = None,
+                 spacing: int = 12,
+                 marquee: bool = False):
+        """
+        初始化檢視
+
+        Args:
+            text: 要捲動的文字
+            header: 固定在上方的標題行
+            spacing: 行距（像素）
+            marquee: True 為水平跑馬燈，False 為垂直捲動
+        """
+        self.text = text
+        self.header = list(header or [])
+        self.spacing = spacing
+        self.marquee = marquee
+        self.position = 0.0
+        self.manual = False  # 使用者以編碼器捲動後不再跟隨播放進度
+        self.period = 0      # 跑馬燈一個循環的像素數（0 表示不需移動）
+        self.extent: Optional[int] = None  # 垂直捲動可移動的像素數（長條建立後才知道）
+        self._strip: Optional[Image.Image] = None
+
+    def strip(self, display) -> Image.Image:
+        """
+        取得（必要時建立）文字長條，只在第一次呼叫時點陣化
+
+        Args:
+            display: modules.display.Display（提供字型與排版快取）
+        """
+        if self._strip is None:
+            width = display.device.width
+            if self.marquee:
+                font = display.font_chinese or display.font_default
+                line = display.text_cache.line(self.text.replace('\n', ' '), font)
+                if line.width <= width:
+                    self._strip = line.image
+                else:
+                    # 尾端接上開頭，裁切時不需處理繞回
+                    self.period = line.width + width // 3
+                    self._strip = Image.new('1', (self.period + width, line.image.height))
+                    self._strip.paste(line.image, (0, 0))
+                    self._strip.paste(line.image.crop((0, 0, min(width, line.width), line.image.height)),
+                                      (self.period, 0))
+            else:
+                self._strip = display.render_strip(self.text, self.spacing)
+                viewport = display.device.height - len(self.header) * self.spacing
+                self.extent = max(self._strip.height - viewport, 0)
+        return self._strip
+
+    def window(self, display, height: int) -> Image.Image:
+        """
+        依目前位置裁切視窗
+
+        Args:
+            display: modules.display.Display
+            height: 視窗高度（像素）
+        """
+        strip = self.strip(display)
+        width = display.device.width
+        if self.marquee:
+            x = int(self.position) % self.period if self.period else 0
+            return strip.crop((x, 0, x + width, strip.height))
+        top = int(round(self.position * (self.extent or 0)))
+        return strip.crop((0, top, width, top + height))
+
+    def seek(self, fraction: float):
+        """捲動到比例位置（0.0 開頭，1.0 結尾）"""
+        self.position = min(max(fraction, 0.0), 1.0)
+
+    def scroll_lines(self, delta: int):
+        """以行為單位捲動（編碼器）"""
+        self.manual = True
+        if self.extent:
+            self.seek(self.position + delta * self.spacing / self.extent)
+
+
+async def run_marquee(display,
+                      view: ScrollView,
+                      speed: float = None,
+                      passes: int = None,
+                      pause: float = None):
+    """
+    跑馬燈 Task：每圈先停頓，再以固定速度水平移動並張貼畫面；跑完指定圈數後停在開頭並結束
+    （文字放得下螢幕時只顯示一次），閒置時不再喚醒渲染器
+
+    Args:
+        display: DisplayRenderer（需要 show_scroll 與 idle）
+        view: marquee=True 的 ScrollView
+        speed: 每秒移動像素數，預設使用 config.DISPLAY_MARQUEE_SPEED
+        passes: 圈數，預設使用 config.DISPLAY_MARQUEE_PASSES
+        pause: 每圈開始前的停頓秒數，預設使用 config.DISPLAY_MARQUEE_PAUSE
+    """
+    speed = speed or config.Config.DISPLAY_MARQUEE_SPEED
+    passes = passes or config.Config.DISPLAY_MARQUEE_PASSES
+    pause = config.Config.DISPLAY_MARQUEE_PAUSE if pause is None else pause
+    interval = 1.0 / config.Config.DISPLAY_MAX_FPS
+    loop = asyncio.get_running_loop()
+    view.position = 0
+    display.show_scroll(view)
+    # 長條在第一次渲染時建立，之後才知道是否需要移動
+    await display.idle()
+    if not view.period:
+        return
+    for _ in range(passes):
+        await asyncio.sleep(pause)
+        start = loop.time()
+        while True:
+            position = (loop.time() - start) * speed
+            if position >= view.period:
+                break
+            view.position = position
+            display.show_scroll(view)
+            await asyncio.sleep(interval)
+        # 長條尾端接著開頭，移動一個週期後與開頭相同
+        view.position = 0
+        display.show_scroll(view)
+
+
+if __name__ == '__main__':
+    # 以簡易顯示物件測試長條建立與裁切
+    from PIL import ImageFont
+    from modules.text_cache import TextCache
+    print("捲動檢視測試")
+
+    class FakeDisplay:
+        class device:
+            width, height = 128, 64
+        text_cache = TextCache()
+        font_chinese = None
+        font_default = ImageFont.load_default()
+
+        def render_strip(self, text, spacing):
+            lines = self.text_cache.wrap(text, self.font_default, self.device.width)
+            strip = Image.new('1', (self.device.width, max(len(lines) * spacing, 1)))
+            for i, line in enumerate(lines):
+                strip.paste(self.text_cache.line(line, self.font_default).image, (0, i * spacing))
+            return strip
+
+    display = FakeDisplay()
+    view = ScrollView("This is a long response that needs several lines on the small screen. " * 3,
+                      header=["Reply"])
+    for fraction in (0.0, 0.5, 1.0):
+        view.seek(fraction)
+        window = view.window(display, 52)
+        print(f"  {fraction:.1f}: 長條 {view.strip(display).size}，視窗 {window.size}")
+    marquee = ScrollView("A single line that is much wider than the screen", marquee=True)
+    marquee.position = 200
+    print(f"  跑馬燈: 週期 {marquee.strip(display) and marquee.period} px，"
+          f"視窗 {marquee.window(display, 12).size}")
@@ -0,0 +1,150 @@
+"""
+檔案標準 (Standard):
+本檔案實作系統音效的解碼快取 (SoundCache)。
+啟動時將 assets/system/ 下的所有音效解碼為 PCM，並一次重取樣到播放引擎的輸出取樣率，
+之後播放不再從 SD 卡讀檔與解碼，排入播放引擎後下一個輸出區塊即可開始發聲。
+- 較大的音效解碼後存成原始 float32 檔並以記憶體映射 (np.memmap) 載入，不佔用常駐記憶體
+- 背景監看音效目錄，檔案新增、修改或刪除時自動更新快取
+輸入：assets/system/ 下的音效檔
+輸出：可直接送入播放引擎的 float32 PCM 陣列
+
+執行方式 (Execution):
+- 被 modules.audio 在啟動時載入，play_system_sound 使用
+- 獨立測試：python -m modules.sound_cache (載入並列出所有音效)
+
+相依性 (Dependencies):
+- soundfile: 解碼音效
+- numpy: PCM 陣列與記憶體映射
+- asyncio: 目錄監看
+- config: 系統配置（音效目錄、快取目錄、記憶體映射門檻）
+- modules.playback: 重取樣
+"""
+
+import asyncio
+import os
+from typing import Dict, Optional
+import numpy as np
+import soundfile as sf
+import config
+from modules.playback import resample
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg')
+
+
+class SoundCache:
+    """系統音效解碼快取"""
+
+    def __init__(self,
+                 sample_rate: int,
+                 directory: str = None,
+                 cache_dir: str = None,
+                 mmap_threshold: int = None):
+        """
+        初始化快取
+
+        Args:
+            sample_rate: 目標取樣率（播放引擎輸出取樣率）
+            directory: 音效目錄，預設使用 config.ASSETS_SYSTEM_PATH
+            cache_dir: 記憶體映射檔目錄，預設使用 config.SOUND_CACHE_DIR
+            mmap_threshold: 解碼後超過此位元組數即改用記憶體映射，預設使用 config.SOUND_CACHE_MMAP_BYTES
+        """
+        self.sample_rate = sample_rate
+        self.directory = directory or config.Config.ASSETS_SYSTEM_PATH
+        self.cache_dir = cache_dir or config.Config.SOUND_CACHE_DIR
+        self.mmap_threshold = (config.Config.SOUND_CACHE_MMAP_BYTES
+                               if mmap_threshold is None else mmap_threshold)
+        self.sounds: Dict[str, np.ndarray] = {}
+        self._stamps: Dict[str, tuple] = {}
+
+    def _scan(self) -> Dict[str, tuple]:
+        """列出音效檔與其 (mtime, size)"""
+        stamps = {}
+        if not os.path.isdir(self.directory):
+            return stamps
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                stat = entry.stat()
+                stamps[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def _decode(self, filename: str) -> np.ndarray:
+        """解碼並重取樣單一音效，大型音效改用記憶體映射"""
+        path = os.path.join(self.directory, filename)
+        mapped_path = os.path.join(self.cache_dir, f'{filename}.{self.sample_rate}.f32')
+
+        # 已有比原始檔新的解碼結果時直接映射，省去解碼
+        if (os.path.exists(mapped_path)
+                and os.path.getmtime(mapped_path) >= os.path.getmtime(path)):
+            return np.memmap(mapped_path, dtype=np.float32, mode='r')
+
+        data, sr = sf.read(path, dtype='float32')
+        data = resample(data, sr, self.sample_rate)
+        if data.nbytes < self.mmap_threshold:
+            return data
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = mapped_path + '.tmp'
+        data.tofile(tmp_path)
+        os.replace(tmp_path, mapped_path)
+        return np.memmap(mapped_path, dtype=np.float32, mode='r')
+
+    def refresh(self) -> int:
+        """
+        同步快取與音效目錄（載入新增/修改的檔案，移除已刪除的檔案）
+
+        Returns:
+            重新載入的音效數量
+        """
+        stamps = self._scan()
+        loaded = 0
+        for filename, stamp in stamps.items():
+            if self._stamps.get(filename) == stamp:
+                continue
+            # 失敗也記錄時間戳，檔案再次變更前不重試
+            self._stamps[filename] = stamp
+            try:
+                self.sounds[filename] = self._decode(filename)
+                loaded += 1
+            except Exception as e:
+                self.sounds.pop(filename, None)
+                print(f"載入系統音效失敗 ({filename}): {e}")
+        for filename in set(self._stamps) - set(stamps):
+            self.sounds.pop(filename, None)
+            self._stamps.pop(filename, None)
+        return loaded
+
+    def get(self, filename: str) -> Optional[np.ndarray]:
+        """
+        取得已解碼的音效
+
+        Args:
+            filename: 音效檔名
+
+        Returns:
+            float32 PCM（取樣率為 self.sample_rate），不存在返回 None
+        """
+        return self.sounds.get(filename)
+
+    async def watch(self, interval: float = None):
+        """
+        背景監看音效目錄，變更時在背景執行緒重新載入
+
+        Args:
+            interval: 輪詢間隔（秒），預設使用 config.SOUND_CACHE_WATCH_INTERVAL
+        """
+        interval = interval or config.Config.SOUND_CACHE_WATCH_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            loaded = await asyncio.to_thread(self.refresh)
+            if loaded:
+                print(f"系統音效已更新: {loaded} 個")
+
+
+if __name__ == '__main__':
+    # 載入並列出所有系統音效
+    print("系統音效快取測試")
+    cache = SoundCache(config.Config.PLAYBACK_SAMPLE_RATE)
+    cache.refresh()
+    for name, data in sorted(cache.sounds.items()):
+        kind = '記憶體映射' if isinstance(data, np.memmap) else '記憶體'
+        print(f"  {name}: {len(data) / cache.sample_rate:.2f}s, {data.nbytes} bytes ({kind})")
@@ -0,0 +1,156 @@
+"""
+檔案標準 (Standard):
+本檔案實作增量式 WAV 解碼器 (WavStreamDecoder)。
+HTTP 回應本文以任意大小的片段餵入，解碼器解析 RIFF 標頭後，
+每次返回目前已完整收到的 PCM 幀（float32 單聲道），讓播放可以在第一個片段到達時就開始。
+串流 WAV 常把資料長度填成 0 或 0xFFFFFFFF，因此資料區一律讀到串流結束為止。
+非 WAV 格式（例如 MP3）無法增量解碼，會先累積全部內容，於 finish() 時以 soundfile 一次解碼。
+輸入：位元組片段
+輸出：float32 單聲道 PCM 片段、取樣率
+
+執行方式 (Execution):
+- 被 modules.audio 的串流下載播放使用
+- 獨立測試：python -m modules.stream_decoder
+
+相依性 (Dependencies):
+- numpy: PCM 轉換
+- soundfile: 非 WAV 格式的備援解碼
+- struct: RIFF 標頭解析
+"""
+
+import io
+import struct
+from typing import Optional
+import numpy as np
+import soundfile as sf
+
+# WAVE 格式代碼
+WAVE_FORMAT_PCM = 1
+WAVE_FORMAT_IEEE_FLOAT = 3
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavStreamDecoder:
+    """增量式 WAV 解碼器"""
+
+    def __init__(self):
+        """初始化解碼器"""
+        self._buffer = bytearray()
+        self.sample_rate: Optional[int] = None
+        self.channels = 1
+        self.sample_width = 2
+        self.format_tag = WAVE_FORMAT_PCM
+        self.streamable: Optional[bool] = None  # None: 尚未判斷
+        self._in_data = False
+
+    def _parse_header(self) -> bool:
+        """
+        解析 RIFF 標頭直到 data 區塊開頭
+
+        Returns:
+            是否已進入 data 區塊
+        """
+        buf = self._buffer
+        if self.streamable is None:
+            if len(buf) < 12:
+                return False
+            if buf[:4] != b'RIFF' or buf[8:12] != b'WAVE':
+                self.streamable = False
+                return False
+            self.streamable = True
+            del buf[:12]
+
+        while len(buf) >= 8:
+            chunk_id = bytes(buf[:4])
+            chunk_size = struct.unpack('<I', buf[4:8])[0]
+            if chunk_id == b'data':
+                del buf[:8]
+                return True
+            if len(buf) < 8 + chunk_size + (chunk_size & 1):
+                return False
+            if chunk_id == b'fmt ':
+                (self.format_tag, self.channels, self.sample_rate,
+                 _, _, bits) = struct.unpack('<HHIIHH', buf[8:24])
+                if self.format_tag == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 26:
+                    self.format_tag = struct.unpack('<H', buf[32:34])[0]
+                self.sample_width = bits // 8
+            del buf[:8 + chunk_size + (chunk_size & 1)]
+        return False
+
+    def _convert(self, raw: bytes) -> np.ndarray:
+        """將 PCM 位元組轉成 float32 單聲道"""
+        width = self.sample_width
+        if self.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            data = np.frombuffer(raw, dtype='<f4' if width == 4 else '<f8').astype(np.float32)
+        elif width == 1:
+            data = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        elif width == 2:
+            data = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+        elif width == 3:
+            b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            data = ((b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8).astype(np.float32) / 8388608.0
+        elif width == 4:
+            data = np.frombuffer(raw, dtype='<i4').astype(np.float32) / 2147483648.0
+        else:
+            raise ValueError(f"不支援的 WAV 位元深度: {width * 8}")
+        if self.channels > 1:
+            data = data.reshape(-1, self.channels).mean(axis=1)
+        return data
+
+    def feed(self, chunk: bytes) -> Optional[np.ndarray]:
+        """
+        餵入一個片段
+
+        Args:
+            chunk: HTTP 回應本文片段
+
+        Returns:
+            新解碼出的 PCM（可能為空陣列），尚無可解碼資料或非 WAV 時返回 None
+        """
+        self._buffer.extend(chunk)
+        if not self._in_data:
+            self._in_data = self._parse_header()
+            if not self._in_data:
+                return None
+
+        frame_bytes = self.sample_width * self.channels
+        usable = len(self._buffer) - len(self._buffer) % frame_bytes
+        if usable == 0:
+            return np.zeros(0, dtype=np.float32)
+        raw = bytes(self._buffer[:usable])
+        del self._buffer[:usable]
+        return self._convert(raw)
+
+    def finish(self) -> Optional[np.ndarray]:
+        """
+        串流結束
+
+        Returns:
+            非 WAV 格式時返回整段解碼結果（並設定 sample_rate），否則返回 None
+        """
+        if self.streamable is False or (self.streamable is None and self._buffer):
+            data, self.sample_rate = sf.read(io.BytesIO(bytes(self._buffer)), dtype='float32')
+            self._buffer.clear()
+            if data.ndim > 1:
+                data = data.mean(axis=1)
+            return data
+        return None
+
+
+if __name__ == '__main__':
+    # 以不同片段大小餵入 WAV，確認結果與一次解碼相同
+    print("增量式 WAV 解碼器測試")
+    tone = (np.sin(np.arange(24000) * 2 * np.pi * 440 / 24000) * 0.5).astype(np.float32)
+    for subtype in ('PCM_16', 'PCM_24', 'FLOAT'):
+        buf = io.BytesIO()
+        sf.write(buf, np.stack([tone, tone], axis=1), 24000, format='WAV', subtype=subtype)
+        payload = buf.getvalue()
+        decoder = WavStreamDecoder()
+        parts = []
+        for i in range(0, len(payload), 1000):
+            pcm = decoder.feed(payload[i:i + 1000])
+            if pcm is not None:
+                parts.append(pcm)
+        decoded = np.concatenate(parts)
+        error = float(np.max(np.abs(decoded - tone)))
+        print(f"  {subtype}: {len(decoded)} 幀 @ {decoder.sample_rate} Hz，最大誤差 {error:.5f}")
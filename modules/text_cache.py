@@ -0,0 +1,205 @@
+"""
+檔案標準 (Standard):
+本檔案實作 OLED 文字的字形點陣快取與單行排版快取 (TextCache)。
+- 字形快取：每個 (字元, 字型, 字級) 只經 FreeType 點陣化一次，存成 1-bit 點陣與前進寬度
+- 排版快取：每個 (文字, 字型, 字級) 的整行 1-bit 點陣與實際像素寬度，由快取的字形組合而成
+- 斷行：依字形前進寬度把長文字切成不超過指定寬度的多行（英文優先在空白處斷開）
+重複出現的畫面（「錄音中...」、「處理中...」、模式名稱）直接貼上快取的點陣，不再呼叫 FreeType。
+兩個快取都以 LRU 限制項目數。
+非 FreeType 字型（舊版 Pillow 的 load_default 點陣字型）無法逐字排版，改為整行點陣化後快取。
+輸入：文字、字型
+輸出：1-bit 單行點陣、像素寬度
+
+執行方式 (Execution):
+- 被 modules.display 使用
+- 獨立測試：python -m modules.text_cache (比較快取與直接繪製的結果與耗時)
+
+相依性 (Dependencies):
+- PIL (Pillow): 字型點陣化
+- collections.OrderedDict: LRU
+- config: 系統配置（快取大小）
+- modules.metrics: 命中/未命中計數
+"""
+
+import collections
+from typing import List, Tuple
+from PIL import Image, ImageDraw, ImageFont
+import config
+from modules.metrics import metrics
+
+
+class LineBitmap:
+    """單行文字的 1-bit 點陣（左上角對齊字型的 ascender，與 draw.text 預設相同）"""
+
+    def __init__(self, image: Image.Image, width: int, height: int):
+        self.image = image
+        self.width = width
+        self.height = height
+
+
+def font_key(font) -> Tuple:
+    """字型的快取鍵值（字型檔路徑與字級）"""
+    return (getattr(font, 'path', None) or id(font), getattr(font, 'size', 0))
+
+
+class TextCache:
+    """字形與單行排版快取"""
+
+    def __init__(self, max_lines: int = None, max_glyphs: int = None):
+        """
+        初始化快取
+
+        Args:
+            max_lines: 排版快取項目上限，預設使用 config.DISPLAY_LINE_CACHE_SIZE
+            max_glyphs: 字形快取項目上限，預設使用 config.DISPLAY_GLYPH_CACHE_SIZE
+        """
+        self.max_lines = max_lines or config.Config.DISPLAY_LINE_CACHE_SIZE
+        self.max_glyphs = max_glyphs or config.Config.DISPLAY_GLYPH_CACHE_SIZE
+        self._lines = collections.OrderedDict()
+        self._glyphs = collections.OrderedDict()
+
+    @staticmethod
+    def _lru_get(cache: collections.OrderedDict, key):
+        """取出並標記為最近使用"""
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+    @staticmethod
+    def _lru_put(cache: collections.OrderedDict, key, value, limit: int):
+        """放入並淘汰最久未使用的項目"""
+        cache[key] = value
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def _glyph(self, char: str, font: ImageFont.FreeTypeFont) -> Tuple[Image.Image, int, int, float]:
+        """
+        取得單一字元的點陣
+
+        Returns:
+            (1-bit 點陣, 相對筆位的 x 偏移, 相對基線的 y 偏移, 前進寬度)
+        """
+        key = (char,) + font_key(font)
+        glyph = self._lru_get(self._glyphs, key)
+        if glyph is not None:
+            metrics.incr('text_cache.glyph_hit')
+            return glyph
+
+        metrics.incr('text_cache.glyph_miss')
+        left, top, right, bottom = font.getbbox(char, mode='1', anchor='ls')
+        image = Image.new('1', (max(right - left, 1), max(bottom - top, 1)))
+        ImageDraw.Draw(image).text((-left, -top), char, font=font, fill=255, anchor='ls')
+        glyph = (image, left, top, font.getlength(char, mode='1'))
+        self._lru_put(self._glyphs, key, glyph, self.max_glyphs)
+        return glyph
+
+    def _layout(self, text: str, font) -> LineBitmap:
+        """以快取的字形組合整行（FreeType 字型），否則整行點陣化"""
+        if not isinstance(font, ImageFont.FreeTypeFont):
+            left, top, right, bottom = font.getbbox(text)
+            width, height = max(right, 1), max(bottom, 1)
+            image = Image.new('1', (width, height))
+            ImageDraw.Draw(image).text((0, 0), text, font=font, fill=255)
+            return LineBitmap(image, right, bottom)
+
+        ascent, descent = font.getmetrics()
+        glyphs = [self._glyph(char, font) for char in text]
+        width = int(round(sum(advance for *_, advance in glyphs)))
+        image = Image.new('1', (max(width, 1), ascent + descent))
+        pen = 0.0
+        for glyph, left, top, advance in glyphs:
+            image.paste(1, (int(pen) + left, ascent + top), glyph)
+            pen += advance
+        return LineBitmap(image, width, ascent + descent)
+
+    def line(self, text: str, font) -> LineBitmap:
+        """
+        取得單行文字的點陣
+
+        Args:
+            text: 單行文字
+            font: PIL 字型
+
+        Returns:
+            LineBitmap（含實際像素寬度）
+        """
+        key = (text,) + font_key(font)
+        bitmap = self._lru_get(self._lines, key)
+        if bitmap is not None:
+            metrics.incr('text_cache.line_hit')
+            return bitmap
+        metrics.incr('text_cache.line_miss')
+        bitmap = self._layout(text, font)
+        self._lru_put(self._lines, key, bitmap, self.max_lines)
+        return bitmap
+
+    def width(self, text: str, font) -> int:
+        """文字的實際像素寬度"""
+        return self.line(text, font).width
+
+    def wrap(self, text: str, font, width: int) -> List[str]:
+        """
+        依像素寬度斷行
+
+        逐字累加字形前進寬度，超過 width 時換行；行內有空白時在最後一個空白處斷開，
+        避免把英文單字切成兩半。原文的換行保留。
+
+        Args:
+            text: 文字
+            font: PIL 字型
+            width: 每行最大像素寬度
+
+        Returns:
+            行列表
+        """
+        freetype = isinstance(font, ImageFont.FreeTypeFont)
+        lines = []
+        for paragraph in text.split('\n'):
+            current = ''
+            advances = []
+            for char in paragraph:
+                advance = self._glyph(char, font)[3] if freetype else font.getlength(char)
+                if current and sum(advances) + advance > width:
+                    space = current.rfind(' ')
+                    if space > 0:
+                        lines.append(current[:space])
+                        current = current[space + 1:]
+                        advances = advances[space + 1:]
+                    else:
+                        lines.append(current)
+                        current = ''
+                        advances = []
+                current += char
+                advances.append(advance)
+            lines.append(current)
+        return lines
+
+
+if __name__ == '__main__':
+    # 比較快取與直接繪製的結果與耗時
+    import os
+    import time
+    print("文字快取測試")
+    font_path = os.path.join(config.Config.ASSETS_FONTS_PATH, 'default.ttf')
+    font = ImageFont.truetype(font_path, 12) if os.path.exists(font_path) else ImageFont.load_default()
+    cache = TextCache()
+    texts = ["錄音中...", "處理中...", "模式: 聊天", "Hello World"]
+
+    start = time.perf_counter()
+    for _ in range(50):
+        for text in texts:
+            image = Image.new('1', (128, 64))
+            ImageDraw.Draw(image).text((0, 0), text, font=font, fill=255)
+    direct = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(50):
+        for text in texts:
+            image = Image.new('1', (128, 64))
+            ImageDraw.Draw(image).bitmap((0, 0), cache.line(text, font).image, fill=255)
+    cached = time.perf_counter() - start
+
+    print(f"  直接繪製 {direct * 1000:.1f} ms，快取 {cached * 1000:.1f} ms")
+    for text in texts:
+        print(f"  {text}: 寬度 {cache.width(text, font)} px（舊估計 {len(text) * 6} px）")
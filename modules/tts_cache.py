@@ -0,0 +1,175 @@
+"""
+檔案標準 (Standard):
+本檔案實作語音合成結果的磁碟快取 (TTSCache)，以內容定址：
+鍵值為 (文字, voice_id, 語速, 音調, 音量) 的 SHA-256，系統音與分身音共用同一個快取。
+- 音訊以壓縮編碼儲存（FLAC 或 Opus）
+- 總大小超過上限時，依最近使用時間 (LRU) 淘汰最舊的項目；命中時更新檔案時間
+- 命中時直接回傳 PCM，不需任何網路請求
+輸入：合成參數、合成後的 PCM
+輸出：快取的 PCM 與取樣率
+
+執行方式 (Execution):
+- 被 modules.audio 的 text_to_speech 與 prerender 使用
+- 獨立測試：python -m modules.tts_cache (寫入與淘汰測試)
+
+相依性 (Dependencies):
+- soundfile: 編碼與解碼
+- hashlib / json: 內容定址鍵值
+- config: 系統配置（快取目錄、大小上限、編碼）
+- modules.metrics: 命中/未命中計數
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import uuid
+from typing import Optional, Tuple
+import numpy as np
+import soundfile as sf
+import config
+from modules.metrics import metrics
+
+# 快取編碼：名稱 -> (soundfile 格式, 編碼子類型, 副檔名)
+CACHE_CODECS = {
+    'flac': ('FLAC', 'PCM_16', '.flac'),
+    'opus': ('OGG', 'OPUS', '.ogg'),
+}
+
+# Opus 只支援這些取樣率，其他取樣率改用 FLAC
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class TTSCache:
+    """內容定址的語音合成快取"""
+
+    def __init__(self, directory: str = None, max_bytes: int = None, codec: str = None):
+        """
+        初始化快取
+
+        Args:
+            directory: 快取目錄，預設使用 config.TTS_CACHE_DIR
+            max_bytes: 快取大小上限，預設使用 config.TTS_CACHE_MAX_BYTES
+            codec: 'flac' 或 'opus'，預設使用 config.TTS_CACHE_CODEC
+        """
+        self.directory = directory or config.Config.TTS_CACHE_DIR
+        self.max_bytes = max_bytes or config.Config.TTS_CACHE_MAX_BYTES
+        self.codec = codec or config.Config.TTS_CACHE_CODEC
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(text: str,
+            voice_id: str,
+            speed_ratio: float = 1.0,
+            pitch_ratio: float = 1.0,
+            volume_ratio: float = 1.0) -> str:
+        """
+        計算快取鍵值
+
+        Returns:
+            SHA-256 十六進位字串
+        """
+        raw = json.dumps(
+            [text, voice_id, float(speed_ratio), float(pitch_ratio), float(volume_ratio)],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _find(self, key: str) -> Optional[str]:
+        """找出鍵值對應的檔案（編碼可能因取樣率不同而異）"""
+        for _, _, suffix in CACHE_CODECS.values():
+            path = os.path.join(self.directory, key + suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, int, str]]:
+        """
+        讀取快取
+
+        Args:
+            key: 快取鍵值
+
+        Returns:
+            (PCM, 取樣率, 檔案路徑)，未命中返回 None
+        """
+        path = self._find(key)
+        if path is None:
+            metrics.incr('tts_cache.miss')
+            return None
+        try:
+            data, sr = sf.read(path, dtype='float32')
+        except Exception as e:
+            print(f"TTS 快取損毀，已刪除: {e}")
+            # 檔案可能同時被淘汰（已不存在），同樣視為未命中
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            metrics.incr('tts_cache.miss')
+            return None
+        # 更新使用時間（LRU；讀取後才被淘汰時資料已讀出，仍為命中）
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        metrics.incr('tts_cache.hit')
+        return data, sr, path
+
+    def contains(self, key: str) -> bool:
+        """是否已快取"""
+        return self._find(key) is not None
+
+    def put(self, key: str, data: np.ndarray, sample_rate: int) -> str:
+        """
+        寫入快取並依大小上限淘汰
+
+        Args:
+            key: 快取鍵值
+            data: PCM 音訊
+            sample_rate: 取樣率
+
+        Returns:
+            快取檔案路徑
+        """
+        codec = self.codec
+        if codec == 'opus' and sample_rate not in OPUS_RATES:
+            codec = 'flac'
+        format, subtype, suffix = CACHE_CODECS[codec]
+        path = os.path.join(self.directory, key + suffix)
+        # 暫存檔名唯一，同一鍵值同時寫入時不會互相覆蓋
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        sf.write(tmp_path, data, sample_rate, format=format, subtype=subtype)
+        os.replace(tmp_path, path)
+        self._evict()
+        return path
+
+    def _evict(self):
+        """淘汰最久未使用的項目，直到總大小低於上限"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                total -= size
+                metrics.incr('tts_cache.evicted')
+            except OSError:
+                pass
+
+
+if __name__ == '__main__':
+    # 寫入與淘汰測試
+    import tempfile
+    print("TTS 快取測試")
+    cache = TTSCache(tempfile.mkdtemp(), max_bytes=40000, codec='flac')
+    tone = np.sin(np.arange(24000) * 2 * np.pi * 440 / 24000).astype(np.float32) * 0.3
+    keys = [TTSCache.key(f"第 {i} 句", 'voice') for i in range(5)]
+    for key in keys:
+        cache.put(key, tone, 24000)
+    print(f"  保留: {[cache.contains(key) for key in keys]}")
+    hit = cache.get(keys[-1])
+    print(f"  命中: {hit is not None}, {len(hit[0]) if hit else 0} 幀")
@@ -0,0 +1,172 @@
+"""
+檔案標準 (Standard):
+本檔案提供非同步相依圖 (TaskGraph)，用於將一次互動回合拆成多個步驟，
+每個步驟在其相依步驟完成後立即開始，彼此獨立的步驟同時執行。
+執行結束後回報各步驟耗時、關鍵路徑，以及相較於循序執行省下的時間。
+輸入：步驟名稱、產生 coroutine 的函式、相依步驟
+輸出：各步驟結果字典與時間報告
+
+執行方式 (Execution):
+- 被 main.py 的聊天回合使用
+- 獨立測試：python -m modules.turn_graph
+
+相依性 (Dependencies):
+- asyncio: 並行執行
+- modules.metrics: 記錄省下的時間與各步驟耗時（graph.<圖名稱>.<步驟>，為一般觀測值而非回合階段：
+  步驟內的程式已以 span 記錄階段，若再計入回合會重複計算）
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+from modules.metrics import metrics
+
+
+class TaskGraph:
+    """非同步相依圖
+
+    每個步驟的函式接收目前的結果字典 (results)，可讀取相依步驟的輸出。
+    相依步驟失敗時，後續步驟不會執行，並記錄為失敗。
+    """
+
+    def __init__(self, name: str):
+        """
+        初始化相依圖
+
+        Args:
+            name: 圖名稱（用於指標名稱，例如 'chat'）
+        """
+        self.name = name
+        self.nodes: Dict[str, tuple] = {}
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.timings: Dict[str, tuple] = {}
+
+    def add(self,
+            name: str,
+            fn: Callable[[Dict[str, Any]], Awaitable],
+            deps: Iterable[str] = ()):
+        """
+        新增步驟
+
+        Args:
+            name: 步驟名稱
+            fn: 接收結果字典、返回 coroutine 的函式
+            deps: 相依步驟名稱
+        """
+        deps = tuple(deps)
+        for dep in deps:
+            if dep not in self.nodes:
+                raise ValueError(f"相依步驟尚未定義: {dep}")
+        self.nodes[name] = (fn, deps)
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        執行相依圖
+
+        Returns:
+            各步驟結果字典（失敗或被略過的步驟不在其中）
+        """
+        tasks: Dict[str, asyncio.Task] = {}
+        self._origin = time.perf_counter()
+
+        async def run_node(name: str):
+            fn, deps = self.nodes[name]
+            for dep in deps:
+                try:
+                    await tasks[dep]
+                except BaseException:
+                    raise RuntimeError(f"相依步驟失敗: {dep}")
+            start = time.perf_counter()
+            try:
+                result = await fn(self.results)
+            finally:
+                self.timings[name] = (start - self._origin, time.perf_counter() - self._origin)
+                metrics.observe(f'graph.{self.name}.{name}', self.timings[name][1] - self.timings[name][0])
+            self.results[name] = result
+            return result
+
+        for name in self.nodes:
+            tasks[name] = asyncio.create_task(run_node(name))
+
+        try:
+            outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        except asyncio.CancelledError:
+            # 回合被取消（例如被新的錄音取代）：等所有步驟結束並取回結果後再傳遞取消
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        for name, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, BaseException):
+                self.errors[name] = outcome
+        return self.results
+
+    def critical_path(self) -> List[str]:
+        """
+        取得關鍵路徑（從最後完成的步驟沿著最晚完成的相依步驟回溯）
+
+        Returns:
+            步驟名稱列表（依執行順序）
+        """
+        if not self.timings:
+            return []
+        current = max(self.timings, key=lambda n: self.timings[n][1])
+        path = [current]
+        while True:
+            deps = [d for d in self.nodes[current][1] if d in self.timings]
+            if not deps:
+                break
+            current = max(deps, key=lambda n: self.timings[n][1])
+            path.append(current)
+        return list(reversed(path))
+
+    def report(self) -> Dict:
+        """
+        產生時間報告，並記錄到指標
+
+        Returns:
+            {'wall', 'sequential', 'saved', 'critical_path', 'steps'}
+        """
+        durations = {name: end - start for name, (start, end) in self.timings.items()}
+        wall = max((end for _, end in self.timings.values()), default=0.0)
+        sequential = sum(durations.values())
+        saved = max(0.0, sequential - wall)
+
+        metrics.observe(f'graph.{self.name}.wall', wall)
+        metrics.observe(f'graph.{self.name}.saved', saved)
+
+        return {
+            'wall': wall,
+            'sequential': sequential,
+            'saved': saved,
+            'critical_path': self.critical_path(),
+            'steps': durations,
+        }
+
+
+if __name__ == '__main__':
+    # 測試相依圖
+    print("相依圖測試")
+
+    async def test():
+        def step(seconds, value):
+            async def fn(results):
+                await asyncio.sleep(seconds)
+                return value
+            return fn
+
+        graph = TaskGraph('test')
+        graph.add('stt', step(0.3, '文字'))
+        graph.add('prefetch', step(0.2, []))
+        graph.add('llm', step(0.4, '回應'), deps=['stt', 'prefetch'])
+        graph.add('store', step(0.1, 1), deps=['stt'])
+        graph.add('warm', step(0.2, True), deps=['stt'])
+        graph.add('tts', step(0.3, 'url'), deps=['llm', 'warm'])
+        await graph.run()
+
+        report = graph.report()
+        print(f"  實際耗時: {report['wall']:.2f}s，循序耗時: {report['sequential']:.2f}s")
+        print(f"  省下: {report['saved']:.2f}s，關鍵路徑: {' -> '.join(report['critical_path'])}")
+
+    asyncio.run(test())
@@ -0,0 +1,145 @@
+"""
+檔案標準 (Standard):
+本檔案實作能量式語音端點偵測 (EnergyVAD)，在錄音回呼中執行：
+1. 每個回呼區塊切成固定長度的分析幀，以 NumPy 一次算出所有幀的 RMS 能量 (dBFS)
+2. 能量高於「固定門檻」與「噪音底 + 餘裕」兩者中較高者即視為語音；噪音底由非語音幀的指數平均追蹤
+3. 累積語音超過 min_speech_ms 後才開始偵測結尾，之後連續靜音超過 hangover_ms 即判定說話結束
+4. 判定結束時（仍在音訊執行緒）呼叫 on_endpoint，由呼叫端轉交事件循環
+輸入：錄音回呼的音訊區塊
+輸出：說話結束通知、最後語音時間
+
+執行方式 (Execution):
+- 被 modules.audio 的 record_audio 使用（免持模式）
+- 獨立測試：python -m modules.vad (以合成訊號測試，不需麥克風)
+
+相依性 (Dependencies):
+- numpy: 向量化能量計算
+- config: 系統配置（門檻、保留時間）
+"""
+
+import time
+from typing import Callable, Optional
+import numpy as np
+import config
+
+
+class EnergyVAD:
+    """能量式語音端點偵測（含 hangover）"""
+
+    def __init__(self,
+                 sample_rate: int,
+                 frame_ms: float = None,
+                 threshold_db: float = None,
+                 noise_margin_db: float = None,
+                 hangover_ms: float = None,
+                 min_speech_ms: float = None,
+                 on_endpoint: Optional[Callable[[], None]] = None):
+        """
+        初始化端點偵測器
+
+        Args:
+            sample_rate: 取樣率
+            frame_ms: 分析幀長度（毫秒），預設使用 config.VAD_FRAME_MS
+            threshold_db: 語音能量下限 (dBFS)，預設使用 config.VAD_THRESHOLD_DB
+            noise_margin_db: 需高出噪音底的分貝數，預設使用 config.VAD_NOISE_MARGIN_DB
+            hangover_ms: 說話結束前需連續靜音的毫秒數，預設使用 config.VAD_HANGOVER_MS
+            min_speech_ms: 開始偵測結尾前需累積的語音毫秒數，預設使用 config.VAD_MIN_SPEECH_MS
+            on_endpoint: 判定說話結束時呼叫（在音訊執行緒執行，不可阻塞）
+        """
+        cfg = config.Config
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms or cfg.VAD_FRAME_MS
+        self.frame_length = int(sample_rate * self.frame_ms / 1000)
+        self.threshold_db = cfg.VAD_THRESHOLD_DB if threshold_db is None else threshold_db
+        self.noise_margin_db = cfg.VAD_NOISE_MARGIN_DB if noise_margin_db is None else noise_margin_db
+        self.hangover_frames = int((hangover_ms or cfg.VAD_HANGOVER_MS) / self.frame_ms)
+        self.min_speech_frames = int((min_speech_ms or cfg.VAD_MIN_SPEECH_MS) / self.frame_ms)
+        self.on_endpoint = on_endpoint
+        self.reset()
+
+    def reset(self):
+        """清除狀態（每次錄音開始時呼叫）"""
+        self.noise_floor_db = self.threshold_db - self.noise_margin_db
+        self.speech_frames = 0
+        self.silence_frames = 0
+        self.triggered = False
+        self.ended = False
+        self.last_speech_at: Optional[float] = None
+        self.endpoint_at: Optional[float] = None
+        self._carry = np.zeros(0, dtype=np.float32)
+
+    def process(self, block: np.ndarray) -> bool:
+        """
+        處理一個音訊區塊（在錄音回呼中呼叫）
+
+        Args:
+            block: 單聲道 float32 音訊
+
+        Returns:
+            是否已判定說話結束
+        """
+        if self.ended:
+            return True
+
+        samples = np.concatenate((self._carry, block)) if len(self._carry) else block
+        count = len(samples) // self.frame_length
+        self._carry = samples[count * self.frame_length:].copy()
+        if count == 0:
+            return False
+
+        # 所有幀的能量一次算出
+        frames = samples[:count * self.frame_length].reshape(count, self.frame_length)
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+        energy_db = 20.0 * np.log10(rms + 1e-10)
+        threshold = max(self.threshold_db, self.noise_floor_db + self.noise_margin_db)
+        speech = energy_db > threshold
+
+        silent = energy_db[~speech]
+        if len(silent):
+            # 噪音底以非語音幀的指數平均緩慢追蹤
+            self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * float(silent.mean())
+
+        voiced = np.flatnonzero(speech)
+        now = time.perf_counter()
+        if len(voiced):
+            self.speech_frames += len(voiced)
+            # 區塊內最後一個語音幀之後的幀數即為目前的連續靜音
+            self.silence_frames = count - 1 - int(voiced[-1])
+            self.last_speech_at = now - self.silence_frames * self.frame_ms / 1000
+        else:
+            self.silence_frames += count
+
+        if not self.triggered and self.speech_frames >= self.min_speech_frames:
+            self.triggered = True
+        if self.triggered and self.silence_frames >= self.hangover_frames:
+            self.ended = True
+            self.endpoint_at = now
+            if self.on_endpoint:
+                self.on_endpoint()
+        return self.ended
+
+
+if __name__ == '__main__':
+    # 以合成訊號測試：0.5 秒噪音、1 秒語音（含短暫停頓）、之後持續噪音
+    print("語音端點偵測測試")
+    rate = 16000
+    rng = np.random.default_rng(0)
+
+    def noise(seconds):
+        return (rng.standard_normal(int(rate * seconds)) * 0.002).astype(np.float32)
+
+    def voice(seconds):
+        t = np.arange(int(rate * seconds)) / rate
+        return (np.sin(2 * np.pi * 220 * t) * 0.2).astype(np.float32) + noise(seconds)
+
+    signal = np.concatenate([noise(0.5), voice(0.6), noise(0.3), voice(0.4), noise(3.0)])
+    speech_end = 0.5 + 0.6 + 0.3 + 0.4
+    vad = EnergyVAD(rate, hangover_ms=700)
+    for offset in range(0, len(signal), 1024):
+        if vad.process(signal[offset:offset + 1024]):
+            detected = (offset + 1024) / rate
+            print(f"  語音結束於 {speech_end:.2f}s，判定於 {detected:.2f}s"
+                  f"（延遲 {detected - speech_end:.2f}s，噪音底 {vad.noise_floor_db:.1f} dBFS）")
+            break
+    else:
+        print("  未判定結束")
@@ -0,0 +1,131 @@
+"""
+檔案標準 (Standard):
+本檔案負責啟動預熱與閒置保持連線，讓開機後第一次 STT、生成、語音克隆
+不必承擔 DNS 解析、TLS 交握與 SDK 延遲初始化的成本：
+1. 預先解析 Gemini 與語音克隆端點的 DNS
+2. 預先建立語音克隆連線，並呼叫低成本的模型中繼資料 API
+3. 裝置閒置時定期 ping，避免連線被伺服器關閉
+4. 記錄第一個互動回合的延遲，區分冷啟動 (cold) 與預熱後 (warm)
+輸入：AI 與 Audio 實例
+輸出：預熱耗時與第一回合延遲指標
+
+執行方式 (Execution):
+- 由 main.py 在顯示啟動畫面時同時執行
+- 獨立測試：python -m modules.warmup (只測試 DNS 解析)
+
+相依性 (Dependencies):
+- asyncio: 並行預熱與背景 ping
+- urllib.parse: 取得端點主機名稱
+- config: 系統配置（端點、ping 間隔）
+- modules.metrics: 預熱與第一回合延遲指標
+"""
+
+import asyncio
+import socket
+import time
+from typing import List
+from urllib.parse import urlparse
+import config
+from modules.metrics import metrics
+
+
+class Warmup:
+    """啟動預熱與閒置保持連線"""
+
+    def __init__(self, ai=None, audio=None):
+        """
+        初始化預熱
+
+        Args:
+            ai: modules.ai.AI 實例
+            audio: modules.audio.Audio 實例
+        """
+        self.ai = ai
+        self.audio = audio
+        self.completed = False
+        self.last_activity = time.monotonic()
+        self._first_turn_recorded = False
+
+    @staticmethod
+    def hosts() -> List[str]:
+        """需要預先解析的主機名稱"""
+        hosts = [config.Config.GEMINI_API_HOST]
+        for url in (config.Config.VOICE_CLONE_SYNC_URL, config.Config.VOICE_CLONE_UPLOAD_URL):
+            host = urlparse(url).hostname
+            if host and host not in hosts:
+                hosts.append(host)
+        return hosts
+
+    async def _resolve(self, host: str):
+        """解析單一主機（結果由系統解析器快取）"""
+        start = time.perf_counter()
+        try:
+            await asyncio.get_running_loop().getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+            metrics.observe('warmup.dns', time.perf_counter() - start)
+        except Exception as e:
+            print(f"DNS 預先解析失敗 ({host}): {e}")
+
+    async def _ping(self):
+        """建立/保持 AI 後端與語音克隆連線"""
+        jobs = []
+        if self.ai:
+            jobs.append(self.ai.warm_up())
+        if self.audio:
+            jobs.append(self.audio.warm_up_connection())
+        await asyncio.gather(*jobs)
+
+    async def run(self):
+        """執行預熱（DNS 解析後建立連線）"""
+        if not config.Config.WARMUP_ENABLED:
+            return
+
+        start = time.perf_counter()
+        await asyncio.gather(*(self._resolve(host) for host in self.hosts()))
+        await self._ping()
+        elapsed = time.perf_counter() - start
+        metrics.observe('warmup.total', elapsed)
+        self.completed = True
+        print(f"連線預熱完成: {elapsed:.2f}s")
+
+    def mark_activity(self):
+        """記錄互動時間（閒置判斷用）"""
+        self.last_activity = time.monotonic()
+
+    async def keepalive(self):
+        """閒置時定期 ping，互動中不送出"""
+        if not config.Config.WARMUP_ENABLED:
+            return
+
+        interval = config.Config.WARMUP_KEEPALIVE_INTERVAL
+        while True:
+            await asyncio.sleep(interval)
+            if time.monotonic() - self.last_activity >= interval:
+                metrics.incr('warmup.keepalive')
+                await self._ping()
+
+    def record_first_turn(self, seconds: float):
+        """
+        記錄開機後第一個互動回合的延遲，依是否已完成預熱分類（之後的回合忽略）
+
+        Args:
+            seconds: 回合耗時（秒）
+        """
+        if self._first_turn_recorded:
+            return
+        self._first_turn_recorded = True
+        kind = 'warm' if self.completed else 'cold'
+        metrics.observe(f'turn.first.{kind}', seconds)
+        print(f"第一回合延遲 ({kind}): {seconds:.2f}s")
+
+
+if __name__ == '__main__':
+    # 只測試 DNS 解析（不需 API 金鑰）
+    print("預熱測試")
+
+    async def test():
+        warmup = Warmup()
+        for host in warmup.hosts():
+            await warmup._resolve(host)
+            print(f"  {host}: {metrics.samples('warmup.dns')[-1:]}")
+
+    asyncio.run(test())